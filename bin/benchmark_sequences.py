@@ -1,7 +1,8 @@
 #!/usr/bin/env python
-"""Benchmark blessed text manipulation functions."""
+"""Benchmark blessed text manipulation, input decoding, formatting, and color functions."""
 import timeit
 from blessed import Terminal
+from blessed.keyboard import resolve_sequence
 
 
 def main():
@@ -39,6 +40,28 @@ def main():
         t = timeit.timeit(lambda txt=text: term.wrap(txt, 40), number=100)
         print(f"  wrap:       {t * 1000:.2f}ms/100")
 
+    print("\n=== input decoding ===")
+    for name, seq in (('legacy', '\x1b[A'), ('kitty', '\x1b[97;5u'),
+                      ('mouse', '\x1b[<0;10;20M'), ('paste', '\x1b[200~text\x1b[201~')):
+        t = timeit.timeit(lambda s=seq: resolve_sequence(
+            s, term._keymap, term._keycodes, term._keymap_prefixes, final=True,
+            dec_mode_cache={1006: 1, 1000: 1, 2004: 1}), number=1000)
+        print(f"  {name + ':':11} {t * 1000:.2f}ms/1000")
+
+    print("\n=== formatting ===")
+    t = timeit.timeit(lambda: term.__getattr__('bold_red_on_blue'), number=1000)
+    print(f"  compound:   {t * 1000:.2f}ms/1000")
+    t = timeit.timeit(lambda: term.move(10, 20), number=1000)
+    print(f"  move:       {t * 1000:.2f}ms/1000")
+
+    print("\n=== rgb_downconvert, 256 colors ===")
+    term.number_of_colors = 256
+    for algorithm in ('rgb', 'rgb-weighted', 'cie76', 'cie94', 'cie2000'):
+        term.color_distance_algorithm = algorithm
+        t = timeit.timeit(lambda: [term.rgb_downconvert(v, 255 - v, v // 2)
+                                   for v in range(256)], number=10)
+        print(f"  {algorithm + ':':13} {t * 1000:.2f}ms/2560")
+
 
 if __name__ == '__main__':
     main()
@@ -9,6 +9,7 @@ import contextlib
 
 # local
 import blessed
+import blessed.scheduler
 
 
 def scale_255(val): return int(round(val * 255))
@@ -29,7 +30,13 @@ def rgb_at_xy(term, x, y, t):
     return tuple(map(scale_255, colorsys.hsv_to_rgb(hue / 8.0, saturation, lightness)))
 
 
-def screen_plasma(term, plasma_fn, t):
+def screen_plasma(term, plasma_fn, t, dither=None):
+    if dither and term.number_of_colors <= 256:
+        width, height = term.width, term.height - 1
+        pixels = bytes(value for y in range(height) for x in range(width)
+                       for value in plasma_fn(term, x, y, t))
+        codes = term.rgb_downconvert_dithered(pixels, width, height, dither)
+        return ''.join(term.on_color(code) + ' ' for code in bytes(codes))
     result = ''
     for y in range(term.height - 1):
         for x in range(term.width):
@@ -58,10 +65,8 @@ def show_please_wait(term):
 
 def show_paused(term):
     txt_paused = 'paused'
-    outp = term.move_yx(term.height - 1, int(term.width / 2 - len(txt_paused) / 2))
-    outp += txt_paused
-    print(outp, end='')
-    sys.stdout.flush()
+    return (term.move_yx(term.height - 1, int(term.width / 2 - len(txt_paused) / 2)) +
+            txt_paused)
 
 
 def next_algo(algo, forward):
@@ -80,9 +85,15 @@ def next_color(color, forward):
     return colorspaces[next_index]
 
 
-def status(term, elapsed):
+def next_dither(dither):
+    methods = (None,) + blessed.color.DITHER_METHODS
+    return methods[(methods.index(dither) + 1) % len(methods)]
+
+
+def status(term, elapsed, dither):
     left_txt = (f'{term.number_of_colors} colors - '
-                f'{term.color_distance_algorithm} - ?: help ')
+                f'{term.color_distance_algorithm} - '
+                f'{dither or "no"} dither - ?: help ')
     right_txt = f'fps: {1 / elapsed:2.2f}'
     return ('\n' + term.normal +
             term.white_on_blue + term.clear_eol + left_txt +
@@ -90,43 +101,44 @@ def status(term, elapsed):
 
 
 def main(term):
+    pause, dither, t = False, None, time.time()
+
+    def on_frame():
+        nonlocal t
+        if not pause:
+            t = time.time()
+        with elapsed_timer() as elapsed:
+            outp = term.home + screen_plasma(term, rgb_at_xy, t, dither)
+        outp += status(term, elapsed(), dither)
+        if pause:
+            outp += show_paused(term)
+        # drawn within term.frame(): one write, synchronized when supported to reduce tearing
+        print(outp, end='')
+
+    def on_key(inp):
+        nonlocal pause, dither
+        if inp == '?':
+            assert False, "don't panic"
+
+        if inp in ('[', ']'):
+            term.color_distance_algorithm = next_algo(
+                term.color_distance_algorithm, inp == '[')
+            show_please_wait(term)
+        if inp == ' ':
+            pause = not pause
+            scheduler.animate = not pause
+        if inp == 'd':
+            dither = next_dither(dither)
+
+        if inp.code in (term.KEY_TAB, term.KEY_BTAB):
+            term.number_of_colors = next_color(
+                term.number_of_colors, inp.code == term.KEY_TAB)
+            show_please_wait(term)
+
+    # every keystroke redraws, ^L included, and frames are drawn continuously unless paused
+    scheduler = blessed.scheduler.Scheduler(term, on_frame, on_key, fps=60, animate=True)
     with term.cbreak(), term.hidden_cursor(), term.fullscreen():
-        pause, dirty = False, True
-        t = time.time()
-        while True:
-            if dirty or not pause:
-                if not pause:
-                    t = time.time()
-                with elapsed_timer() as elapsed:
-                    outp = term.home + screen_plasma(term, rgb_at_xy, t)
-                outp += status(term, elapsed())
-                # Use synchronized output to reduce tearing and improve smoothness
-                with term.dec_modes_enabled(term.DecPrivateMode.SYNCHRONIZED_OUTPUT):
-                    print(outp, end='')
-                    sys.stdout.flush()
-                dirty = False
-            if pause:
-                show_paused(term)
-
-            inp = term.inkey(timeout=None if pause else 0.01)
-            if inp == '?':
-                assert False, "don't panic"
-            elif inp == '\x0c':
-                dirty = True
-
-            if inp in ('[', ']'):
-                term.color_distance_algorithm = next_algo(
-                    term.color_distance_algorithm, inp == '[')
-                show_please_wait(term)
-                dirty = True
-            if inp == ' ':
-                pause = not pause
-
-            if inp.code in (term.KEY_TAB, term.KEY_BTAB):
-                term.number_of_colors = next_color(
-                    term.number_of_colors, inp.code == term.KEY_TAB)
-                show_please_wait(term)
-                dirty = True
+        scheduler.run()
 
 
 if __name__ == "__main__":
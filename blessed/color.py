@@ -6,14 +6,38 @@ References,
 - https://en.wikipedia.org/wiki/Color_difference
 - http://www.easyrgb.com/en/math.php
 - Measuring Colour by R.W.G. Hunt and M.R. Pointer
+
+Each distance function has a batch version, such as :func:`dist_cie2000_batch`, accepting
+sequences of colors, and :func:`nearest_color_batch` and :func:`xterm256_from_rgb_batch`
+match every color of an image to a palette in one call.  When NumPy_ is installed, these are
+computed by array operations, otherwise by the functions of single colors, returning
+:class:`array.array`.
+
+.. _NumPy: https://numpy.org/
 """
 
 # std imports
+import array
+import itertools
 from math import cos, exp, sin, sqrt, atan2
-from typing import Dict, Tuple, Callable
+from typing import Any, Dict, List, Tuple, Union, Callable, Optional, Sequence
 from functools import lru_cache
 
+try:
+    # 3rd party
+    import numpy
+except ImportError:
+    numpy = None  # type: ignore[assignment]
+
+# local
+from .colorspace import RGB_256TABLE
+
 _RGB = Tuple[int, int, int]
+_LAB = Tuple[float, float, float]
+
+#: Colors accepted by batch functions: a single RGB tuple, a sequence of RGB tuples, flat
+#: 8-bit RGB bytes such as an image buffer, or a NumPy array of shape ``(..., 3)``.
+ColorsLike = Union[_RGB, Sequence[_RGB], bytes, bytearray, memoryview, Any]
 
 
 def rgb_to_xyz(red: int, green: int, blue: int) -> Tuple[float, float, float]:
@@ -70,11 +94,14 @@ def xyz_to_lab(x_val: float, y_val: float, z_val: float) -> Tuple[float, float,
     return cie_l, cie_a, cie_b
 
 
-@lru_cache(maxsize=256)
+@lru_cache(maxsize=4096)
 def rgb_to_lab(red: int, green: int, blue: int) -> Tuple[float, float, float]:
     """
     Convert RGB color to CIE-Lab color.
 
+    Results of recently converted colors are cached.  The colors of the xterm 256-color palette
+    are precomputed, see :func:`palette_lab`.
+
     :arg int red: RGB value of Red.
     :arg int green: RGB value of Green.
     :arg int blue: RGB value of Blue.
@@ -133,13 +160,24 @@ def dist_cie76(rgb1: _RGB, rgb2: _RGB) -> float:
     :rtype: float For efficiency, the square of the distance is returned which is sufficient for
         comparisons
     """
-    l_1, a_1, b_1 = rgb_to_lab(*rgb1)
-    l_2, a_2, b_2 = rgb_to_lab(*rgb2)
+    return dist_cie76_lab(palette_lab(rgb1), palette_lab(rgb2))
+
+
+def dist_cie76_lab(lab1: _LAB, lab2: _LAB) -> float:
+    """
+    Determine distance between two CIE-Lab colors using the CIE76 algorithm.
+
+    :arg tuple lab1: CIE-Lab color, as returned by :func:`rgb_to_lab`
+    :arg tuple lab2: CIE-Lab color, as returned by :func:`rgb_to_lab`
+    :returns: Square of the distance between provided colors
+    :rtype: float
+    """
+    l_1, a_1, b_1 = lab1
+    l_2, a_2, b_2 = lab2
     return pow(l_1 - l_2, 2) + pow(a_1 - a_2, 2) + pow(b_1 - b_2, 2)
 
 
 def dist_cie94(rgb1: _RGB, rgb2: _RGB) -> float:
-    # pylint: disable=too-many-locals
     """
     Determine distance between two rgb colors using the CIE94 algorithm.
 
@@ -149,8 +187,21 @@ def dist_cie94(rgb1: _RGB, rgb2: _RGB) -> float:
     :rtype: float For efficiency, the square of the distance is returned which is sufficient for
         comparisons
     """
-    l_1, a_1, b_1 = rgb_to_lab(*rgb1)
-    l_2, a_2, b_2 = rgb_to_lab(*rgb2)
+    return dist_cie94_lab(palette_lab(rgb1), palette_lab(rgb2))
+
+
+def dist_cie94_lab(lab1: _LAB, lab2: _LAB) -> float:
+    # pylint: disable=too-many-locals
+    """
+    Determine distance between two CIE-Lab colors using the CIE94 algorithm.
+
+    :arg tuple lab1: CIE-Lab color, as returned by :func:`rgb_to_lab`
+    :arg tuple lab2: CIE-Lab color, as returned by :func:`rgb_to_lab`
+    :returns: Square of the distance between provided colors
+    :rtype: float
+    """
+    l_1, a_1, b_1 = lab1
+    l_2, a_2, b_2 = lab2
 
     s_l = k_l = k_c = k_h = 1
     k_1 = 0.045
@@ -172,7 +223,6 @@ def dist_cie94(rgb1: _RGB, rgb2: _RGB) -> float:
 
 
 def dist_cie2000(rgb1: _RGB, rgb2: _RGB) -> float:
-    # pylint: disable=too-many-locals
     """
     Determine distance between two rgb colors using the CIE2000 algorithm.
 
@@ -182,10 +232,23 @@ def dist_cie2000(rgb1: _RGB, rgb2: _RGB) -> float:
     :rtype: float For efficiency, the square of the distance is returned which is sufficient for
         comparisons
     """
+    return dist_cie2000_lab(palette_lab(rgb1), palette_lab(rgb2))
+
+
+def dist_cie2000_lab(lab1: _LAB, lab2: _LAB) -> float:
+    # pylint: disable=too-many-locals
+    """
+    Determine distance between two CIE-Lab colors using the CIE2000 algorithm.
+
+    :arg tuple lab1: CIE-Lab color, as returned by :func:`rgb_to_lab`
+    :arg tuple lab2: CIE-Lab color, as returned by :func:`rgb_to_lab`
+    :returns: Square of the distance between provided colors
+    :rtype: float
+    """
     s_l = k_l = k_c = k_h = 1.0
 
-    l_1, a_1, b_1 = rgb_to_lab(*rgb1)
-    l_2, a_2, b_2 = rgb_to_lab(*rgb2)
+    l_1, a_1, b_1 = lab1
+    l_2, a_2, b_2 = lab2
 
     delta_l = l_2 - l_1
     l_mean = (l_1 + l_2) / 2
@@ -242,6 +305,13 @@ COLOR_DISTANCE_ALGORITHMS: Dict[str,
                                                     'cie94': dist_cie94,
                                                     'cie2000': dist_cie2000}
 
+#: Distance functions of CIE-Lab colors, by the same keys as :data:`COLOR_DISTANCE_ALGORITHMS`
+#: of the algorithms measuring CIE-Lab colors.
+COLOR_DISTANCE_LAB_ALGORITHMS: Dict[str, Callable[[_LAB, _LAB], float]] = {
+    'cie76': dist_cie76_lab,
+    'cie94': dist_cie94_lab,
+    'cie2000': dist_cie2000_lab}
+
 # Precomputed lookup tables for fast 256-color xterm cube mapping
 # Based on xterm's 256colres.pl: levels [0, 95, 135, 175, 215, 255] for 6x6x6 cube
 _CUBE_LEVELS = (0, 95, 135, 175, 215, 255)
@@ -267,6 +337,29 @@ _GRAY_IDX_FROM_V = tuple(
 # Precomputed gray values for each gray index (0-23)
 _GRAY_VAL_FROM_IDX = tuple(8 + 10 * i for i in range(24))
 
+# Precomputed CIE-Lab color of every candidate of rgb_downconvert(): the 16 ANSI colors, and
+# each color of the cube and grayscale ramp
+_PALETTE_LAB: Dict[_RGB, _LAB] = {
+    tuple(rgb): rgb_to_lab.__wrapped__(*rgb) for rgb in itertools.chain(
+        RGB_256TABLE[:16],
+        itertools.product(_CUBE_LEVELS, repeat=3),
+        ((val, val, val) for val in _GRAY_VAL_FROM_IDX))}
+
+
+def palette_lab(rgb: _RGB) -> _LAB:
+    """
+    Return CIE-Lab color of an RGB color, precomputed for the xterm 256-color palette.
+
+    Colors of the 16 ANSI colors, the 6x6x6 color cube, and the grayscale ramp are found without
+    conversion, any other color by :func:`rgb_to_lab`.
+
+    :arg tuple rgb: RGB color definition
+    :returns: Tuple (L, a, b) representing CIE-Lab color
+    :rtype: tuple
+    """
+    lab = _PALETTE_LAB.get(rgb)
+    return rgb_to_lab(*rgb) if lab is None else lab
+
 
 def xterm256color_from_rgb(red: int, green: int, blue: int) -> Tuple[int, _RGB]:
     """
@@ -312,3 +405,456 @@ def xterm256gray_from_rgb(red: int, green: int, blue: int) -> Tuple[int, _RGB]:
     gray_rgb = (gray_val, gray_val, gray_val)
 
     return gray_idx, gray_rgb
+
+
+def _is_single(colors: Any) -> bool:
+    return (isinstance(colors, tuple) and len(colors) == 3
+            and not isinstance(colors[0], (tuple, list)))
+
+
+def _as_array(colors: 'ColorsLike') -> Any:
+    # float64 NumPy array of shape (..., 3)
+    if isinstance(colors, (bytes, bytearray, memoryview)):
+        return numpy.frombuffer(colors, dtype=numpy.uint8).reshape(-1, 3).astype(numpy.float64)
+    return numpy.asarray(colors, dtype=numpy.float64)
+
+
+def _as_tuples(colors: 'ColorsLike') -> Union[List[_RGB], 'itertools.repeat[_RGB]']:
+    # list of RGB tuples, or a single color repeated without end, to be paired by map()
+    if isinstance(colors, (bytes, bytearray, memoryview)):
+        data = bytes(colors)
+        return list(zip(data[0::3], data[1::3], data[2::3]))
+    if _is_single(colors):
+        return itertools.repeat(tuple(colors))
+    return [tuple(color) for color in colors]
+
+
+def _np_rgb_to_lab(rgb: Any) -> Any:
+    val = rgb / 255.0
+    val = numpy.where(val > 0.04045, ((val + 0.055) / 1.055) ** 2.4, val / 12.92) * 100
+    red, green, blue = val[..., 0], val[..., 1], val[..., 2]
+    xyz = (numpy.stack((red * 0.4124 + green * 0.3576 + blue * 0.1805,
+                        red * 0.2126 + green * 0.7152 + blue * 0.0722,
+                        red * 0.0193 + green * 0.1192 + blue * 0.9505), axis=-1)
+           / (95.047, 100.0, 108.883))
+    xyz = numpy.where(xyz > 0.008856, xyz ** (1 / 3.0), 7.787 * xyz + 16 / 116.0)
+    x_val, y_val, z_val = xyz[..., 0], xyz[..., 1], xyz[..., 2]
+    return numpy.stack((116 * y_val - 16, 500 * (x_val - y_val), 200 * (y_val - z_val)), axis=-1)
+
+
+def _np_dist_rgb(rgb1: Any, rgb2: Any) -> Any:
+    return ((rgb1 - rgb2) ** 2).sum(axis=-1)
+
+
+def _np_dist_rgb_weighted(rgb1: Any, rgb2: Any) -> Any:
+    red_mean = (rgb1[..., 0] + rgb2[..., 0]) / 2.0
+    delta = (rgb1 - rgb2) ** 2
+    return ((2 + red_mean / 256) * delta[..., 0] + 4 * delta[..., 1]
+            + (2 + (255 - red_mean) / 256) * delta[..., 2])
+
+
+def _np_dist_cie76(lab1: Any, lab2: Any) -> Any:
+    return ((lab1 - lab2) ** 2).sum(axis=-1)
+
+
+def _np_dist_cie94(lab1: Any, lab2: Any) -> Any:
+    delta_l = lab1[..., 0] - lab2[..., 0]
+    delta_a = lab1[..., 1] - lab2[..., 1]
+    delta_b = lab1[..., 2] - lab2[..., 2]
+    c_1 = numpy.sqrt(lab1[..., 1] ** 2 + lab1[..., 2] ** 2)
+    c_2 = numpy.sqrt(lab2[..., 1] ** 2 + lab2[..., 2] ** 2)
+    delta_c = c_1 - c_2
+    delta_h = numpy.sqrt(delta_a ** 2 + delta_b ** 2 + delta_c ** 2)
+    return (delta_l ** 2 + (delta_c / (1 + 0.045 * c_1)) ** 2
+            + (delta_h / (1 + 0.015 * c_1)) ** 2)
+
+
+def _np_dist_cie2000(lab1: Any, lab2: Any) -> Any:
+    # pylint: disable=too-many-locals
+    # the same formula as dist_cie2000(), including its mixture of degrees and radians
+    l_1, a_1, b_1 = lab1[..., 0], lab1[..., 1], lab1[..., 2]
+    l_2, a_2, b_2 = lab2[..., 0], lab2[..., 1], lab2[..., 2]
+    delta_l = l_2 - l_1
+    l_mean = (l_1 + l_2) / 2
+    c_1 = numpy.sqrt(a_1 ** 2 + b_1 ** 2)
+    c_2 = numpy.sqrt(a_2 ** 2 + b_2 ** 2)
+    c_mean = (c_1 + c_2) / 2
+    delta_c = c_1 - c_2
+
+    g_x = numpy.sqrt(c_mean ** 7 / (c_mean ** 7 + 25 ** 7))
+    h_1 = numpy.arctan2(b_1, a_1 + (a_1 / 2) * (1 - g_x)) % 360
+    h_2 = numpy.arctan2(b_2, a_2 + (a_2 / 2) * (1 - g_x)) % 360
+
+    achromatic = (c_1 == 0) | (c_2 == 0)
+    h_diff = h_2 - h_1
+    near = numpy.abs(h_diff) <= 180
+    delta_h_prime = numpy.where(
+        achromatic, 0.0, numpy.where(near, h_diff, numpy.where(h_2 <= h_1, h_diff + 360.0,
+                                                               h_diff - 360.0)))
+    h_sum = h_1 + h_2
+    h_mean = numpy.where(
+        achromatic, h_sum, numpy.where(near, h_sum / 2, numpy.where(h_sum < 360, (h_sum + 360) / 2,
+                                                                    (h_sum - 360) / 2)))
+
+    delta_h = 2 * numpy.sqrt(c_1 * c_2) * numpy.sin(delta_h_prime / 2)
+    t_x = (1 - 0.17 * numpy.cos(h_mean - 30) + 0.24 * numpy.cos(2 * h_mean)
+           + 0.32 * numpy.cos(3 * h_mean + 6) - 0.20 * numpy.cos(4 * h_mean - 63))
+    s_l = 1 + (0.015 * (l_mean - 50) ** 2) / numpy.sqrt(20 + (l_mean - 50) ** 2)
+    s_c = 1 + 0.045 * c_mean
+    s_h = 1 + 0.015 * c_mean * t_x
+    r_t = -2 * g_x * numpy.sin(numpy.abs(60 * numpy.exp(-1 * numpy.abs((delta_h - 275) / 25) ** 2)))
+
+    delta_l = delta_l / s_l
+    delta_c = delta_c / s_c
+    delta_h = delta_h / s_h
+    return delta_l ** 2 + delta_c ** 2 + delta_h ** 2 + r_t * delta_c * delta_h
+
+
+# algorithm name -> (whether it compares Lab colors, numpy implementation)
+_NP_DISTANCES: Dict[str, Tuple[bool, Callable[[Any, Any], Any]]] = {
+    'rgb': (False, _np_dist_rgb),
+    'rgb-weighted': (False, _np_dist_rgb_weighted),
+    'cie76': (True, _np_dist_cie76),
+    'cie94': (True, _np_dist_cie94),
+    'cie2000': (True, _np_dist_cie2000),
+}
+
+
+def rgb_to_lab_batch(colors: 'ColorsLike') -> Any:
+    """
+    Convert RGB colors to CIE-Lab colors.
+
+    :arg colors: RGB colors, see :data:`ColorsLike`.
+    :returns: NumPy array of shape ``(..., 3)`` when NumPy is installed, otherwise a flat
+        :class:`array.array` of L, a, b values of each color.
+    """
+    if numpy is not None:
+        return _np_rgb_to_lab(_as_array(colors))
+    tuples = _as_tuples(colors)
+    if isinstance(tuples, itertools.repeat):
+        tuples = [next(tuples)]
+    return array.array('d', (value for rgb in tuples for value in rgb_to_lab(*rgb)))
+
+
+def _distance_batch(algorithm: str, colors1: 'ColorsLike', colors2: 'ColorsLike') -> Any:
+    if numpy is not None:
+        uses_lab, fn_distance = _NP_DISTANCES[algorithm]
+        arr1, arr2 = _as_array(colors1), _as_array(colors2)
+        if uses_lab:
+            arr1, arr2 = _np_rgb_to_lab(arr1), _np_rgb_to_lab(arr2)
+        return fn_distance(arr1, arr2)
+    tuples1, tuples2 = _as_tuples(colors1), _as_tuples(colors2)
+    if isinstance(tuples1, itertools.repeat) and isinstance(tuples2, itertools.repeat):
+        tuples1 = [next(tuples1)]
+    return array.array('d', map(COLOR_DISTANCE_ALGORITHMS[algorithm], tuples1, tuples2))
+
+
+def dist_rgb_batch(colors1: 'ColorsLike', colors2: 'ColorsLike') -> Any:
+    """
+    Determine :func:`dist_rgb` between each pair of colors.
+
+    Either argument may be a single color, compared with every color of the other.
+
+    :arg colors1: RGB colors, see :data:`ColorsLike`.
+    :arg colors2: RGB colors, see :data:`ColorsLike`.
+    :returns: NumPy array of distances when NumPy is installed, otherwise :class:`array.array`.
+    """
+    return _distance_batch('rgb', colors1, colors2)
+
+
+def dist_rgb_weighted_batch(colors1: 'ColorsLike', colors2: 'ColorsLike') -> Any:
+    """
+    Determine :func:`dist_rgb_weighted` between each pair of colors.
+
+    :arg colors1: RGB colors, see :data:`ColorsLike`.
+    :arg colors2: RGB colors, see :data:`ColorsLike`.
+    :returns: NumPy array of distances when NumPy is installed, otherwise :class:`array.array`.
+    """
+    return _distance_batch('rgb-weighted', colors1, colors2)
+
+
+def dist_cie76_batch(colors1: 'ColorsLike', colors2: 'ColorsLike') -> Any:
+    """
+    Determine :func:`dist_cie76` between each pair of colors.
+
+    :arg colors1: RGB colors, see :data:`ColorsLike`.
+    :arg colors2: RGB colors, see :data:`ColorsLike`.
+    :returns: NumPy array of distances when NumPy is installed, otherwise :class:`array.array`.
+    """
+    return _distance_batch('cie76', colors1, colors2)
+
+
+def dist_cie94_batch(colors1: 'ColorsLike', colors2: 'ColorsLike') -> Any:
+    """
+    Determine :func:`dist_cie94` between each pair of colors.
+
+    :arg colors1: RGB colors, see :data:`ColorsLike`.
+    :arg colors2: RGB colors, see :data:`ColorsLike`.
+    :returns: NumPy array of distances when NumPy is installed, otherwise :class:`array.array`.
+    """
+    return _distance_batch('cie94', colors1, colors2)
+
+
+def dist_cie2000_batch(colors1: 'ColorsLike', colors2: 'ColorsLike') -> Any:
+    """
+    Determine :func:`dist_cie2000` between each pair of colors.
+
+    :arg colors1: RGB colors, see :data:`ColorsLike`.
+    :arg colors2: RGB colors, see :data:`ColorsLike`.
+    :returns: NumPy array of distances when NumPy is installed, otherwise :class:`array.array`.
+    """
+    return _distance_batch('cie2000', colors1, colors2)
+
+
+COLOR_DISTANCE_BATCH_ALGORITHMS: Dict[str, Callable[[Any, Any], Any]] = {
+    'rgb': dist_rgb_batch,
+    'rgb-weighted': dist_rgb_weighted_batch,
+    'cie76': dist_cie76_batch,
+    'cie94': dist_cie94_batch,
+    'cie2000': dist_cie2000_batch}
+
+# largest number of distances computed at once by nearest_color_batch(), bounding memory
+_NEAREST_CHUNK = 1 << 18
+
+
+def nearest_color_batch(colors: 'ColorsLike', palette: Sequence[_RGB],
+                        algorithm: str = 'cie2000') -> Any:
+    # pylint: disable=too-many-locals
+    """
+    Find the index of the nearest palette color of each color.
+
+    Of equally near palette colors, the first is chosen.
+
+    :arg colors: RGB colors, see :data:`ColorsLike`.
+    :arg palette: Sequence of RGB colors to choose from, of no more than 256.
+    :arg str algorithm: Key of :data:`COLOR_DISTANCE_ALGORITHMS`.
+    :returns: NumPy array of palette indices when NumPy is installed, otherwise
+        :class:`array.array` of typecode ``'B'``.
+    """
+    if numpy is not None:
+        uses_lab, fn_distance = _NP_DISTANCES[algorithm]
+        targets = _as_array(colors)
+        shape = targets.shape[:-1]
+        targets = targets.reshape(-1, 3)
+        candidates = numpy.asarray(palette, dtype=numpy.float64)
+        if uses_lab:
+            targets, candidates = _np_rgb_to_lab(targets), _np_rgb_to_lab(candidates)
+        result = numpy.empty(len(targets), dtype=numpy.uint8)
+        step = max(1, _NEAREST_CHUNK // len(candidates))
+        for start in range(0, len(targets), step):
+            distances = fn_distance(candidates[None, :, :], targets[start:start + step, None, :])
+            result[start:start + step] = distances.argmin(axis=1)
+        return result.reshape(shape)
+
+    fn_scalar = COLOR_DISTANCE_ALGORITHMS[algorithm]
+    tuples = _as_tuples(colors)
+    if isinstance(tuples, itertools.repeat):
+        tuples = [next(tuples)]
+    # images repeat colors, each distinct color is measured only once
+    nearest: Dict[_RGB, int] = {}
+    for rgb in set(tuples):
+        distances = [fn_scalar(candidate, rgb) for candidate in palette]
+        nearest[rgb] = distances.index(min(distances))
+    return array.array('B', map(nearest.__getitem__, tuples))
+
+
+def xterm256_from_rgb_batch(colors: 'ColorsLike', algorithm: str = 'cie2000') -> Any:
+    # pylint: disable=too-many-locals
+    """
+    Find the nearest xterm 256-color index of each color, by the color cube or grayscale ramp.
+
+    As :meth:`~.Terminal.rgb_downconvert` for 256-color terminals, the nearest of the
+    candidates of :func:`xterm256color_from_rgb` and :func:`xterm256gray_from_rgb` is chosen.
+
+    :arg colors: RGB colors, see :data:`ColorsLike`.
+    :arg str algorithm: Key of :data:`COLOR_DISTANCE_ALGORITHMS`.
+    :returns: NumPy array of color indices when NumPy is installed, otherwise
+        :class:`array.array` of typecode ``'B'``.
+    """
+    if numpy is not None:
+        uses_lab, fn_distance = _NP_DISTANCES[algorithm]
+        targets = _as_array(colors)
+        rgb = targets.astype(numpy.intp)
+        cube_idx_table = numpy.array(_RGB_TO_CUBE_IDX, dtype=numpy.intp)
+        cube_val_table = numpy.array(_RGB_TO_CUBE_VAL, dtype=numpy.float64)
+        cube_levels = cube_idx_table[rgb]
+        cube_idx = 16 + 36 * cube_levels[..., 0] + 6 * cube_levels[..., 1] + cube_levels[..., 2]
+        cube_rgb = cube_val_table[rgb]
+        gray_offset = numpy.array(_GRAY_IDX_FROM_V, dtype=numpy.intp)[rgb.sum(axis=-1) // 3]
+        if uses_lab:
+            # candidates by their precomputed CIE-Lab colors, of cube and gray index
+            targets = _np_rgb_to_lab(targets)
+            cube_rgb = numpy.array([_PALETTE_LAB[(red, green, blue)]
+                                    for red, green, blue in itertools.product(
+                                        _CUBE_LEVELS, repeat=3)])[cube_idx - 16]
+            gray_rgb = numpy.array([_PALETTE_LAB[(val, val, val)]
+                                    for val in _GRAY_VAL_FROM_IDX])[gray_offset]
+        else:
+            gray_rgb = numpy.repeat((8 + 10 * gray_offset)[..., None], 3, axis=-1).astype(
+                numpy.float64)
+        use_cube = fn_distance(cube_rgb, targets) <= fn_distance(gray_rgb, targets)
+        return numpy.where(use_cube, cube_idx, 232 + gray_offset).astype(numpy.uint8)
+
+    fn_scalar = COLOR_DISTANCE_ALGORITHMS[algorithm]
+    tuples = _as_tuples(colors)
+    if isinstance(tuples, itertools.repeat):
+        tuples = [next(tuples)]
+    nearest: Dict[_RGB, int] = {}
+    for rgb in set(tuples):
+        cube_idx, cube_rgb = xterm256color_from_rgb(*rgb)
+        gray_idx, gray_rgb = xterm256gray_from_rgb(*rgb)
+        nearest[rgb] = (cube_idx if fn_scalar(cube_rgb, rgb) <= fn_scalar(gray_rgb, rgb)
+                        else gray_idx)
+    return array.array('B', map(nearest.__getitem__, tuples))
+
+
+#: Dithering methods of :meth:`~.Terminal.rgb_downconvert_dithered`.
+DITHER_METHODS = ('bayer', 'floyd-steinberg')
+
+
+def _bayer_matrix(size: int) -> List[List[int]]:
+    # threshold map of values 0 through size * size - 1, each doubling of size interleaves four
+    # copies of the smaller map
+    matrix = [[0]]
+    while len(matrix) < size:
+        matrix = ([[4 * value for value in row] + [4 * value + 2 for value in row]
+                   for row in matrix] +
+                  [[4 * value + 3 for value in row] + [4 * value + 1 for value in row]
+                   for row in matrix])
+    return matrix
+
+
+#: Size of the threshold map used by :func:`bayer_dither`.
+BAYER_SIZE = 8
+
+_BAYER = _bayer_matrix(BAYER_SIZE)
+
+
+def _bayer_offsets(spread: float) -> List[List[int]]:
+    # offset added to each channel of pixels by position in the threshold map, centered on 0,
+    # and truncated to less than half of spread, so that palette colors remain unchanged
+    count = BAYER_SIZE * BAYER_SIZE
+    return [[int(((value + 0.5) / count - 0.5) * spread) for value in row]
+            for row in _BAYER]
+
+
+def _check_size(pixels: Any, width: int, height: int) -> None:
+    size = pixels.size if numpy is not None and isinstance(pixels, numpy.ndarray) else len(pixels)
+    if size != width * height * 3:
+        raise ValueError(f'expected {width * height * 3} bytes of RGB pixels for '
+                         f'{width}x{height}, got {size}')
+
+
+@lru_cache(maxsize=None)
+def _offset_table(offset: int) -> bytes:
+    # adds offset to an 8-bit value by bytes.translate(), clipped to 0-255
+    return bytes(min(255, max(0, value + offset)) for value in range(256))
+
+
+def bayer_dither(pixels: Union[bytes, bytearray, memoryview, Any],
+                 width: int, height: int, spread: float) -> Any:
+    # pylint: disable=too-many-locals
+    """
+    Apply ordered dithering by a Bayer threshold map to RGB pixels.
+
+    Each channel of each pixel is offset by less than half of *spread*, in either direction, by its
+    position in an 8x8 threshold map, so that a gradient between two palette colors is drawn as
+    a pattern of both, rather than a band of the nearer.  The result is then converted by the
+    nearest color of each pixel, such as by :meth:`~.Terminal.rgb_downconvert_batch`.
+
+    With NumPy_, the whole image is offset at once, otherwise each row by :meth:`bytes.translate`
+    of every eighth pixel.
+
+    :arg pixels: Row-major, 8-bit RGB pixel data of ``width * height * 3`` bytes, or a NumPy
+        array of shape ``(height, width, 3)``.
+    :arg int width: Image width in pixels.
+    :arg int height: Image height in pixels.
+    :arg float spread: Distance between neighboring palette colors, in 8-bit channel values.
+    :raises ValueError: *pixels* is not ``width * height * 3`` bytes.
+    :returns: NumPy array of shape ``(height, width, 3)`` when NumPy is installed, otherwise
+        :class:`bytes` of the same size as *pixels*.
+    """
+    _check_size(pixels, width, height)
+    offsets = _bayer_offsets(spread)
+    if numpy is not None:
+        image = numpy.asarray(
+            numpy.frombuffer(pixels, dtype=numpy.uint8) if isinstance(
+                pixels, (bytes, bytearray, memoryview)) else pixels,
+            dtype=numpy.int16).reshape(height, width, 3)
+        rows = numpy.arange(height) % BAYER_SIZE
+        columns = numpy.arange(width) % BAYER_SIZE
+        offset_map = numpy.array(offsets, dtype=numpy.int16)[rows[:, None], columns[None, :]]
+        return numpy.clip(image + offset_map[..., None], 0, 255).astype(numpy.uint8)
+
+    result = bytearray(pixels)
+    stride = BAYER_SIZE * 3
+    for y_val in range(height):
+        start, end = y_val * width * 3, (y_val + 1) * width * 3
+        for column, offset in enumerate(offsets[y_val % BAYER_SIZE][:width]):
+            table = _offset_table(offset)
+            first = start + column * 3
+            # every eighth pixel of the row shares an offset, for all three channels
+            for channel in range(first, first + 3):
+                result[channel:end:stride] = result[channel:end:stride].translate(table)
+    return bytes(result)
+
+
+def floyd_steinberg_dither(pixels: Union[bytes, bytearray, memoryview, Any],
+                           width: int, height: int,
+                           quantize: Callable[[_RGB], Tuple[int, _RGB]],
+                           cache: Optional[Dict[_RGB, Tuple[int, _RGB]]] = None) -> Any:
+    """
+    Convert RGB pixels to palette colors by Floyd-Steinberg error diffusion.
+
+    The difference between each pixel and its palette color is carried to neighboring pixels not
+    yet converted, 7/16 to the right, and 3/16, 5/16, and 1/16 to the row below.  Pixels are
+    converted left to right, and the error carried to the row below is summed for the whole row
+    at once.
+
+    :arg pixels: Row-major, 8-bit RGB pixel data of ``width * height * 3`` bytes, or a NumPy
+        array of shape ``(height, width, 3)``.
+    :arg int width: Image width in pixels.
+    :arg int height: Image height in pixels.
+    :arg quantize: Function of an RGB color, returning a tuple of its palette color code and
+        that color's RGB value.  It is called once for each distinct color.
+    :arg dict cache: Results of *quantize* by RGB color, updated by this call, so that they may
+        be reused by the next frame of an animation.
+    :raises ValueError: *pixels* is not ``width * height * 3`` bytes.
+    :returns: NumPy array of palette color codes of shape ``(height, width)`` when NumPy is
+        installed, otherwise :class:`array.array` of typecode ``'B'``, in row-major order.
+    """
+    # pylint: disable=too-many-locals
+    _check_size(pixels, width, height)
+    if numpy is not None and isinstance(pixels, numpy.ndarray):
+        pixels = pixels.astype(numpy.uint8).tobytes()
+    pixels = bytes(pixels)
+    memo: Dict[_RGB, Tuple[int, _RGB]] = {} if cache is None else cache
+    codes = array.array('B', bytes(width * height))
+    span = width * 3
+    carried = [0.0] * span
+    for y_val in range(height):
+        row = [value + error for value, error in zip(pixels[y_val * span:(y_val + 1) * span],
+                                                     carried)]
+        errors = [0.0] * span
+        err_r = err_g = err_b = 0.0
+        for x_val in range(width):
+            idx = x_val * 3
+            rgb = (min(255, max(0, int(row[idx] + err_r + 0.5))),
+                   min(255, max(0, int(row[idx + 1] + err_g + 0.5))),
+                   min(255, max(0, int(row[idx + 2] + err_b + 0.5))))
+            if rgb not in memo:
+                memo[rgb] = quantize(rgb)
+            code, (red, green, blue) = memo[rgb]
+            codes[y_val * width + x_val] = code
+            errors[idx], errors[idx + 1], errors[idx + 2] = (
+                rgb[0] - red, rgb[1] - green, rgb[2] - blue)
+            err_r, err_g, err_b = (errors[idx] * 7 / 16, errors[idx + 1] * 7 / 16,
+                                   errors[idx + 2] * 7 / 16)
+        # error carried to each pixel of the next row, from the pixels above-right, above, and
+        # above-left of it
+        padded = [0.0, 0.0, 0.0] + errors + [0.0, 0.0, 0.0]
+        carried = [(3 * right + 5 * above + left) / 16
+                   for right, above, left in zip(padded[6:], padded[3:-3], padded[:-6])]
+    if numpy is not None:
+        return numpy.frombuffer(codes, dtype=numpy.uint8).reshape(height, width)
+    return codes
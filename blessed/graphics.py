@@ -0,0 +1,430 @@
+"""
+Sub-module providing kitty graphics protocol image transmission and an image registry.
+
+Images are transmitted to the terminal once with :func:`kitty_transmit`, stored by the terminal
+under a numeric image id, and displayed any number of times by :func:`kitty_place` without
+sending pixel data again.
+
+Pixel data is sent by one of several transmission media,
+
+- ``'d'``, direct: base64 encoded within the escape sequence, in chunks of no more than 4096
+  bytes.  This is the only medium available to remote sessions.
+- ``'s'``, POSIX shared memory: written to a shared memory object which the terminal reads and
+  unlinks, only its name is sent.
+- ``'t'``, temporary file: written to a file in the temporary directory which the terminal reads
+  and deletes, only its path is sent.
+- ``'f'``, file: an existing file is read by the terminal and left in place.
+
+:class:`ImageRegistry` draws images by either the kitty or iTerm2 inline image protocol,
+uploading each distinct image only once.
+
+.. seealso:: https://sw.kovidgoyal.net/kitty/graphics-protocol/,
+    https://iterm2.com/documentation-images.html
+"""
+# std imports
+import os
+import sys
+import zlib
+import base64
+import struct
+import hashlib
+import tempfile
+import contextlib
+import collections
+from typing import TYPE_CHECKING, Dict, Tuple, Union, Iterator, Optional
+
+try:
+    # std imports
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError:  # pragma: no cover
+    shared_memory = None  # type: ignore[assignment]
+
+#: Pixel formats of the kitty graphics protocol, bytes per pixel of 24-bit RGB and 32-bit RGBA,
+#: or ``100`` for PNG data, which is sized by its header.
+KITTY_FORMATS = {24: 3, 32: 4, 100: 0}
+
+#: Largest payload of one escape sequence of direct transmission, in base64 encoded bytes.
+KITTY_CHUNK_SIZE = 4096
+
+# temporary files must contain this string in their name to be deleted by the terminal
+_TEMP_PREFIX = 'tty-graphics-protocol-'
+
+#: Default storage limit of :class:`ImageRegistry`, that of kitty, which evicts the oldest
+#: images itself when exceeded.
+DEFAULT_IMAGE_QUOTA = 320 * 1024 * 1024
+
+_Data = Union[bytes, bytearray, memoryview]
+
+if TYPE_CHECKING:  # pragma: no cover
+    # local
+    from .terminal import Terminal
+
+
+def _apc(keys: Dict[str, Union[str, int]], payload: str = '') -> str:
+    control = ','.join(f'{key}={value}' for key, value in keys.items())
+    return f'\x1b_G{control};{payload}\x1b\\' if payload else f'\x1b_G{control}\x1b\\'
+
+
+def _b64(data: _Data) -> str:
+    return base64.standard_b64encode(data).decode('ascii')
+
+
+def write_shared_memory(data: _Data) -> str:
+    """
+    Write *data* to a new POSIX shared memory object to be read and unlinked by the terminal.
+
+    The object is not tracked for removal at exit, as the terminal unlinks it once read.
+
+    :arg data: Bytes to write.
+    :raises OSError: Shared memory is not available.
+    :rtype: str
+    :returns: Name of the shared memory object, as given to ``shm_open(3)``.
+    """
+    if shared_memory is None:
+        raise OSError('POSIX shared memory is not available')
+    view = memoryview(data).cast('B')
+    if sys.version_info >= (3, 13):
+        shm = shared_memory.SharedMemory(  # pylint: disable=unexpected-keyword-arg
+            create=True, size=max(1, len(view)), track=False)
+    else:
+        # python < 3.13 always tracks it, the resource tracker would unlink it (again) at exit
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(view)))
+        # pylint: disable-next=protected-access
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    try:
+        if shm.buf is None:
+            raise OSError(f'shared memory object {shm.name} is not mapped')
+        shm.buf[:len(view)] = view
+    finally:
+        shm.close()
+    return f'/{shm.name.lstrip("/")}'
+
+
+def write_temp_file(data: _Data) -> str:
+    """
+    Write *data* to a new temporary file to be read and deleted by the terminal.
+
+    :arg data: Bytes to write.
+    :rtype: str
+    :returns: Path of the temporary file.
+    """
+    fd, path = tempfile.mkstemp(prefix=_TEMP_PREFIX)
+    with os.fdopen(fd, 'wb') as fout:
+        fout.write(data)
+    return path
+
+
+def kitty_transmit(data: Union[_Data, str], image_id: int, width: int = 0, height: int = 0,
+                   *, fmt: int = 24, medium: str = 'd') -> Iterator[str]:
+    """
+    Yield escape sequences transmitting an image to the terminal, without displaying it.
+
+    Responses are suppressed (``q=2``), so that none need be read from input.
+
+    :arg data: Image data, ``width * height`` pixels of 24-bit RGB or 32-bit RGBA, or a PNG
+        file for *fmt* ``100``.  For *medium* ``'f'``, the path of a file containing it.
+    :arg int image_id: Id by which the terminal stores the image, 1 through 4294967295.
+    :arg int width: Image width in pixels, not required for PNG.
+    :arg int height: Image height in pixels, not required for PNG.
+    :arg int fmt: Pixel format, one of :data:`KITTY_FORMATS`.
+    :arg str medium: Transmission medium, ``'d'``, ``'s'``, ``'t'``, or ``'f'``.
+    :raises ValueError: Unknown *fmt* or *medium*, or size of *data* does not match dimensions.
+    :raises OSError: Shared memory or temporary file could not be written.
+    :rtype: Iterator[str]
+    :returns: Iterator of escape sequences which, written in order, transmit the image.
+    """
+    if fmt not in KITTY_FORMATS:
+        raise ValueError(f'fmt must be one of {tuple(KITTY_FORMATS)}, got {fmt!r}')
+    if medium not in ('d', 's', 't', 'f'):
+        raise ValueError(f"medium must be one of 'd', 's', 't', 'f', got {medium!r}")
+    keys: Dict[str, Union[str, int]] = {'a': 't', 'q': 2, 'i': image_id, 'f': fmt}
+    if medium == 'f':
+        keys.update(s=width, v=height, t=medium)
+        yield _apc(keys, _b64(os.fsencode(data) if isinstance(data, str) else data))
+        return
+
+    view = memoryview(data).cast('B')
+    if fmt != 100:
+        keys.update(s=width, v=height)
+        if len(view) != width * height * KITTY_FORMATS[fmt]:
+            raise ValueError(f'expected {width * height * KITTY_FORMATS[fmt]} bytes of pixels '
+                             f'for {width}x{height}, got {len(view)}')
+    keys['t'] = medium
+    if medium == 's':
+        yield _apc(keys, _b64(write_shared_memory(view).encode()))
+    elif medium == 't':
+        yield _apc(keys, _b64(write_temp_file(view).encode()))
+    else:
+        # each chunk but the last is flagged m=1, only the first carries the control keys
+        step = KITTY_CHUNK_SIZE // 4 * 3
+        for offset in range(0, max(1, len(view)), step):
+            more = int(offset + step < len(view))
+            if offset == 0:
+                yield _apc({**keys, 'm': more}, _b64(view[:step]))
+            else:
+                yield _apc({'m': more}, _b64(view[offset:offset + step]))
+
+
+def kitty_probe(medium: str) -> Tuple[str, str]:
+    """
+    Return a query transmitting a single pixel by *medium*, to test whether it is supported.
+
+    The terminal answers ``OK`` with image id 31 when the image is read successfully, the same
+    response as :meth:`~.Terminal.does_kitty_graphics`.  Nothing is stored or displayed.
+
+    :arg str medium: Transmission medium, ``'s'`` or ``'t'``.
+    :raises OSError: Shared memory or temporary file could not be written.
+    :rtype: tuple
+    :returns: Tuple of ``(query, name)``, where name is of the shared memory object or
+        temporary file written, to be given to :func:`kitty_discard`.
+    """
+    name = (write_shared_memory if medium == 's' else write_temp_file)(b'\x00\x00\x00')
+    keys: Dict[str, Union[str, int]] = {'a': 'q', 'i': 31, 's': 1, 'v': 1, 'f': 24, 't': medium}
+    return _apc(keys, _b64(name.encode())), name
+
+
+def kitty_discard(medium: str, name: str) -> None:
+    """
+    Remove a shared memory object or temporary file, should the terminal not have done so.
+
+    :arg str medium: Transmission medium, ``'s'`` or ``'t'``.
+    :arg str name: Name of the shared memory object or temporary file.
+    """
+    # shm_unlink(3) is not exposed by the standard library, but linux maps objects to /dev/shm
+    path = os.path.join('/dev/shm', name.lstrip('/')) if medium == 's' else name
+    with contextlib.suppress(OSError):
+        os.unlink(path)
+
+
+def kitty_place(image_id: int, columns: Optional[int] = None, rows: Optional[int] = None,
+                placement_id: Optional[int] = None) -> str:
+    """
+    Return an escape sequence displaying a transmitted image at the cursor position.
+
+    :arg int image_id: Id of an image previously sent by :func:`kitty_transmit`.
+    :arg int columns: Number of cells to scale the image width to, default is the image size.
+    :arg int rows: Number of cells to scale the image height to, default is the image size.
+    :arg int placement_id: Placement id, a placement of the same image and placement id
+        replaces the previous one rather than adding another.
+    :rtype: str
+    :returns: Escape sequence for kitty graphics placement.
+    """
+    keys: Dict[str, Union[str, int]] = {'a': 'p', 'q': 2, 'i': image_id}
+    if placement_id is not None:
+        keys['p'] = placement_id
+    if columns is not None:
+        keys['c'] = columns
+    if rows is not None:
+        keys['r'] = rows
+    return _apc(keys)
+
+
+def kitty_delete(image_id: int) -> str:
+    """
+    Return an escape sequence deleting all placements of an image and freeing its data.
+
+    :arg int image_id: Id of an image previously sent by :func:`kitty_transmit`.
+    :rtype: str
+    :returns: Escape sequence for kitty graphics deletion.
+    """
+    return _apc({'a': 'd', 'q': 2, 'd': 'I', 'i': image_id})
+
+
+def encode_png(data: _Data, width: int, height: int, fmt: int = 24) -> bytes:
+    """
+    Return 8-bit RGB or RGBA pixels as a PNG file.
+
+    :arg data: ``width * height`` pixels of 24-bit RGB or 32-bit RGBA.
+    :arg int width: Image width in pixels.
+    :arg int height: Image height in pixels.
+    :arg int fmt: Pixel format, ``24`` (RGB) or ``32`` (RGBA).
+    :raises ValueError: Unknown *fmt*, or size of *data* does not match dimensions.
+    :rtype: bytes
+    :returns: PNG file data.
+    """
+    if fmt not in (24, 32):
+        raise ValueError(f'fmt must be one of (24, 32), got {fmt!r}')
+    view = memoryview(data).cast('B')
+    stride = width * KITTY_FORMATS[fmt]
+    if len(view) != stride * height:
+        raise ValueError(f'expected {stride * height} bytes of pixels '
+                         f'for {width}x{height}, got {len(view)}')
+
+    def chunk(tag: bytes, body: bytes) -> bytes:
+        return struct.pack('>I', len(body)) + tag + body + struct.pack('>I', zlib.crc32(tag + body))
+
+    # each scanline is preceded by its filter type, 0 (none)
+    scanlines = b''.join(b'\x00' + view[row * stride:(row + 1) * stride] for row in range(height))
+    header = struct.pack('>IIBBBBB', width, height, 8, 2 if fmt == 24 else 6, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(scanlines)) + chunk(b'IEND', b''))
+
+
+def _iterm2_sequence(payload: str, size: int, columns: Optional[int],
+                     rows: Optional[int]) -> str:
+    args = f'inline=1;size={size}'
+    if columns is not None:
+        args += f';width={columns}'
+    if rows is not None:
+        args += f';height={rows}'
+    if columns is not None and rows is not None:
+        args += ';preserveAspectRatio=0'
+    return f'\x1b]1337;File={args}:{payload}\x07'
+
+
+def iterm2_image(data: _Data, columns: Optional[int] = None, rows: Optional[int] = None) -> str:
+    """
+    Return an escape sequence displaying an image by the iTerm2 inline image protocol.
+
+    :arg data: Image file data, such as PNG, JPEG, or GIF.
+    :arg int columns: Number of cells to scale the image width to.
+    :arg int rows: Number of cells to scale the image height to.  When both *columns* and
+        *rows* are given, the image is stretched to fill them.
+    :rtype: str
+    :returns: Escape sequence for iTerm2 inline image.
+    """
+    return _iterm2_sequence(_b64(data), len(memoryview(data).cast('B')), columns, rows)
+
+
+class ImageRegistry:
+    """
+    Draw images by the kitty or iTerm2 inline image protocol, uploading each only once.
+
+    Images are keyed by a hash of their content: drawing an image that was drawn before
+    places it again by its kitty image id, without sending its data.  The iTerm2 protocol
+    has no image storage, so each draw must send the image, but its PNG and base64
+    encoding is cached.
+
+    When storing an image would exceed *max_bytes* or *max_images*, the least recently
+    drawn images are deleted from the terminal, rather than left for the terminal to evict
+    when its own quota is exceeded, which would leave the registry with a stale id.
+
+    :ivar Terminal term: Terminal written to.
+    :ivar int max_bytes: Limit of the total size of stored images.
+    :ivar int max_images: Limit of the number of stored images.
+    """
+
+    def __init__(self, term: 'Terminal', max_bytes: int = DEFAULT_IMAGE_QUOTA,
+                 max_images: int = 1024, timeout: Optional[float] = 1) -> None:
+        """
+        Initialize an ImageRegistry.
+
+        :arg Terminal term: Terminal to draw images on.
+        :arg int max_bytes: Limit of the total size of stored images, by size of pixel data
+            for kitty, or base64 encoded size for iTerm2.
+        :arg int max_images: Limit of the number of stored images.
+        :arg float timeout: Timeout in seconds for detecting the protocol and kitty
+            transmission medium, on first draw.
+        """
+        self.term = term
+        self.max_bytes = max_bytes
+        self.max_images = max_images
+        self._timeout = timeout
+        self._protocol: Optional[str] = None
+        # content hash -> (kitty image id or iTerm2 base64 payload, size, image file size)
+        self._images: 'collections.OrderedDict[bytes, Tuple[Union[int, str], int, int]]' = (
+            collections.OrderedDict())
+        self._size = 0
+
+    def __len__(self) -> int:
+        """Return number of images stored."""
+        return len(self._images)
+
+    @property
+    def size(self) -> int:
+        """Total size of images stored."""
+        return self._size
+
+    @property
+    def protocol(self) -> Optional[str]:
+        """
+        Image protocol used, ``'kitty'`` or ``'iterm2'``, or ``None`` when neither is supported.
+
+        Kitty is preferred, when the terminal supports both.
+        """
+        if self._protocol is None:
+            if self.term.does_kitty_graphics(timeout=self._timeout):
+                self._protocol = 'kitty'
+            elif self.term.does_iterm2_graphics(timeout=self._timeout):
+                self._protocol = 'iterm2'
+            else:
+                self._protocol = ''
+        return self._protocol or None
+
+    @staticmethod
+    def key(data: _Data, width: int = 0, height: int = 0, fmt: int = 24) -> bytes:
+        """
+        Return the hash by which an image is stored.
+
+        :arg data: Image data.
+        :arg int width: Image width in pixels.
+        :arg int height: Image height in pixels.
+        :arg int fmt: Pixel format.
+        :rtype: bytes
+        :returns: 16-byte BLAKE2b digest of the image data and its dimensions.
+        """
+        digest = hashlib.blake2b(struct.pack('>IIH', width, height, fmt), digest_size=16)
+        digest.update(data)
+        return digest.digest()
+
+    def draw(self, data: _Data, width: int = 0, height: int = 0, *, fmt: int = 24,
+             columns: Optional[int] = None, rows: Optional[int] = None) -> bool:
+        """
+        Draw an image at the cursor position, uploading it only if not already stored.
+
+        :arg data: ``width * height`` pixels of 24-bit RGB or 32-bit RGBA, or a PNG file
+            for *fmt* ``100``.  For iTerm2, any image file format it supports may be given
+            as *fmt* ``100``.
+        :arg int width: Image width in pixels, not required for *fmt* ``100``.
+        :arg int height: Image height in pixels, not required for *fmt* ``100``.
+        :arg int fmt: Pixel format, ``24`` (RGB), ``32`` (RGBA), or ``100`` (PNG).
+        :arg int columns: Number of cells to scale the image width to.
+        :arg int rows: Number of cells to scale the image height to.
+        :raises ValueError: Unknown *fmt*, or size of *data* does not match dimensions.
+        :rtype: bool
+        :returns: False if the terminal supports neither protocol, and nothing was drawn.
+        """
+        protocol = self.protocol
+        if protocol is None:
+            return False
+        key = self.key(data, width, height, fmt)
+        entry = self._images.get(key)
+        if entry is not None:
+            self._images.move_to_end(key)
+        elif protocol == 'kitty':
+            size = len(memoryview(data).cast('B'))
+            self._evict(size)
+            entry = self._store(key, self.term.upload_kitty_image(
+                data, width, height, fmt=fmt, timeout=self._timeout), size, size)
+        else:
+            file_data = data if fmt == 100 else encode_png(data, width, height, fmt)
+            payload = _b64(file_data)
+            self._evict(len(payload))
+            entry = self._store(key, payload, len(payload), len(memoryview(file_data).cast('B')))
+
+        ref, _, file_size = entry
+        if protocol == 'kitty':
+            self.term.draw_kitty_image(int(ref), columns=columns, rows=rows)
+        else:
+            self.term.stream.write(_iterm2_sequence(str(ref), file_size, columns, rows))
+            self.term.stream.flush()
+        return True
+
+    def clear(self) -> None:
+        """Delete all stored images from the terminal."""
+        self._evict(self.max_bytes + 1)
+
+    def _store(self, key: bytes, ref: Union[int, str], size: int,
+               file_size: int) -> Tuple[Union[int, str], int, int]:
+        entry = self._images[key] = (ref, size, file_size)
+        self._size += size
+        return entry
+
+    def _evict(self, incoming: int) -> None:
+        # make room for an image of size *incoming*, least recently drawn first
+        while self._images and (len(self._images) >= self.max_images
+                                or self._size + incoming > self.max_bytes):
+            _, (ref, size, _) = self._images.popitem(last=False)
+            self._size -= size
+            if self._protocol == 'kitty':
+                self.term.delete_kitty_image(int(ref))
@@ -4,10 +4,11 @@
 import os
 import re
 import time
+import types
 import typing
 import platform
 import functools
-from typing import TYPE_CHECKING, Set, Dict, Match, Tuple, TypeVar, Optional
+from typing import TYPE_CHECKING, Any, Set, Dict, List, Match, Tuple, TypeVar, Optional
 from collections import OrderedDict, namedtuple
 
 if TYPE_CHECKING:  # pragma: no cover
@@ -20,7 +21,7 @@ from blessed.mouse import (RE_PATTERN_MOUSE_SGR,
                            MouseEvent,
                            MouseSGREvent,
                            MouseLegacyEvent)
-from blessed.dec_modes import DecPrivateMode
+from blessed.dec_modes import DecPrivateMode, DecModeResponse
 
 _T = TypeVar('_T', bound='Keystroke')
 
@@ -98,6 +99,94 @@ DEC_EVENT_PATTERNS = [
     DECEventPattern(mode=DecPrivateMode.IN_BAND_WINDOW_RESIZE, pattern=RE_PATTERN_RESIZE),
 ]
 
+# Final characters of the control sequences matched by each pattern of DEC_EVENT_PATTERNS
+_DEC_EVENT_PATTERN_FINALS = {
+    RE_PATTERN_BRACKETED_PASTE: '~',
+    RE_PATTERN_MOUSE_SGR: 'Mm',
+    RE_PATTERN_MOUSE_LEGACY: 'M',
+    RE_PATTERN_FOCUS: 'IO',
+    RE_PATTERN_RESIZE: 't',
+}
+
+
+def _compile_dec_event_matchers(
+        dec_mode_cache: typing.Mapping[int, int]) -> Dict[str, Tuple[DECEventPattern, ...]]:
+    """
+    Return the patterns of DEC events of enabled modes, by final character of their sequence.
+
+    Patterns shared by several modes, such as of SGR mouse reporting, are included once, by the
+    first enabled mode of :data:`DEC_EVENT_PATTERNS`, in its order.
+
+    :arg dict dec_mode_cache: Dictionary of DEC private mode states (mode number -> state value)
+    :rtype: dict
+    :returns: Tuples of :class:`DECEventPattern`, in order of precedence, by final character.
+    """
+    matchers: Dict[str, List[DECEventPattern]] = {}
+    included = set()
+    for event_pattern in DEC_EVENT_PATTERNS:
+        if (event_pattern.pattern in included
+                or dec_mode_cache.get(int(event_pattern.mode)) != DecModeResponse.SET):
+            continue
+        included.add(event_pattern.pattern)
+        for final in _DEC_EVENT_PATTERN_FINALS[event_pattern.pattern]:
+            matchers.setdefault(final, []).append(event_pattern)
+    return {final: tuple(patterns) for final, patterns in matchers.items()}
+
+
+class _DecModeCache(Dict[int, int]):
+    """
+    Dictionary of DEC private mode states (mode number -> state value) of a :class:`~.Terminal`.
+
+    The patterns of DEC events of enabled modes, :attr:`event_matchers`, are compiled by first
+    use, and again only after the state of any mode is changed.
+    """
+
+    __slots__ = ('_event_matchers',)
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._event_matchers: Optional[Dict[str, Tuple[DECEventPattern, ...]]] = None
+
+    @property
+    def event_matchers(self) -> Dict[str, Tuple[DECEventPattern, ...]]:
+        """Patterns of DEC events of enabled modes, see :func:`_compile_dec_event_matchers`."""
+        if self._event_matchers is None:
+            self._event_matchers = _compile_dec_event_matchers(self)
+        return self._event_matchers
+
+    def __setitem__(self, mode: int, value: int) -> None:
+        super().__setitem__(mode, value)
+        self._event_matchers = None
+
+    def __delitem__(self, mode: int) -> None:
+        super().__delitem__(mode)
+        self._event_matchers = None
+
+    def __ior__(self, other: Any) -> '_DecModeCache':  # type: ignore[misc]
+        self.update(other)
+        return self
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        super().update(*args, **kwargs)
+        self._event_matchers = None
+
+    def setdefault(self, *args: Any) -> Any:
+        self._event_matchers = None
+        return super().setdefault(*args)
+
+    def pop(self, *args: Any) -> Any:
+        self._event_matchers = None
+        return super().pop(*args)
+
+    def popitem(self) -> Tuple[int, int]:
+        self._event_matchers = None
+        return super().popitem()
+
+    def clear(self) -> None:
+        super().clear()
+        self._event_matchers = None
+
+
 # Control character mappings
 # Note: Ctrl+Space (code 0) is handled specially as 'SPACE', not '@' or ' '.
 SYMBOLS_MAP_CTRL_CHAR = {'[': 27, '\\': 28, ']': 29, '^': 30, '_': 31, '?': 127}
@@ -106,6 +195,13 @@ SYMBOLS_MAP_CTRL_VALUE = {v: k for k, v in SYMBOLS_MAP_CTRL_CHAR.items()}
 # Event type tokens for keystroke predicates
 _EVENT_TYPE_TOKENS = {'pressed', 'repeated', 'released'}
 
+# Keystroke predicates compiled from their attribute names, such as 'is_ctrl_a', by
+# Keystroke.__getattr__: kind is 'mouse', 'appkey', or 'alphanum', bits are the modifier bits
+# expected, code the keycode of application keys, and name the name of mouse events
+_PredicateSpec = namedtuple('_PredicateSpec', 'kind bits code event_type name')
+# Predicate function of each attribute name, taking the keystroke as its first argument
+_PREDICATES: Dict[str, typing.Callable[..., bool]] = {}
+
 # PUA keypad key names mapping (for keys without legacy non-PUA versions)
 _PUA_KEYPAD_NAMES = {
     57399: 'KEY_KP_0', 57400: 'KEY_KP_1', 57401: 'KEY_KP_2', 57402: 'KEY_KP_3',
@@ -165,6 +261,10 @@ class Keystroke(str):
     _mode: Optional[int] = None
     _match: typing.Any = None
     _modifiers: int = 1
+    # name and value, computed once by first access
+    _resolved_name: Optional[str] = None
+    _name_resolved = False
+    _value: Optional[str] = None
 
     def __new__(cls: typing.Type[_T], ucs: str = '', code: Optional[int] = None,
                 name: Optional[str] = None, mode: Optional[int] = None,
@@ -464,7 +564,7 @@ class Keystroke(str):
         return None
 
     @property
-    def name(self) -> Optional[str]:  # pylint: disable=too-many-return-statements
+    def name(self) -> Optional[str]:
         r"""
         Special application key name.
 
@@ -495,7 +595,13 @@ class Keystroke(str):
         """
         if self._name is not None:
             return self._name
+        if not self._name_resolved:
+            self._resolved_name = self._resolve_name()
+            self._name_resolved = True
+        return self._resolved_name
 
+    def _resolve_name(self) -> Optional[str]:  # pylint: disable=too-many-return-statements
+        """Return :attr:`name` of a keystroke not given a name by its constructor."""
         # Try each helper method in sequence
         # DEC events first
         result = self._get_mouse_event_name()
@@ -527,11 +633,7 @@ class Keystroke(str):
         if result is not None:
             return result
 
-        result = self._get_meta_escape_name()
-        if result is not None:
-            return result
-
-        return self._name
+        return self._get_meta_escape_name()
 
     @property
     def code(self) -> Optional[int]:
@@ -703,80 +805,70 @@ class Keystroke(str):
                                  event_type: Optional[str] = None
                                  ) -> typing.Callable[[Optional[str], bool], bool]:
         """Build a predicate function for application keys."""
-        def keycode_predicate(char: Optional[str] = None, ignore_case: bool = True) -> bool:
-            # pylint: disable=unused-argument
-            # char and ignore_case parameters are accepted but not used for application keys
-
-            # Application keys never match when 'char' is non-None/non-Empty
-            if char:
-                return False
-
-            # Get expected keycode from key name
-            expected_code = Keystroke._get_keycode_by_name(key_name)
-            if expected_code is None or self._code != expected_code:
-                return False
-
-            # Validate modifiers
-            if self._make_expected_bits(tokens_modifiers) != self._make_effective_bits():
-                return False
-
-            # Check event type if specified
-            if event_type is not None:
-                event_type_map = {
-                    'pressed': self.pressed,
-                    'repeated': self.repeated,
-                    'released': self.released
-                }
-                return event_type_map.get(event_type, False)
-
-            return True
-
-        return keycode_predicate
+        return types.MethodType(self._predicate_function(_PredicateSpec(
+            kind='appkey', bits=self._make_expected_bits(tokens_modifiers),
+            code=self._get_keycode_by_name(key_name), event_type=event_type, name=None)), self)
 
     def _build_alphanum_predicate(self, tokens_modifiers: typing.List[str]
                                   ) -> typing.Callable[[Optional[str], bool], bool]:
         """Build a predicate function for modifier checking of alphanumeric input."""
-        def modifier_predicate(char: Optional[str] = None, ignore_case: bool = True) -> bool:
-            # Build expected modifier bits from tokens,
-            # Stripped to ignore caps_lock and num_lock
-            expected_bits = self._make_expected_bits(tokens_modifiers)
-            effective_bits = self._make_effective_bits()
-
-            # When matching with a character and it's alphabetic, be lenient
-            # about Shift because it is implicit in the case of the letter
-            if char and len(char) == 1 and char.isalpha():
-                # Strip shift from both sides for letter matching
-                effective_bits_no_shift = effective_bits & ~KittyModifierBits.shift
-                expected_bits_no_shift = expected_bits & ~KittyModifierBits.shift
-                if effective_bits_no_shift != expected_bits_no_shift:
-                    return False
-            elif effective_bits != expected_bits:
-                # Exact matching (no char, or non-alpha char)
-                return False
+        return types.MethodType(self._predicate_function(_PredicateSpec(
+            kind='alphanum', bits=self._make_expected_bits(tokens_modifiers),
+            code=None, event_type=None, name=None)), self)
 
-            # If no character specified, always return False
-            # Text keys need char argument: is_ctrl('a')
-            # Application keys need specific predicate: is_ctrl_up()
-            if char is None:
+    @classmethod
+    def _predicate_function(cls, spec: '_PredicateSpec') -> typing.Callable[..., bool]:
+        """Return predicate function of compiled *spec*, taking the keystroke to match."""
+        return functools.partial(cls._match_predicate, spec=spec)
+
+    def _match_predicate(self, char: Optional[str] = None, ignore_case: bool = True, *,
+                         spec: '_PredicateSpec') -> bool:
+        """Whether this keystroke matches compiled predicate *spec*."""
+        if spec.kind == 'mouse':
+            # char and ignore_case parameters are accepted but not used for mouse buttons
+            return self.name == spec.name
+
+        # Modifier bits stripped to ignore caps_lock and num_lock
+        effective_bits = self._make_effective_bits()
+
+        if spec.kind == 'appkey':
+            # Application keys never match when 'char' is non-None/non-Empty,
+            # and an event type, when specified, must match
+            return (not char
+                    and spec.code is not None
+                    and self._code == spec.code
+                    and effective_bits == spec.bits
+                    and (spec.event_type is None or getattr(self, spec.event_type)))
+
+        # When matching with a character and it's alphabetic, be lenient
+        # about Shift because it is implicit in the case of the letter
+        if char and len(char) == 1 and char.isalpha():
+            # Strip shift from both sides for letter matching
+            if effective_bits & ~KittyModifierBits.shift != spec.bits & ~KittyModifierBits.shift:
                 return False
+        elif effective_bits != spec.bits:
+            # Exact matching (no char, or non-alpha char)
+            return False
 
-            # Check character match using value property
-            keystroke_char = self.value
-
-            # Compare characters
-            if ignore_case:
-                return keystroke_char.lower() == char.lower()
-            return keystroke_char == char
+        # If no character specified, always return False
+        # Text keys need char argument: is_ctrl('a')
+        # Application keys need specific predicate: is_ctrl_up()
+        if char is None:
+            return False
 
-        return modifier_predicate
+        # Compare characters using value property
+        if ignore_case:
+            return self.value.lower() == char.lower()
+        return self.value == char
 
-    # pylint: disable=too-complex
     def __getattr__(self, attr: str) -> typing.Callable[[Optional[str], bool], bool]:
         """
         Dynamic compound modifier and application key predicates via __getattr__.
 
         Recognizes attributes starting with "is_" and parses underscore-separated
-        tokens to create dynamic predicate functions.
+        tokens to create dynamic predicate functions.  Each attribute name is parsed
+        once, into a predicate function shared by all keystrokes, and returned bound to
+        this keystroke.
 
         :arg str attr: Attribute name being accessed
         :rtype: callable or raises AttributeError
@@ -795,13 +887,26 @@ class Keystroke(str):
             ``<button>`` matches the button name: ``is_mouse_left()``, ``is_mouse_ctrl_left()``,
             ``is_mouse_scroll_up()``, ``is_mouse_left_released()``, etc.
         """
+        function = _PREDICATES.get(attr)
+        if function is None:
+            function = _PREDICATES[attr] = self._predicate_function(
+                self._compile_predicate(attr))
+        return types.MethodType(function, self)
+
+    @classmethod
+    def _compile_predicate(cls, attr: str) -> '_PredicateSpec':
+        """
+        Parse predicate attribute name *attr*, such as ``'is_ctrl_shift_a'``.
+
+        :raises AttributeError: *attr* is not a valid predicate name.
+        """
         if not attr.startswith('is_'):
-            raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{attr}'")
+            raise AttributeError(f"'{cls.__name__}' object has no attribute '{attr}'")
 
         # Extract tokens after 'is_'
         tokens_str = attr[3:]  # Remove 'is_' prefix
         if not tokens_str:
-            raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{attr}'")
+            raise AttributeError(f"'{cls.__name__}' object has no attribute '{attr}'")
 
         # Parse tokens to separate modifiers from potential key name
         tokens = tokens_str.split('_')
@@ -812,13 +917,8 @@ class Keystroke(str):
             # is_mouse_left -> MOUSE_LEFT
             # is_mouse_ctrl_left -> MOUSE_CTRL_LEFT
             # is_mouse_scroll_up -> MOUSE_SCROLL_UP
-            expected_name = 'MOUSE_' + '_'.join(tokens[1:]).upper()
-
-            def mouse_predicate(char: Optional[str] = None, ignore_case: bool = False) -> bool:
-                # pylint: disable=unused-argument
-                return self.name == expected_name
-
-            return mouse_predicate
+            return _PredicateSpec(kind='mouse', bits=0, code=None, event_type=None,
+                                  name='MOUSE_' + '_'.join(tokens[1:]).upper())
 
         # Check for event type suffix at the end (pressed, repeated, released)
         event_type_token = None
@@ -842,18 +942,17 @@ class Keystroke(str):
         # If we have any non-modifier tokens,
         if tokens_key_names:
             # check if they form a valid application key,
-            key_name = '_'.join(tokens_key_names)
-            keycodes = get_keyboard_codes()
-            expected_key_constant = f'KEY_{key_name.upper()}'
-            if expected_key_constant in keycodes.values():
+            code = cls._get_keycode_by_name('_'.join(tokens_key_names))
+            if code is not None:
                 # Return predicate with optional event type
-                return self._build_appkeys_predicate(
-                    tokens_modifiers, key_name, event_type_token)
+                return _PredicateSpec(kind='appkey',
+                                      bits=cls._make_expected_bits(tokens_modifiers),
+                                      code=code, event_type=event_type_token, name=None)
 
         # Event type suffix without valid application key is invalid
         if event_type_token:
             raise AttributeError(
-                f"'{self.__class__.__name__}' object has no attribute '{attr}' "
+                f"'{cls.__name__}' object has no attribute '{attr}' "
                 f"(event type suffix '{event_type_token}' only valid with application keys)")
 
         # No valid key name was found by 'tokens_key_names', this could just as
@@ -863,11 +962,12 @@ class Keystroke(str):
                           if token not in KittyModifierBits.names_modifiers_only]
         if invalid_tokens:
             raise AttributeError(
-                f"'{self.__class__.__name__}' object has no attribute '{attr}' "
+                f"'{cls.__name__}' object has no attribute '{attr}' "
                 f"(invalid modifier or application key tokens: {invalid_tokens})")
 
         # Return modifier predicate for alphanumeric keys
-        return self._build_alphanum_predicate(tokens_modifiers)
+        return _PredicateSpec(kind='alphanum', bits=cls._make_expected_bits(tokens_modifiers),
+                              code=None, event_type=None, name=None)
 
     def _get_plain_char_value(self) -> Optional[str]:
         """
@@ -1002,16 +1102,18 @@ class Keystroke(str):
         - Application keys: KEY_UP, KEY_F1, etc. → ''
         - Release events: always → ''
         """
-        # Release events never have text
-        if self.released:
-            return ''
-
-        return (self._get_plain_char_value()
-                or self._get_escape_sequence_value()
-                or self._get_ctrl_sequence_value()
-                or self._get_protocol_value()
-                or self._get_ascii_value()
-                or '')
+        if self._value is None:
+            # Release events never have text
+            if self.released:
+                self._value = ''
+            else:
+                self._value = (self._get_plain_char_value()
+                               or self._get_escape_sequence_value()
+                               or self._get_ctrl_sequence_value()
+                               or self._get_protocol_value()
+                               or self._get_ascii_value()
+                               or '')
+        return self._value
 
     @property
     def mode(self) -> Optional['DecPrivateMode']:
@@ -1288,13 +1390,36 @@ def get_leading_prefixes(sequences: typing.Iterable[str]) -> Set[str]:
     return {seq[:i] for seq in sequences for i in range(1, len(seq))}
 
 
+#: Index of keyboard sequences by :func:`get_sequence_index`.
+SequenceIndex = namedtuple('SequenceIndex', ['sequences', 'lengths'])
+
+
+def get_sequence_index(mapper: typing.Mapping[str, int]) -> SequenceIndex:
+    """
+    Return an index of sequences, supporting :func:`resolve_sequence`.
+
+    :arg OrderedDict mapper: Sequences paired by their keycode, such as by
+        :func:`get_keyboard_sequences`.
+    :rtype: SequenceIndex
+    :returns: Each sequence paired by its position in *mapper* and its keycode, and the
+        distinct lengths of sequences, ascending.
+
+    The index is of *mapper* as it is at the time of the call.
+    """
+    return SequenceIndex(
+        sequences={sequence: (position, code)
+                   for position, (sequence, code) in enumerate(mapper.items())},
+        lengths=tuple(sorted({len(sequence) for sequence in mapper})))
+
+
 # pylint: disable=too-many-positional-arguments
 def resolve_sequence(text: str,
                      mapper: typing.Mapping[str, int],
                      codes: typing.Mapping[int, str],
                      prefixes: Optional[Set[str]] = None,
                      final: bool = False,
-                     dec_mode_cache: Optional[Dict[int, int]] = None) -> Keystroke:
+                     dec_mode_cache: Optional[Dict[int, int]] = None,
+                     index: Optional['SequenceIndex'] = None) -> Keystroke:
     r"""
     Return a single :class:`Keystroke` instance for given sequence ``text``.
 
@@ -1306,6 +1431,8 @@ def resolve_sequence(text: str,
     :arg set prefixes: Set of all valid sequence prefixes for quick matching
     :arg bool final: Whether this is the final resolution attempt (no more input expected)
     :arg dict dec_mode_cache: Dictionary of DEC private mode states (mode number -> state value)
+    :arg SequenceIndex index: Index of ``mapper`` by :func:`get_sequence_index`, built for
+        each call when not given.
     :rtype: Keystroke
     :returns: Keystroke instance for the given sequence
 
@@ -1328,24 +1455,16 @@ def resolve_sequence(text: str,
 
     # First try advanced keyboard protocol matchers and DEC events
     ks = None
-    for match_fn in (
-            functools.partial(_match_dec_event, dec_mode_cache=dec_mode_cache),
-            _match_kitty_key,
-            _match_modify_other_keys,
-            _match_legacy_csi_letter_form,
-            _match_legacy_csi_tilde_form,
-            _match_legacy_ss3_fkey_form):
-        ks = match_fn(text)
-        if ks:
-            break
+    if text[:1] == '\x1b':
+        ks = _match_escape_sequence(text, dec_mode_cache)
 
     # Then try static sequence lookups from terminal capabilities
     if ks is None:
         # Note: mapper is sorted longest-first, so '\x1b[A' matches KEY_UP, not KEY_EXIT.
-        for sequence, code in mapper.items():
-            if text.startswith(sequence):
-                ks = Keystroke(ucs=sequence, code=code, name=codes[code])
-                break
+        matched = _match_sequence(text, index or get_sequence_index(mapper))
+        if matched is not None:
+            sequence, code = matched
+            ks = Keystroke(ucs=sequence, code=code, name=codes[code])
 
     # Check for metaSendsEscape (Alt+key) or CSI fallback
     # Only fallback when no modern protocol has matched
@@ -1361,7 +1480,103 @@ def resolve_sequence(text: str,
 
     # final match is just simple resolution of the first codepoint of text
     if ks is None:
-        ks = Keystroke(ucs=text and text[0] or '')
+        ks = _keystroke_of_char(text[:1])
+    return ks
+
+
+def _parse_csi(text: str) -> Tuple[str, str, int]:
+    """
+    Parse the control sequence, ``ESC [``, that *text* begins with, by one pass.
+
+    :arg str text: Input text.
+    :rtype: tuple
+    :returns: Parameters, such as ``'1;5'``, final character, such as ``'A'``, or ``''`` when
+        not (yet) received, and length of the sequence through its final character.  When
+        *text* does not begin with ``ESC [``, ``('', '', 0)``.
+    """
+    if not text.startswith('\x1b['):
+        return '', '', 0
+    end, length = 2, len(text)
+    while end < length and '0' <= text[end] <= '?':
+        end += 1
+    final = text[end] if end < length and '@' <= text[end] <= '~' else ''
+    return text[2:end], final, end + len(final)
+
+
+def _match_escape_sequence(text: str,
+                           dec_mode_cache: Optional[Dict[int, int]]) -> Optional[Keystroke]:
+    """
+    Match *text*, beginning with ``ESC``, to keyboard protocols and DEC events.
+
+    A control sequence is parsed once, and only the matchers of its final character are tried,
+    in the order of precedence of :func:`resolve_sequence`.
+
+    :arg str text: Input text, beginning with ``ESC``.
+    :arg dict dec_mode_cache: Dictionary of DEC private mode states (mode number -> state value)
+    :rtype: Keystroke or None
+    :returns: :class:`Keystroke` if matched, ``None`` otherwise
+    """
+    if text[1:2] == 'O':
+        return _match_legacy_ss3_fkey_form(text)
+    if text[1:2] != '[':
+        return None
+    csi = _parse_csi(text)
+    params, final, _ = csi
+    ks = None
+    if dec_mode_cache:
+        ks = _match_dec_event(text, dec_mode_cache, final)
+    if ks is None and final == 'u':
+        ks = _match_kitty_key(text)
+    if ks is None and params.startswith('27;'):
+        ks = _match_modify_other_keys(text, csi)
+    if ks is None and params.startswith('1;'):
+        ks = _match_legacy_csi_letter_form(text, csi)
+    if ks is None and final == '~':
+        ks = _match_legacy_csi_tilde_form(text, csi)
+    return ks
+
+
+def _match_sequence(text: str, index: 'SequenceIndex') -> Optional[Tuple[str, int]]:
+    """
+    Return the first sequence of *index*, in order of its keymap, that *text* begins with.
+
+    Rather than comparing *text* to each sequence, the beginning of *text* of each length of
+    sequence is looked up.
+
+    :arg str text: Input text.
+    :arg SequenceIndex index: Index of sequences by :func:`get_sequence_index`.
+    :rtype: tuple or None
+    :returns: Sequence matched and its keycode, ``None`` otherwise
+    """
+    sequences, lengths = index
+    matched, matched_position = None, len(sequences)
+    for length in lengths:
+        if length > len(text):
+            break
+        position, code = sequences.get(text[:length], (matched_position, None))
+        if position < matched_position:
+            matched, matched_position = (text[:length], code), position
+    return matched
+
+
+# Keystrokes of single characters returned by resolve_sequence(), by character, to the number
+# of distinct characters typed by most any session
+_CHAR_KEYSTROKES: Dict[str, Keystroke] = {}
+_CHAR_KEYSTROKES_MAX = 1024
+
+
+def _keystroke_of_char(char: str) -> Keystroke:
+    """
+    Return a :class:`Keystroke` of a single character, or of none, shared by all calls.
+
+    Keystrokes are immutable, so that typed characters share one instance each, of which
+    :attr:`~.Keystroke.name` and :attr:`~.Keystroke.value` are computed only once.
+    """
+    ks = _CHAR_KEYSTROKES.get(char)
+    if ks is None:
+        ks = Keystroke(ucs=char)
+        if len(_CHAR_KEYSTROKES) < _CHAR_KEYSTROKES_MAX:
+            _CHAR_KEYSTROKES[char] = ks
     return ks
 
 
@@ -1448,8 +1663,8 @@ def _read_until(term: 'Terminal',
 
 
 def _match_dec_event(text: str,
-                     dec_mode_cache: Optional[Dict[int,
-                                                   int]] = None) -> Optional[Keystroke]:
+                     dec_mode_cache: Optional[Dict[int, int]] = None,
+                     final: Optional[str] = None) -> Optional[Keystroke]:
     """
     Attempt to match text against DEC event patterns.
 
@@ -1458,20 +1673,21 @@ def _match_dec_event(text: str,
 
     :arg str text: Input text to match against DEC patterns
     :arg dict dec_mode_cache: Dictionary of DEC private mode states (mode number -> state value)
+    :arg str final: Final character of the control sequence of *text*, if already parsed.
     :rtype: Keystroke or None
     :returns: :class:`Keystroke` with DEC event data if matched, ``None`` otherwise
-    """
-    from blessed.dec_modes import DecModeResponse  # pylint: disable=import-outside-toplevel
 
-    if dec_mode_cache is None:
-        dec_mode_cache = {}
-
-    for mode, pattern in DEC_EVENT_PATTERNS:
-        # Only match if the mode is enabled (state == SET)
-        mode_state = dec_mode_cache.get(int(mode))
-        if mode_state != DecModeResponse.SET:
-            continue
+    The patterns of a :class:`_DecModeCache` are compiled once for its enabled modes, those of
+    any other dictionary for each call.
+    """
+    if not dec_mode_cache:
+        return None
+    if final is None:
+        final = _parse_csi(text)[1]
+    matchers = (dec_mode_cache.event_matchers if isinstance(dec_mode_cache, _DecModeCache)
+                else _compile_dec_event_matchers(dec_mode_cache))
 
+    for mode, pattern in matchers.get(final, ()):
         match = pattern.match(text)
         if match:
             return Keystroke(ucs=match.group(0), mode=mode, match=match)
@@ -1532,11 +1748,14 @@ def _match_kitty_key(text: str) -> Optional[Keystroke]:
     return None
 
 
-def _match_modify_other_keys(text: str) -> Optional['Keystroke']:
+def _match_modify_other_keys(text: str,
+                             csi: Optional[Tuple[str, str, int]] = None
+                             ) -> Optional['Keystroke']:
     """
     Attempt to match text against xterm ModifyOtherKeys patterns.
 
     :arg str text: Input text to match against ModifyOtherKeys patterns
+    :arg tuple csi: Result of :func:`_parse_csi` for *text*, if already parsed.
     :rtype: Keystroke or None
     :returns: :class:`Keystroke` when matched, otherwise ``None``.
 
@@ -1544,41 +1763,57 @@ def _match_modify_other_keys(text: str) -> Optional['Keystroke']:
     ESC [ 27 ; modifiers ; key ~     # Standard form
     ESC [ 27 ; modifiers ; key       # Alternative form without trailing ~
     """
-    match = RE_PATTERN_MODIFY_OTHER.match(text)
-    if match:
-        # Create ModifyOtherKeysEvent namedtuple
-        modify_event = ModifyOtherKeysEvent(
-            key=int(match.group('key')),
-            modifiers=int(match.group('modifiers')))
-        # Create Keystroke with mode=-2 to indicate ModifyOtherKeys protocol
-        return Keystroke(ucs=match.group(0),
-                         mode=-2,
-                         match=modify_event)
+    params = (csi or _parse_csi(text))[0]
+    if not params.startswith('27;'):
+        return None
+    modifiers, separator, rest = params[3:].partition(';')
+    key_len = len(rest) - len(rest.lstrip('0123456789'))
+    if not (modifiers.isdigit() and separator and key_len):
+        return None
+    end = 6 + len(modifiers) + key_len
+    if text[end:end + 1] == '~':
+        end += 1
+    # Create ModifyOtherKeysEvent namedtuple
+    modify_event = ModifyOtherKeysEvent(key=int(rest[:key_len]), modifiers=int(modifiers))
+    # Create Keystroke with mode=-2 to indicate ModifyOtherKeys protocol
+    return Keystroke(ucs=text[:end], mode=-2, match=modify_event)
 
-    return None
 
+def _split_modifiers(params: str) -> Optional[Tuple[int, int]]:
+    """
+    Return modifiers and event type of control sequence parameters ``modifiers [: event]``.
 
-def _match_legacy_csi_letter_form(text: str) -> Optional[Keystroke]:
+    :arg str params: Parameters, such as ``'5'`` or ``'5:3'``.
+    :rtype: tuple or None
+    :returns: Modifiers and event type, 1 when not given, or ``None`` when malformed.
+    """
+    fields = params.split(':')
+    if len(fields) > 2 or not all(field.isdigit() for field in fields):
+        return None
+    return int(fields[0]), int(fields[1]) if len(fields) == 2 else 1
+
+
+def _match_legacy_csi_letter_form(text: str,
+                                  csi: Optional[Tuple[str, str, int]] = None
+                                  ) -> Optional[Keystroke]:
     """
     Match legacy CSI letter form: ESC [ 1 ; modifiers [ABCDEFHPQRS].
 
     :arg str text: Input text to match
+    :arg tuple csi: Result of :func:`_parse_csi` for *text*, if already parsed.
     :rtype: Keystroke or None
     :returns: :class:`Keystroke` if matched, ``None`` otherwise
 
     Handles arrow keys, Home/End, F1-F4 with modifiers.
     """
-    match = RE_PATTERN_LEGACY_CSI_MODIFIERS.match(text)
-    if not match:
+    params, key_id, length = csi or _parse_csi(text)
+    keycode = CSI_FINAL_CHAR_TO_KEYCODE.get(key_id)
+    modifiers_event = _split_modifiers(params[2:]) if params.startswith('1;') else None
+    if keycode is None or modifiers_event is None:
         return None
 
-    modifiers = int(match.group('mod'))
-    key_id = match.group('final')
-    matched_text = match.group(0)
-    event_type = int(match.group('event')) if match.group('event') else 1
-
-    # guaranteed not to raise KeyError by regex (ABCDEFHPQRS)
-    keycode = CSI_FINAL_CHAR_TO_KEYCODE[key_id]
+    modifiers, event_type = modifiers_event
+    matched_text = text[:length]
 
     legacy_event = LegacyCSIKeyEvent(
         kind='letter',
@@ -1589,11 +1824,14 @@ def _match_legacy_csi_letter_form(text: str) -> Optional[Keystroke]:
     return Keystroke(ucs=matched_text, code=keycode, mode=-3, match=legacy_event)
 
 
-def _match_legacy_csi_tilde_form(text: str) -> Optional[Keystroke]:
+def _match_legacy_csi_tilde_form(text: str,
+                                 csi: Optional[Tuple[str, str, int]] = None
+                                 ) -> Optional[Keystroke]:
     """
     Match legacy CSI tilde form: ESC [ number ; modifiers ~.
 
     :arg str text: Input text to match
+    :arg tuple csi: Result of :func:`_parse_csi` for *text*, if already parsed.
     :rtype: Keystroke or None
     :returns: :class:`Keystroke` if matched, ``None`` otherwise
 
@@ -1601,19 +1839,19 @@ def _match_legacy_csi_tilde_form(text: str) -> Optional[Keystroke]:
     with modifiers. See https://tomscii.sig7.se/zutty/doc/KEYS.html and
     https://invisible-island.net/xterm/xterm-function-keys.html for reference.
     """
-    match = RE_PATTERN_LEGACY_CSI_TILDE.match(text)
-    if not match:
+    params, final, length = csi or _parse_csi(text)
+    key_num, _, rest = params.partition(';')
+    if final != '~' or not key_num.isdigit():
         return None
-
-    modifiers = int(match.group('mod'))
-    key_id = int(match.group('key_num'))
-    matched_text = match.group(0)
-    event_type = int(match.group('event')) if match.group('event') else 1
-
+    modifiers_event = _split_modifiers(rest)
+    key_id = int(key_num)
     keycode = CSI_TILDE_NUM_TO_KEYCODE.get(key_id)
-    if keycode is None:
+    if modifiers_event is None or keycode is None:
         return None
 
+    modifiers, event_type = modifiers_event
+    matched_text = text[:length]
+
     legacy_event = LegacyCSIKeyEvent(
         kind='tilde',
         key_id=key_id,
@@ -1633,20 +1871,16 @@ def _match_legacy_ss3_fkey_form(text: str) -> Optional[Keystroke]:
 
     Handles F1-F4 with modifiers in SS3 format (used by Konsole and others).
     """
-    match = RE_PATTERN_LEGACY_SS3_FKEYS.match(text)
-    if not match:
+    if not text.startswith('\x1bO') or len(text) < 4:
         return None
-
-    modifiers = int(match.group('mod'))
-    final_char = match.group('final')
-    matched_text = match.group(0)
-
+    final_char = text[3]
+    keycode = SS3_FKEY_TO_KEYCODE.get(final_char)
     # Modifier 0 is invalid - modifiers start from 1 (no modifiers)
-    if modifiers == 0:
+    if keycode is None or not '1' <= text[2] <= '9':
         return None
 
-    # guaranteed not to raise KeyError by regex (PQRS)
-    keycode = SS3_FKEY_TO_KEYCODE[final_char]
+    modifiers = int(text[2])
+    matched_text = text[:4]
 
     # SS3 form doesn't support event_type, default to 1 (press)
     legacy_event = LegacyCSIKeyEvent(
@@ -2,12 +2,29 @@
 Headless line editor with history, auto-suggest, and grapheme-aware editing.
 
 This module provides :class:`LineEditor` for single-line input with readline-style
-editing and :class:`LineHistory` for command recall.
+editing, :class:`MultiLineEditor` for multi-line text, and :class:`LineHistory` for
+command recall.
 """
 from __future__ import annotations
 
 # std imports
-from typing import TYPE_CHECKING, Dict, List, Deque, Tuple, Union, Callable, Optional
+import os
+import re
+import mmap
+import bisect
+import itertools
+import contextlib
+from typing import (TYPE_CHECKING,
+                    Dict,
+                    List,
+                    Deque,
+                    Tuple,
+                    Union,
+                    Callable,
+                    Iterable,
+                    Optional,
+                    Sequence,
+                    Generator)
 from collections import deque
 from dataclasses import dataclass
 
@@ -18,14 +35,29 @@ if TYPE_CHECKING:  # pragma: no cover
 from wcwidth import width as wcswidth
 from wcwidth import iter_graphemes
 
+try:
+    # std imports
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+try:
+    # std imports
+    import msvcrt
+except ImportError:
+    msvcrt = None  # type: ignore[assignment]
+
 PASSWORD_CHAR = "\u273b"
 
 __all__ = (
     "DEFAULT_KEYMAP",
+    "DEFAULT_MULTILINE_KEYMAP",
     "DisplayState",
     "LineEditResult",
     "LineHistory",
+    "FileLineHistory",
     "LineEditor",
+    "MultiLineEditor",
 )
 
 
@@ -75,43 +107,168 @@ def _is_control(grapheme: str) -> bool:
     return cp < 0x20 or 0x7F <= cp < 0xA0
 
 
+class _PrefixNode:  # pylint: disable=too-few-public-methods
+    """Node of a :class:`_PrefixIndex` radix trie."""
+
+    __slots__ = ("label", "children", "ends", "total", "latest", "longer")
+
+    def __init__(self, label: str = "") -> None:
+        """Initialize an empty node reached by edge *label*."""
+        self.label = label
+        self.children: Dict[str, _PrefixNode] = {}
+        #: Number of entries ending exactly at this node.
+        self.ends = 0
+        #: Number of entries in this subtree, including :attr:`ends`.
+        self.total = 0
+        #: Most recent entry in this subtree.
+        self.latest = ""
+        #: Most recent entry in this subtree that is longer than this node.
+        self.longer = ""
+
+
+class _PrefixIndex:
+    """
+    Radix trie answering "most recent entry starting with prefix" in ``O(len(prefix))``.
+
+    Every node remembers the most recently added entry below it, so lookups never
+    visit more than one path.  Entries must be removed oldest-first, as when evicted
+    from a ring buffer, which keeps those cached values valid without rescanning.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty index."""
+        self._root = _PrefixNode()
+
+    def add(self, entry: str) -> None:
+        """Index *entry* as the most recent entry."""
+        node, pos = self._root, 0
+        while True:
+            node.total += 1
+            node.latest = entry
+            if pos == len(entry):
+                node.ends += 1
+                return
+            node.longer = entry
+            child = node.children.get(entry[pos])
+            if child is None:
+                leaf = _PrefixNode(entry[pos:])
+                leaf.ends = leaf.total = 1
+                leaf.latest = entry
+                node.children[entry[pos]] = leaf
+                return
+            label = child.label
+            if not entry.startswith(label, pos):
+                # split the edge where *entry* diverges from it
+                common = 1
+                while pos + common < len(entry) and label[common] == entry[pos + common]:
+                    common += 1
+                mid = _PrefixNode(label[:common])
+                child.label = label[common:]
+                mid.children[child.label[0]] = child
+                mid.total = child.total
+                mid.latest = mid.longer = child.latest
+                node.children[entry[pos]] = mid
+                child = mid
+            pos += len(child.label)
+            node = child
+
+    def remove(self, entry: str) -> None:
+        """Remove *entry*, which must be the oldest indexed entry."""
+        path: List[Tuple[_PrefixNode, _PrefixNode]] = []
+        node, pos = self._root, 0
+        node.total -= 1
+        while pos < len(entry):
+            child = node.children[entry[pos]]
+            path.append((node, child))
+            pos += len(child.label)
+            node = child
+            node.total -= 1
+        node.ends -= 1
+        for parent, child in reversed(path):
+            if child.total == 0:
+                del parent.children[child.label[0]]
+            elif child.ends == 0 and len(child.children) == 1:
+                # re-join an edge that no longer branches
+                (grandchild,) = child.children.values()
+                grandchild.label = child.label + grandchild.label
+                parent.children[child.label[0]] = grandchild
+
+    def search(self, prefix: str) -> Optional[str]:
+        """Return the most recent entry longer than and starting with *prefix*."""
+        node, pos = self._root, 0
+        while pos < len(prefix):
+            child = node.children.get(prefix[pos])
+            if child is None:
+                return None
+            label = child.label
+            if len(prefix) - pos < len(label):
+                # prefix ends mid-edge, every entry below is longer than it
+                return child.latest if label.startswith(prefix[pos:]) else None
+            if not prefix.startswith(label, pos):
+                return None
+            pos += len(label)
+            node = child
+        return node.longer if node.total > node.ends else None
+
+
 class LineHistory:
     """
     In-memory command history with navigation and prefix search.
 
+    Entries are held in a ring buffer and indexed by a radix trie, so that
+    :meth:`search_prefix` costs ``O(len(prefix))`` regardless of history size.
+
     :param max_entries: Maximum number of history entries retained.
     """
 
     def __init__(self, max_entries: int = 5000) -> None:
         """Initialize history with given maximum capacity."""
-        #: History entries list (most recent last).
-        self.entries: List[str] = []
+        self._entries: Deque[str] = deque(maxlen=max_entries or None)
+        self._index = _PrefixIndex()
         self._max_entries = max_entries
         self._nav_idx: int = -1
         self._nav_saved: str = ""
 
+    @property
+    def entries(self) -> List[str]:
+        """
+        History entries list (most recent last).
+
+        A copy is returned, assign a new list to replace the history.
+        """
+        return list(self._entries)
+
+    @entries.setter
+    def entries(self, lines: List[str]) -> None:
+        self._reset(lines)
+
+    def _reset(self, lines: Iterable[str]) -> None:
+        """Replace all entries with *lines*, rebuilding the prefix index."""
+        self._entries.clear()
+        self._index = _PrefixIndex()
+        for line in lines:
+            LineHistory.add(self, line)
+
     def add(self, line: str) -> None:
         """Append *line* to history, skipping empty and consecutive duplicates."""
         if not line:
             return
-        if self.entries and self.entries[-1] == line:
+        if self._entries and self._entries[-1] == line:
             return
-        self.entries.append(line)
-        if len(self.entries) > self._max_entries:
-            del self.entries[:-self._max_entries]
+        if len(self._entries) == self._entries.maxlen:
+            self._index.remove(self._entries[0])
+        self._entries.append(line)
+        self._index.add(line)
 
     def search_prefix(self, prefix: str) -> Optional[str]:
         """Return the most recent entry starting with *prefix*, or ``None``."""
         if not prefix:
             return None
-        for entry in reversed(self.entries):
-            if entry.startswith(prefix) and entry != prefix:
-                return entry
-        return None
+        return self._index.search(prefix)
 
     def nav_start(self, current_line: str) -> None:
         """Begin history navigation, saving *current_line*."""
-        self._nav_idx = len(self.entries)
+        self._nav_idx = len(self._entries)
         self._nav_saved = current_line
 
     def nav_up(self) -> Optional[str]:
@@ -119,16 +276,279 @@ class LineHistory:
         if self._nav_idx <= 0:
             return None
         self._nav_idx -= 1
-        return self.entries[self._nav_idx]
+        return self._entries[self._nav_idx]
 
     def nav_down(self) -> Optional[str]:
         """Navigate to the next (newer) history entry."""
-        if self._nav_idx >= len(self.entries):
+        if self._nav_idx >= len(self._entries):
             return None
         self._nav_idx += 1
-        if self._nav_idx >= len(self.entries):
+        if self._nav_idx >= len(self._entries):
             return self._nav_saved
-        return self.entries[self._nav_idx]
+        return self._entries[self._nav_idx]
+
+
+#: Escaped characters within a :class:`FileLineHistory` record.
+_RE_RECORD_ESCAPE = re.compile(r"\\(.)", re.DOTALL)
+_RECORD_UNESCAPE = {"n": "\n", "0": "\x00"}
+
+#: Size of a history file tolerated before compaction.
+_COMPACT_MIN_BYTES = 65536
+
+#: Terminator of a partial :class:`FileLineHistory` record left by an interrupted writer, a
+#: record ending by NUL, which is escaped in every complete record, is discarded when read.
+_PARTIAL_RECORD_END = b"\x00\n"
+
+
+def _encode_record(line: str) -> bytes:
+    """Encode *line* as one newline-terminated :class:`FileLineHistory` record."""
+    escaped = line.replace("\\", "\\\\").replace("\n", "\\n").replace("\x00", "\\0")
+    return (escaped + "\n").encode("utf-8", "surrogateescape")
+
+
+def _decode_record(data: bytes) -> str:
+    """Decode one :class:`FileLineHistory` record, without its newline."""
+    line = data.decode("utf-8", "surrogateescape")
+    if "\\" in line:
+        line = _RE_RECORD_ESCAPE.sub(
+            lambda match: _RECORD_UNESCAPE.get(match.group(1), match.group(1)), line)
+    return line
+
+
+class FileLineHistory(LineHistory):
+    """
+    Command history persisted to an append-only file shared between processes.
+
+    The file is not read until history is first used, and then only its most recent
+    *max_entries* records are decoded, scanning backward through a memory map.  Each
+    :meth:`add` appends one record under an exclusive lock, by :func:`fcntl.flock`, or
+    :func:`msvcrt.locking` on Windows, first merging any records appended by other processes
+    since, so that many shells may share one file.
+
+    Older records accumulate at the head of the file, which is compacted (rewritten
+    with only the retained entries) when loaded or appended to, once it is twice the size
+    of the retained entries.  Compaction replaces the file atomically, and other processes
+    notice the replacement and reload.  A partial record, of a writer interrupted by a
+    crash, is terminated by the next writer and ignored by all readers.
+
+    :param path: History file location, created on first :meth:`add`.
+    :param max_entries: Maximum number of history entries retained.
+    """
+
+    def __init__(self, path: str, max_entries: int = 5000) -> None:
+        """Initialize history backed by file *path*, which is loaded on first use."""
+        super().__init__(max_entries)
+        #: History file location.
+        self.path = path
+        self._loaded = False
+        self._file_id: Tuple[int, int] = (0, 0)
+        self._offset = 0
+        self._compact_size = _COMPACT_MIN_BYTES
+
+    @property
+    def entries(self) -> List[str]:
+        """
+        History entries list (most recent last).
+
+        A copy is returned, assign a new list to replace the history and rewrite the file.
+        """
+        self._ensure_loaded()
+        return list(self._entries)
+
+    @entries.setter
+    def entries(self, lines: List[str]) -> None:
+        self._loaded = True
+        with self._locked():
+            self._rewrite(lines)
+
+    def add(self, line: str) -> None:
+        """Append *line* to history and its file, skipping empty and consecutive duplicates."""
+        self._ensure_loaded()
+        if not line:
+            return
+        with self._locked():
+            size = self._sync()
+            if self._entries and self._entries[-1] == line:
+                return
+            record = _encode_record(line)
+            if size > self._offset:
+                # terminate a partial record left by an interrupted writer, to be ignored
+                record = _PARTIAL_RECORD_END + record
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                while record:
+                    record = record[os.write(fd, record):]
+                stat = os.fstat(fd)
+            finally:
+                os.close(fd)
+            self._file_id, self._offset = (stat.st_dev, stat.st_ino), stat.st_size
+            super().add(line)
+            self._compact_if_grown()
+
+    def search_prefix(self, prefix: str) -> Optional[str]:
+        """Return the most recent entry starting with *prefix*, or ``None``."""
+        self._ensure_loaded()
+        return super().search_prefix(prefix)
+
+    def nav_start(self, current_line: str) -> None:
+        """Begin history navigation, saving *current_line*."""
+        self._ensure_loaded()
+        super().nav_start(current_line)
+
+    def reload(self) -> None:
+        """Merge entries appended to the file by other processes."""
+        self._ensure_loaded()
+        with self._locked():
+            self._sync()
+            self._compact_if_grown()
+
+    def compact(self) -> None:
+        """Rewrite the file with only the retained entries."""
+        self._ensure_loaded()
+        with self._locked():
+            self._sync()
+            self._rewrite(list(self._entries))
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self._loaded = True
+            self._load()
+            if self._offset > self._compact_size:
+                self.compact()
+
+    def _compact_if_grown(self) -> None:
+        """Compact the file, with the lock held, when grown beyond its compaction size."""
+        if self._offset > self._compact_size:
+            self._rewrite(list(self._entries))
+
+    def _load(self) -> None:
+        """Replace entries with the tail of the history file."""
+        self._file_id, self._offset = (0, 0), 0
+        try:
+            with open(self.path, "rb") as fobj:
+                stat = os.fstat(fobj.fileno())
+                if stat.st_size == 0:
+                    lines: List[str] = []
+                    head = end = 0
+                else:
+                    with mmap.mmap(fobj.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                        lines, head, end = self._read_tail(data)
+        except FileNotFoundError:
+            self._reset(())
+            return
+        self._file_id, self._offset = (stat.st_dev, stat.st_ino), end
+        self._compact_size = max(_COMPACT_MIN_BYTES, 2 * (end - head))
+        self._reset(lines)
+
+    def _read_tail(self, data: mmap.mmap) -> Tuple[List[str], int, int]:
+        """
+        Decode the most recent complete records of memory-mapped history file *data*.
+
+        :returns: ``(lines, head, end)``, the retained lines (most recent last), offset of
+            the oldest retained record, and offset following the last complete record.
+        """
+        end = data.rfind(b"\n") + 1
+        maxlen = self._entries.maxlen
+        lines: List[str] = []
+        pos = end
+        while pos > 0 and (maxlen is None or len(lines) < maxlen):
+            start = data.rfind(b"\n", 0, pos - 1) + 1
+            record = data[start:pos - 1]
+            line = "" if record.endswith(b"\x00") else _decode_record(record)
+            if line and (not lines or lines[-1] != line):
+                lines.append(line)
+            pos = start
+        lines.reverse()
+        return lines, pos, end
+
+    def _sync(self) -> int:
+        """
+        Merge records appended by other processes, with the lock held.
+
+        :returns: Size of the history file.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._file_id, self._offset = (0, 0), 0
+            return 0
+        if (stat.st_dev, stat.st_ino) != self._file_id or stat.st_size < self._offset:
+            # replaced by compaction, or first written, by another process
+            self._load()
+        elif stat.st_size > self._offset:
+            with open(self.path, "rb") as fobj:
+                fobj.seek(self._offset)
+                data = fobj.read(stat.st_size - self._offset)
+            # records are complete up to the last newline, any remainder is of a writer
+            # interrupted by a crash, and terminated by the next add()
+            end = data.rfind(b"\n") + 1
+            for record in data[:end].split(b"\n")[:-1]:
+                if not record.endswith(b"\x00"):
+                    LineHistory.add(self, _decode_record(record))
+            self._offset += end
+        return stat.st_size
+
+    def _rewrite(self, lines: List[str]) -> None:
+        """Atomically replace the history file with *lines*, with the lock held."""
+        self._reset(lines)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as fobj:
+            fobj.write(b"".join(_encode_record(line) for line in self._entries))
+            fobj.flush()
+            os.fsync(fobj.fileno())
+        os.replace(tmp_path, self.path)
+        stat = os.stat(self.path)
+        self._file_id, self._offset = (stat.st_dev, stat.st_ino), stat.st_size
+        self._compact_size = max(_COMPACT_MIN_BYTES, 2 * stat.st_size)
+
+    @contextlib.contextmanager
+    def _locked(self) -> Generator[None, None, None]:
+        """Context manager holding an exclusive lock shared by all users of :attr:`path`."""
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            elif msvcrt is not None:
+                _msvcrt_lock(fd)
+            try:
+                yield
+            finally:
+                if fcntl is None and msvcrt is not None:
+                    # released before the file is closed, as msvcrt.locking() requires
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+
+def _msvcrt_lock(fd: int) -> None:
+    """Lock the first byte of file *fd* by :func:`msvcrt.locking`, waiting until it is held."""
+    while True:
+        try:
+            # gives up after ten attempts a second apart
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue
+
+
+class _Edit:  # pylint: disable=too-few-public-methods
+    """One undoable :class:`LineEditor` buffer edit, replacing *removed* by *inserted*."""
+
+    __slots__ = ("start", "removed", "inserted", "cursor_before", "cursor_after", "typing")
+
+    def __init__(  # pylint: disable=too-many-positional-arguments
+        self, start: int, removed: List[str], inserted: List[str],
+        cursor_before: int, cursor_after: int, typing: bool
+    ) -> None:
+        """Initialize edit of graphemes at index *start*."""
+        self.start = start
+        self.removed = removed
+        self.inserted = inserted
+        self.cursor_before = cursor_before
+        self.cursor_after = cursor_after
+        #: ``True`` for a typed insert, which may be extended by further typing.
+        self.typing = typing
 
 
 class LineEditor:  # pylint: disable=too-many-instance-attributes
@@ -161,15 +581,20 @@ class LineEditor:  # pylint: disable=too-many-instance-attributes
         bg_sgr: str = "",
         ellipsis_sgr: str = "",
         keymap: Optional[Dict[str, Optional[Callable[..., LineEditResult]]]] = None,
+        undo_limit: int = 100,
     ) -> None:
         """Initialize editor with optional history, display, and keymap settings."""
         self._buf: List[str] = []
+        self._widths: List[int] = []
+        self._cols: List[int] = [0]
+        self._line: Optional[str] = ""
         self._cursor: int = 0
         self._history = history or LineHistory()
         self._password_mode: bool = password
         self.password_char: str = password_char
         self._kill_ring: Deque[str] = deque(maxlen=64)
-        self._undo_stack: List[Tuple[List[str], int]] = []
+        self._undo_stack: Deque[_Edit] = deque(maxlen=undo_limit)
+        self._redo_stack: List[_Edit] = []
         self._navigating_history: bool = False
         self.max_width: int = max_width
         self.ellipsis: str = ellipsis
@@ -198,7 +623,9 @@ class LineEditor:  # pylint: disable=too-many-instance-attributes
     @property
     def line(self) -> str:
         """Return the current buffer contents as a string."""
-        return "".join(self._buf)
+        if self._line is None:
+            self._line = "".join(self._buf)
+        return self._line
 
     @property
     def password_mode(self) -> bool:
@@ -219,19 +646,23 @@ class LineEditor:  # pylint: disable=too-many-instance-attributes
         if self.password_mode:
             text = self.password_char * len(self._buf)
             cursor_col = self._cursor * wcswidth(self.password_char)
-            suggestion = ""
-        else:
-            text = self.line
-            cursor_col = self._cursor_display_col()
-            suggestion = self._get_suggestion()
+            if self._needs_hscroll():
+                offset = self._compute_scroll(cursor_col, wcswidth(text))
+                return self._apply_sgr(_apply_hscroll(
+                    text, "", cursor_col, self.max_width,
+                    self.ellipsis, scroll_offset=offset))
+            return self._apply_sgr(DisplayState(text=text, cursor=cursor_col))
+        cursor_col = self._cursor_display_col()
+        suggestion = self._get_suggestion()
         if self._needs_hscroll():
-            content_w = wcswidth(text) + wcswidth(suggestion)
+            # only the visible window of graphemes is joined, located using cached columns
+            content_w = self._column(len(self._buf)) + wcswidth(suggestion)
             offset = self._compute_scroll(cursor_col, content_w)
-            return self._apply_sgr(_apply_hscroll(
-                text, suggestion, cursor_col, self.max_width,
+            return self._apply_sgr(_hscroll_window(
+                self._buf, self._cols, suggestion, cursor_col, self.max_width,
                 self.ellipsis, scroll_offset=offset))
         return self._apply_sgr(
-            DisplayState(text=text, cursor=cursor_col, suggestion=suggestion))
+            DisplayState(text=self.line, cursor=cursor_col, suggestion=suggestion))
 
     def _update_render_state(self, cur: DisplayState, content_w: int) -> None:
         """Update previous-frame tracking state after rendering."""
@@ -341,6 +772,8 @@ class LineEditor:  # pylint: disable=too-many-instance-attributes
         if name:
             handler = self.keymap.get(name)
             if handler is not None:
+                # any key but typing, such as cursor movement, ends the undo step of typing
+                self._end_typing()
                 return handler(self)
             return LineEditResult()
         key_str = str(key)
@@ -348,8 +781,7 @@ class LineEditor:  # pylint: disable=too-many-instance-attributes
             if self._at_limit():
                 return LineEditResult(
                     changed=False, bell=self._fire_limit_bell())
-            self._save_undo()
-            self._insert_at_cursor(key_str)
+            self._insert_at_cursor(key_str, typing=True)
             self._navigating_history = False
             return LineEditResult(changed=True)
         return LineEditResult()
@@ -359,19 +791,19 @@ class LineEditor:  # pylint: disable=too-many-instance-attributes
         if self._at_limit():
             return LineEditResult(
                 changed=False, bell=self._fire_limit_bell())
-        self._save_undo()
         count = self._insert_at_cursor(text, filter_control=True)
         if count == 0:
-            self._undo_stack.pop()
             return LineEditResult(changed=False)
         return LineEditResult(changed=True)
 
     def clear(self) -> None:
-        """Clear the buffer and reset cursor to start."""
-        self._buf.clear()
+        """Clear the buffer and undo history, and reset cursor to start."""
+        self._splice(0, len(self._buf))
         self._cursor = 0
         self._scroll_offset = 0
         self._navigating_history = False
+        self._undo_stack.clear()
+        self._redo_stack.clear()
 
     def set_password_mode(self, enabled: bool) -> None:
         """Toggle password masking on or off."""
@@ -409,35 +841,99 @@ class LineEditor:  # pylint: disable=too-many-instance-attributes
             self._limit_bell_fired = False
 
     def _cursor_display_col(self) -> int:
-        return sum(wcswidth(g) for g in self._buf[:self._cursor])
+        return self._column(self._cursor)
+
+    def _column(self, index: int) -> int:
+        """
+        Return the display column at which grapheme *index* begins.
+
+        Columns are cached as prefix sums of grapheme widths, extended on demand from the
+        last valid entry, so that typing at the end of a long line stays ``O(1)``.
+        """
+        cols = self._cols
+        if index >= len(cols):
+            valid = len(cols) - 1
+            cols.extend(itertools.islice(itertools.accumulate(
+                self._widths[valid:index], initial=cols[-1]), 1, None))
+        return cols[index]
+
+    def _splice(self, start: int, end: int, graphemes: Sequence[str] = ()) -> str:
+        """Replace graphemes ``[start:end]`` of the buffer with *graphemes*, return removed text."""
+        removed = "".join(self._buf[start:end])
+        if self._line is not None and end == len(self._buf):
+            # editing at end of line, patch the cached text rather than re-joining it
+            self._line = self._line[:len(self._line) - len(removed)] + "".join(graphemes)
+        else:
+            self._line = None
+        self._buf[start:end] = graphemes
+        self._widths[start:end] = [wcswidth(grapheme) for grapheme in graphemes]
+        del self._cols[start + 1:]
+        return removed
+
+    def _edit(self, start: int, end: int, graphemes: Sequence[str], cursor: int,
+              typing: bool = False) -> str:
+        """
+        Replace graphemes ``[start:end]`` with *graphemes* as an undoable edit.
+
+        Only the replaced span is recorded, and consecutive typing is coalesced into one
+        undo step, broken at the start of each word, and by any other key.
+
+        :param cursor: Cursor position after the edit.
+        :param typing: ``True`` when *graphemes* were typed.
+        :returns: Removed text.
+        """
+        removed = self._buf[start:end]
+        if not removed and not graphemes:
+            return ""
+        prev = (self._undo_stack[-1] if typing and self._undo_stack and not self._redo_stack
+                else None)
+        if (prev is not None and prev.typing and start == prev.cursor_after
+                and not (prev.inserted[-1].isspace() and not graphemes[0].isspace())):
+            prev.inserted.extend(graphemes)
+            prev.cursor_after = cursor
+        else:
+            self._undo_stack.append(
+                _Edit(start, removed, list(graphemes), self._cursor, cursor, typing))
+        self._redo_stack.clear()
+        self._cursor = cursor
+        return self._splice(start, end, graphemes)
 
-    def _save_undo(self) -> None:
-        self._undo_stack.append((list(self._buf), self._cursor))
-        if len(self._undo_stack) > 100:
-            del self._undo_stack[:-100]
+    def _end_typing(self) -> None:
+        """End the undo step of typing, so that further typing is another."""
+        if self._undo_stack:
+            self._undo_stack[-1].typing = False
 
     def _insert_at_cursor(self, text: str, check_limit: bool = True,
-                          filter_control: bool = False) -> int:
+                          filter_control: bool = False, typing: bool = False) -> int:
         """Insert *text* graphemes at cursor, returning count inserted."""
-        count = 0
-        for grapheme in iter_graphemes(text):
-            if check_limit and self._at_limit():
-                break
-            if filter_control and _is_control(grapheme):
-                continue
-            self._buf.insert(self._cursor, grapheme)
-            self._cursor += 1
-            count += 1
-        return count
+        graphemes = iter_graphemes(text)
+        if filter_control:
+            graphemes = (grapheme for grapheme in graphemes if not _is_control(grapheme))
+        count = max(0, self.limit - len(self._buf)) if check_limit and self.limit > 0 else None
+        inserted = list(itertools.islice(graphemes, count))
+        self._edit(self._cursor, self._cursor, inserted, self._cursor + len(inserted), typing)
+        return len(inserted)
 
     def _set_text(self, text: str) -> None:
-        self._buf = list(iter_graphemes(text))
-        self._cursor = len(self._buf)
+        graphemes = list(iter_graphemes(text))
+        self._edit(0, len(self._buf), graphemes, len(graphemes))
 
     def _undo(self) -> LineEditResult:
         if not self._undo_stack:
             return LineEditResult()
-        self._buf, self._cursor = self._undo_stack.pop()
+        edit = self._undo_stack.pop()
+        self._splice(edit.start, edit.start + len(edit.inserted), edit.removed)
+        self._cursor = edit.cursor_before
+        self._redo_stack.append(edit)
+        return LineEditResult(changed=True)
+
+    def _redo(self) -> LineEditResult:
+        if not self._redo_stack:
+            return LineEditResult()
+        edit = self._redo_stack.pop()
+        self._splice(edit.start, edit.start + len(edit.removed), edit.inserted)
+        self._cursor = edit.cursor_after
+        self._undo_stack.append(edit)
         return LineEditResult(changed=True)
 
     def _handle_enter(self) -> LineEditResult:
@@ -445,12 +941,10 @@ class LineEditor:  # pylint: disable=too-many-instance-attributes
         if line and not self.password_mode:
             self._history.add(line)
         self.clear()
-        self._undo_stack.clear()
         return LineEditResult(line=line, changed=True)
 
     def _handle_ctrl_c(self) -> LineEditResult:
         self.clear()
-        self._undo_stack.clear()
         return LineEditResult(interrupt=True, changed=True)
 
     def _handle_ctrl_d(self) -> LineEditResult:
@@ -510,26 +1004,21 @@ class LineEditor:  # pylint: disable=too-many-instance-attributes
 
     def _backspace(self) -> LineEditResult:
         if self._cursor > 0:
-            self._save_undo()
-            self._cursor -= 1
-            del self._buf[self._cursor]
+            self._edit(self._cursor - 1, self._cursor, (), self._cursor - 1)
             self._maybe_reset_limit_bell()
             return LineEditResult(changed=True)
         return LineEditResult()
 
     def _delete_at_cursor(self) -> LineEditResult:
         if self._cursor < len(self._buf):
-            self._save_undo()
-            del self._buf[self._cursor]
+            self._edit(self._cursor, self._cursor + 1, (), self._cursor)
             self._maybe_reset_limit_bell()
             return LineEditResult(changed=True)
         return LineEditResult()
 
     def _kill_to_end(self) -> LineEditResult:
         if self._cursor < len(self._buf):
-            self._save_undo()
-            killed = "".join(self._buf[self._cursor:])
-            del self._buf[self._cursor:]
+            killed = self._edit(self._cursor, len(self._buf), (), self._cursor)
             self._kill_ring.append(killed)
             self._maybe_reset_limit_bell()
             return LineEditResult(changed=True)
@@ -537,10 +1026,7 @@ class LineEditor:  # pylint: disable=too-many-instance-attributes
 
     def _kill_line(self) -> LineEditResult:
         if self._buf and self._cursor > 0:
-            self._save_undo()
-            killed = "".join(self._buf[:self._cursor])
-            del self._buf[:self._cursor]
-            self._cursor = 0
+            killed = self._edit(0, self._cursor, (), 0)
             self._kill_ring.append(killed)
             self._maybe_reset_limit_bell()
             return LineEditResult(changed=True)
@@ -549,12 +1035,8 @@ class LineEditor:  # pylint: disable=too-many-instance-attributes
     def _kill_word_back(self) -> LineEditResult:
         if self._cursor == 0:
             return LineEditResult()
-        self._save_undo()
-        end = self._cursor
         pos = self._find_word_left()
-        killed = "".join(self._buf[pos:end])
-        del self._buf[pos:end]
-        self._cursor = pos
+        killed = self._edit(pos, self._cursor, (), pos)
         self._kill_ring.append(killed)
         self._maybe_reset_limit_bell()
         return LineEditResult(changed=True)
@@ -562,10 +1044,8 @@ class LineEditor:  # pylint: disable=too-many-instance-attributes
     def _yank(self) -> LineEditResult:
         if not self._kill_ring:
             return LineEditResult()
-        self._save_undo()
         n = self._insert_at_cursor(self._kill_ring[-1])
         if n == 0:
-            self._undo_stack.pop()
             return LineEditResult()
         return LineEditResult(changed=True)
 
@@ -592,74 +1072,20 @@ class LineEditor:  # pylint: disable=too-many-instance-attributes
         if self._cursor == len(self._buf):
             suggestion = self._get_suggestion()
             if suggestion:
-                self._save_undo()
                 self._insert_at_cursor(suggestion, check_limit=False)
                 return LineEditResult(changed=True)
         return self._move_right()
 
     def _get_suggestion(self) -> str:
-        if self.password_mode:
+        if self.password_mode or not self._buf or self._cursor != len(self._buf):
             return ""
         line = self.line
-        if not line or self._cursor != len(self._buf):
-            return ""
         match = self._history.search_prefix(line)
         if match is not None:
             return match[len(line):]
         return ""
 
 
-def _clip_graphemes(
-    combined: str, scroll_offset: int, usable: int
-) -> Tuple[List[str], int]:
-    """
-    Collect visible graphemes from *combined* within a scroll window.
-
-    :param combined: Full text (buffer + suggestion).
-    :param scroll_offset: Column offset of the left edge.
-    :param usable: Available display columns.
-    :returns: ``(visible_parts, visible_width)`` tuple.
-    """
-    vis_parts: List[str] = []
-    vis_width = 0
-    col = 0
-    for grapheme in iter_graphemes(combined):
-        g_w = wcswidth(grapheme)
-        if col + g_w <= scroll_offset:
-            col += g_w
-            continue
-        if vis_width + g_w > usable:
-            break
-        vis_parts.append(grapheme)
-        vis_width += g_w
-        col += g_w
-    return vis_parts, vis_width
-
-
-def _split_text_suggestion(
-    vis_parts: List[str], scroll_offset: int, text_w: int
-) -> Tuple[str, str]:
-    """
-    Split visible graphemes into text and suggestion portions.
-
-    :param vis_parts: Graphemes within the visible window.
-    :param scroll_offset: Column offset of the left edge.
-    :param text_w: Display width of the buffer text (before suggestion).
-    :returns: ``(visible_text, visible_suggestion)`` tuple.
-    """
-    vis_text_parts: List[str] = []
-    vis_suggest_parts: List[str] = []
-    pos = 0
-    for grapheme in vis_parts:
-        g_w = wcswidth(grapheme)
-        if scroll_offset + pos < text_w:
-            vis_text_parts.append(grapheme)
-        else:
-            vis_suggest_parts.append(grapheme)
-        pos += g_w
-    return "".join(vis_text_parts), "".join(vis_suggest_parts)
-
-
 def _default_scroll_offset(cursor_col: int, max_width: int) -> int:
     """
     Compute an initial scroll offset when none is provided.
@@ -674,37 +1100,36 @@ def _default_scroll_offset(cursor_col: int, max_width: int) -> int:
     return 0
 
 
-def _trim_right_overflow(
-    vis_parts: List[str], vis_width: int, ellipsis_w: int, usable: int
-) -> int:
-    """
-    Remove trailing graphemes to make room for a right-side ellipsis.
-
-    :param vis_parts: Visible grapheme list (mutated in place).
-    :param vis_width: Current total display width of *vis_parts*.
-    :param ellipsis_w: Display width of the ellipsis character.
-    :param usable: Available display columns.
-    :returns: Updated visible width after trimming.
-    """
-    while vis_parts and vis_width + ellipsis_w > usable:
-        vis_width -= wcswidth(vis_parts.pop())
-    return vis_width
-
-
-def _apply_hscroll(  # pylint: disable=too-many-positional-arguments
-    text: str,
+def _hscroll_window(  # pylint: disable=too-many-positional-arguments,too-many-locals
+    graphemes: List[str],
+    cols: List[int],
     suggestion: str,
     cursor_col: int,
     max_width: int,
     ellipsis: str = "\u2026",
     scroll_offset: Optional[int] = None,
 ) -> DisplayState:
-    """Build a :class:`DisplayState` with horizontal scrolling applied."""
-    text_w = wcswidth(text)
+    """
+    Build a :class:`DisplayState` with horizontal scrolling applied.
 
-    if text_w + wcswidth(suggestion) < max_width and cursor_col < max_width:
+    :param graphemes: Buffer text as a list of grapheme clusters.
+    :param cols: Display column at which each grapheme begins, followed by the total
+        display width, as maintained by :class:`LineEditor`.
+    :param suggestion: Auto-suggest suffix following the buffer text.
+    :param cursor_col: Cursor display column.
+    :param max_width: Available display columns.
+    :param ellipsis: Overflow indicator.
+    :param scroll_offset: Column offset of the left edge.
+    :returns: Display state, the visible window is located by bisection of *cols*.
+    """
+    text_w = cols[-1]
+    sugg_graphemes = list(iter_graphemes(suggestion))
+    sugg_cols = list(itertools.accumulate(map(wcswidth, sugg_graphemes), initial=text_w))
+    content_w = sugg_cols[-1]
+
+    if content_w < max_width and cursor_col < max_width:
         return DisplayState(
-            text=text, cursor=cursor_col, suggestion=suggestion)
+            text="".join(graphemes), cursor=cursor_col, suggestion=suggestion)
 
     if scroll_offset is None:
         scroll_offset = _default_scroll_offset(cursor_col, max_width)
@@ -712,19 +1137,27 @@ def _apply_hscroll(  # pylint: disable=too-many-positional-arguments
     overflow_left = scroll_offset > 0
     ellipsis_w = wcswidth(ellipsis)
     usable = max_width - (ellipsis_w if overflow_left else 0)
-
-    vis_parts, vis_width = _clip_graphemes(
-        text + suggestion, scroll_offset, usable)
-
-    overflow_right = (scroll_offset + usable) < text_w + wcswidth(suggestion)
-    if overflow_right:
-        _trim_right_overflow(vis_parts, vis_width, ellipsis_w, usable)
-
-    vis_text, vis_suggestion = _split_text_suggestion(
-        vis_parts, scroll_offset, text_w)
+    overflow_right = (scroll_offset + usable) < content_w
+
+    # the first visible grapheme is the first to end beyond scroll_offset
+    start = bisect.bisect_right(cols, scroll_offset, 1) - 1
+    sugg_start = 0
+    if start < len(graphemes):
+        left = cols[start]
+    else:
+        sugg_start = max(0, bisect.bisect_right(sugg_cols, scroll_offset, 1) - 1)
+        left = sugg_cols[sugg_start]
+
+    # followed by all graphemes that end within the usable width
+    right = left + usable - (ellipsis_w if overflow_right else 0)
+    end = max(start, bisect.bisect_right(cols, right) - 1)
+    vis_suggestion = ""
+    if end == len(graphemes):
+        sugg_end = max(sugg_start, bisect.bisect_right(sugg_cols, right) - 1)
+        vis_suggestion = "".join(sugg_graphemes[sugg_start:sugg_end])
 
     return DisplayState(
-        text=vis_text,
+        text="".join(graphemes[start:end]),
         cursor=cursor_col - scroll_offset + (ellipsis_w if overflow_left else 0),
         suggestion=vis_suggestion,
         overflow_left=overflow_left,
@@ -732,6 +1165,448 @@ def _apply_hscroll(  # pylint: disable=too-many-positional-arguments
     )
 
 
+def _apply_hscroll(  # pylint: disable=too-many-positional-arguments
+    text: str,
+    suggestion: str,
+    cursor_col: int,
+    max_width: int,
+    ellipsis: str = "\u2026",
+    scroll_offset: Optional[int] = None,
+) -> DisplayState:
+    """Build a :class:`DisplayState` with horizontal scrolling applied."""
+    graphemes = list(iter_graphemes(text))
+    cols = list(itertools.accumulate(map(wcswidth, graphemes), initial=0))
+    return _hscroll_window(
+        graphemes, cols, suggestion, cursor_col, max_width, ellipsis, scroll_offset)
+
+
+def _clip_columns(graphemes: List[str], left: int, width: int) -> Tuple[str, int]:
+    """
+    Return text of *graphemes* visible between display columns *left* and ``left + width``.
+
+    A wide grapheme straddling the left edge is replaced by spaces.
+
+    :returns: ``(visible_text, visible_width)`` tuple.
+    """
+    parts: List[str] = []
+    col = 0
+    right = left + width
+    for grapheme in graphemes:
+        g_w = wcswidth(grapheme)
+        if col + g_w > right:
+            break
+        if col >= left:
+            parts.append(grapheme)
+        elif col + g_w > left:
+            parts.append(" " * (col + g_w - left))
+        col += g_w
+    return "".join(parts), max(0, col - left)
+
+
+def _advance(start: Tuple[int, int], graphemes: List[List[str]]) -> Tuple[int, int]:
+    """Return the position following *graphemes*, a list of line segments, from *start*."""
+    if len(graphemes) == 1:
+        return start[0], start[1] + len(graphemes[0])
+    return start[0] + len(graphemes) - 1, len(graphemes[-1])
+
+
+class _TextEdit:  # pylint: disable=too-few-public-methods
+    """
+    One undoable :class:`MultiLineEditor` edit, replacing *removed* by *inserted*.
+
+    Text is kept as line segments of graphemes, so that undo restores the exact grapheme
+    boundaries, which segmenting text again may not reproduce.
+    """
+
+    __slots__ = ("start", "end", "removed", "inserted", "cursor_before", "cursor_after",
+                 "typing")
+
+    def __init__(  # pylint: disable=too-many-positional-arguments
+        self, start: Tuple[int, int], end: Tuple[int, int], removed: List[List[str]],
+        inserted: List[List[str]], cursor_before: Tuple[int, int],
+        cursor_after: Tuple[int, int], typing: bool
+    ) -> None:
+        """Initialize edit of text between positions *start* and *end*."""
+        self.start = start
+        self.end = end
+        self.removed = removed
+        self.inserted = inserted
+        self.cursor_before = cursor_before
+        #: Cursor position after the edit, which is also the end of *inserted*.
+        self.cursor_after = cursor_after
+        #: ``True`` for a typed insert, which may be extended by further typing.
+        self.typing = typing
+
+
+class MultiLineEditor:  # pylint: disable=too-many-instance-attributes
+    """
+    Headless multi-line editor (text area) with grapheme-aware cursor movement.
+
+    Text is held as a list of lines, each a list of grapheme clusters, so that an edit
+    costs time in proportion to the lines it touches, and :meth:`render` draws only the
+    :attr:`height` rows of the viewport, regardless of document size.
+
+    Feed keystrokes via :meth:`feed_key`, which dispatches on ``.name`` using the same
+    emacs/readline bindings as :class:`LineEditor` where they apply, see
+    :data:`DEFAULT_MULTILINE_KEYMAP`.  Enter inserts a line break, and Alt+Enter accepts
+    the document as :attr:`LineEditResult.line`.
+    """
+
+    def __init__(  # pylint: disable=too-many-positional-arguments
+        self,
+        text: str = "",
+        height: int = 10,
+        text_sgr: str = "\x1b[38;2;230;225;220m",
+        bg_sgr: str = "",
+        keymap: Optional[Dict[str, Optional[Callable[..., LineEditResult]]]] = None,
+        undo_limit: int = 100,
+    ) -> None:
+        """Initialize editor with optional text, viewport height, style, and keymap."""
+        self._lines: List[List[str]] = [[]]
+        self._row: int = 0
+        self._col: int = 0
+        self._goal_col: Optional[int] = None
+        #: Number of rows drawn by :meth:`render`.
+        self.height: int = height
+        self._top: int = 0
+        self._left: int = 0
+        self.text_sgr: str = text_sgr
+        self.bg_sgr: str = bg_sgr
+        self._kill_ring: Deque[str] = deque(maxlen=64)
+        self._undo_stack: Deque[_TextEdit] = deque(maxlen=undo_limit)
+        self._redo_stack: List[_TextEdit] = []
+        self.keymap: Dict[str, Optional[Callable[..., LineEditResult]]] = dict(
+            DEFAULT_MULTILINE_KEYMAP)
+        if keymap:
+            self.keymap.update(keymap)
+        self.set_text(text)
+
+    @property
+    def text(self) -> str:
+        r"""Return the document as a string, lines separated by ``"\n"``."""
+        return "\n".join("".join(line) for line in self._lines)
+
+    @property
+    def cursor(self) -> Tuple[int, int]:
+        """Return cursor position as ``(row, column)``, the column in graphemes."""
+        return self._row, self._col
+
+    @property
+    def line_count(self) -> int:
+        """Return the number of lines in the document."""
+        return len(self._lines)
+
+    def set_text(self, text: str) -> None:
+        """Replace the document with *text*, moving the cursor to its start."""
+        self._lines = _segments(text)
+        self._row = self._col = self._top = self._left = 0
+        self._goal_col = None
+        self._undo_stack.clear()
+        self._redo_stack.clear()
+
+    def clear(self) -> None:
+        """Clear the document, undo history, and reset cursor to start."""
+        self.set_text("")
+
+    def feed_key(self, key: Union["Keystroke", str]) -> LineEditResult:  # noqa: F821
+        """Process one keystroke and return a :class:`LineEditResult`."""
+        name = getattr(key, "name", None)
+        if name:
+            handler = self.keymap.get(name)
+            if handler is not None:
+                # any key but typing, such as cursor movement, ends the undo step of typing
+                self._end_typing()
+                return handler(self)
+            return LineEditResult()
+        key_str = str(key)
+        if key_str and key_str.isprintable():
+            self._edit(self.cursor, self.cursor, [list(iter_graphemes(key_str))], typing=True)
+            return LineEditResult(changed=True)
+        return LineEditResult()
+
+    def insert_text(self, text: str) -> LineEditResult:
+        """Insert *text*, which may span lines, at cursor position (for bracketed paste)."""
+        segments = [[grapheme for grapheme in line if not _is_control(grapheme)]
+                    for line in _segments(text)]
+        if segments == [[]]:
+            return LineEditResult(changed=False)
+        self._edit(self.cursor, self.cursor, segments)
+        return LineEditResult(changed=True)
+
+    def render(self, term: Terminal, row: int, width: int, col: int = 0) -> str:
+        """
+        Build escape sequences to render the visible rows of the document.
+
+        The viewport is first scrolled to keep the cursor visible.
+
+        :param term: Blessed :class:`~.Terminal` instance for cursor/SGR.
+        :param row: Terminal row of the first line of the viewport.
+        :param width: Available columns.
+        :param col: Terminal column of the left edge of the viewport.
+        :returns: Escape-sequence string; caller writes/encodes it.
+        """
+        cursor_col = self._cursor_display_col()
+        self._scroll_to_cursor(cursor_col, width)
+        parts: List[str] = []
+        for y in range(self.height):
+            parts.extend((term.move_yx(row + y, col), self.bg_sgr))
+            text, text_w = "", 0
+            if self._top + y < len(self._lines):
+                text, text_w = _clip_columns(self._lines[self._top + y], self._left, width)
+            if text:
+                parts.extend((self.text_sgr, text))
+            if width > text_w:
+                parts.extend((self.bg_sgr, " " * (width - text_w)))
+            parts.append(term.normal)
+        parts.append(term.move_yx(row + self._row - self._top, col + cursor_col - self._left))
+        return "".join(parts)
+
+    def _scroll_to_cursor(self, cursor_col: int, width: int) -> None:
+        if self._row < self._top:
+            self._top = self._row
+        elif self._row >= self._top + self.height:
+            self._top = self._row - self.height + 1
+        if cursor_col < self._left:
+            self._left = cursor_col
+        elif cursor_col >= self._left + width:
+            self._left = cursor_col - width + 1
+
+    def _cursor_display_col(self) -> int:
+        return sum(map(wcswidth, self._lines[self._row][:self._col]))
+
+    def _col_at(self, row: int, display_col: int) -> int:
+        """Return the grapheme index of *row* nearest, not beyond, *display_col*."""
+        col = 0
+        for index, grapheme in enumerate(self._lines[row]):
+            col += wcswidth(grapheme)
+            if col > display_col:
+                return index
+        return len(self._lines[row])
+
+    def _set_cursor(self, row: int, col: int) -> LineEditResult:
+        self._goal_col = None
+        if (row, col) == (self._row, self._col):
+            return LineEditResult()
+        self._row, self._col = row, col
+        return LineEditResult(changed=True)
+
+    def _replace(self, start: Tuple[int, int], end: Tuple[int, int],
+                 segments: List[List[str]]) -> Tuple[List[List[str]], Tuple[int, int]]:
+        """
+        Replace text between positions *start* and *end* with line *segments* of graphemes.
+
+        Only the lines from *start* to *end* are touched.
+
+        :returns: ``(removed_segments, end_of_segments)`` tuple.
+        """
+        (row1, col1), (row2, col2) = start, end
+        lines = self._lines
+        removed = ([lines[row1][col1:col2]] if row1 == row2
+                   else [lines[row1][col1:], *lines[row1 + 1:row2], lines[row2][:col2]])
+        inserted = [list(segment) for segment in segments]
+        inserted[0][:0] = lines[row1][:col1]
+        inserted[-1].extend(lines[row2][col2:])
+        lines[row1:row2 + 1] = inserted
+        return removed, _advance(start, segments)
+
+    def _edit(self, start: Tuple[int, int], end: Tuple[int, int],
+              segments: List[List[str]], typing: bool = False) -> str:
+        """
+        Replace text between *start* and *end* as an undoable edit, cursor moved to its end.
+
+        :returns: Removed text.
+        """
+        if start == end and segments == [[]]:
+            return ""
+        removed, cursor = self._replace(start, end, segments)
+        prev = (self._undo_stack[-1] if typing and self._undo_stack and not self._redo_stack
+                else None)
+        if (prev is not None and prev.typing and start == prev.cursor_after == self.cursor
+                and not (prev.inserted[-1][-1].isspace() and not segments[0][0].isspace())):
+            prev.inserted[-1].extend(segments[0])
+            prev.cursor_after = cursor
+        else:
+            self._undo_stack.append(_TextEdit(
+                start, end, removed, [list(segment) for segment in segments],
+                self.cursor, cursor, typing))
+        self._redo_stack.clear()
+        self._row, self._col = cursor
+        self._goal_col = None
+        return "\n".join("".join(segment) for segment in removed)
+
+    def _end_typing(self) -> None:
+        """End the undo step of typing, so that further typing is another."""
+        if self._undo_stack:
+            self._undo_stack[-1].typing = False
+
+    def _undo(self) -> LineEditResult:
+        if not self._undo_stack:
+            return LineEditResult()
+        edit = self._undo_stack.pop()
+        self._replace(edit.start, edit.cursor_after, edit.removed)
+        self._row, self._col = edit.cursor_before
+        self._goal_col = None
+        self._redo_stack.append(edit)
+        return LineEditResult(changed=True)
+
+    def _redo(self) -> LineEditResult:
+        if not self._redo_stack:
+            return LineEditResult()
+        edit = self._redo_stack.pop()
+        self._replace(edit.start, edit.end, edit.inserted)
+        self._row, self._col = edit.cursor_after
+        self._goal_col = None
+        self._undo_stack.append(edit)
+        return LineEditResult(changed=True)
+
+    def _kill(self, start: Tuple[int, int], end: Tuple[int, int]) -> LineEditResult:
+        if start == end:
+            return LineEditResult()
+        self._kill_ring.append(self._edit(start, end, [[]]))
+        return LineEditResult(changed=True)
+
+    def _line_end(self) -> Tuple[int, int]:
+        return self._row, len(self._lines[self._row])
+
+    def _next_position(self) -> Tuple[int, int]:
+        """Return position of the next grapheme or line, or the cursor at end of document."""
+        if self._col < len(self._lines[self._row]):
+            return self._row, self._col + 1
+        if self._row + 1 < len(self._lines):
+            return self._row + 1, 0
+        return self.cursor
+
+    def _prev_position(self) -> Tuple[int, int]:
+        """Return position of the previous grapheme or line, or the cursor at start."""
+        if self._col > 0:
+            return self._row, self._col - 1
+        if self._row > 0:
+            return self._row - 1, len(self._lines[self._row - 1])
+        return self.cursor
+
+    def _handle_accept(self) -> LineEditResult:
+        text = self.text
+        self.clear()
+        return LineEditResult(line=text, changed=True)
+
+    def _handle_ctrl_c(self) -> LineEditResult:
+        self.clear()
+        return LineEditResult(interrupt=True, changed=True)
+
+    def _handle_ctrl_d(self) -> LineEditResult:
+        if self._lines == [[]]:
+            return LineEditResult(eof=True)
+        return self._delete_at_cursor()
+
+    def _newline(self) -> LineEditResult:
+        self._edit(self.cursor, self.cursor, [[], []])
+        return LineEditResult(changed=True)
+
+    def _move_left(self) -> LineEditResult:
+        return self._set_cursor(*self._prev_position())
+
+    def _move_right(self) -> LineEditResult:
+        return self._set_cursor(*self._next_position())
+
+    def _move_home(self) -> LineEditResult:
+        return self._set_cursor(self._row, 0)
+
+    def _move_end(self) -> LineEditResult:
+        return self._set_cursor(*self._line_end())
+
+    def _move_doc_start(self) -> LineEditResult:
+        return self._set_cursor(0, 0)
+
+    def _move_doc_end(self) -> LineEditResult:
+        return self._set_cursor(len(self._lines) - 1, len(self._lines[-1]))
+
+    def _move_rows(self, count: int) -> LineEditResult:
+        row = max(0, min(len(self._lines) - 1, self._row + count))
+        if row == self._row:
+            return LineEditResult()
+        goal = self._goal_col
+        if goal is None:
+            goal = self._cursor_display_col()
+        self._row, self._col = row, self._col_at(row, goal)
+        self._goal_col = goal
+        return LineEditResult(changed=True)
+
+    def _move_up(self) -> LineEditResult:
+        return self._move_rows(-1)
+
+    def _move_down(self) -> LineEditResult:
+        return self._move_rows(1)
+
+    def _page_up(self) -> LineEditResult:
+        return self._move_rows(-max(1, self.height))
+
+    def _page_down(self) -> LineEditResult:
+        return self._move_rows(max(1, self.height))
+
+    def _find_word_left(self) -> Tuple[int, int]:
+        if self._col == 0:
+            return self._prev_position()
+        line, pos = self._lines[self._row], self._col - 1
+        while pos > 0 and not line[pos - 1].isalnum():
+            pos -= 1
+        while pos > 0 and line[pos - 1].isalnum():
+            pos -= 1
+        return self._row, pos
+
+    def _move_word_left(self) -> LineEditResult:
+        return self._set_cursor(*self._find_word_left())
+
+    def _move_word_right(self) -> LineEditResult:
+        line = self._lines[self._row]
+        if self._col >= len(line):
+            return self._move_right()
+        pos = self._col
+        while pos < len(line) and not line[pos].isalnum():
+            pos += 1
+        while pos < len(line) and line[pos].isalnum():
+            pos += 1
+        return self._set_cursor(self._row, pos)
+
+    def _backspace(self) -> LineEditResult:
+        start = self._prev_position()
+        if start == self.cursor:
+            return LineEditResult()
+        self._edit(start, self.cursor, [[]])
+        return LineEditResult(changed=True)
+
+    def _delete_at_cursor(self) -> LineEditResult:
+        end = self._next_position()
+        if end == self.cursor:
+            return LineEditResult()
+        self._edit(self.cursor, end, [[]])
+        return LineEditResult(changed=True)
+
+    def _kill_to_end(self) -> LineEditResult:
+        end = self._line_end()
+        if end == self.cursor:
+            # at end of line, kill the line break
+            end = self._next_position()
+        return self._kill(self.cursor, end)
+
+    def _kill_line(self) -> LineEditResult:
+        return self._kill((self._row, 0), self.cursor)
+
+    def _kill_word_back(self) -> LineEditResult:
+        return self._kill(self._find_word_left(), self.cursor)
+
+    def _yank(self) -> LineEditResult:
+        if not self._kill_ring:
+            return LineEditResult()
+        self._edit(self.cursor, self.cursor, _segments(self._kill_ring[-1]))
+        return LineEditResult(changed=True)
+
+
+def _segments(text: str) -> List[List[str]]:
+    r"""Split *text* into lines of graphemes at ``"\r\n"``, ``"\r"``, or ``"\n"``."""
+    return [list(iter_graphemes(line))
+            for line in text.replace("\r\n", "\n").replace("\r", "\n").split("\n")]
+
+
 # pylint: disable=protected-access
 DEFAULT_KEYMAP: Dict[str, Callable[..., LineEditResult]] = {
     "KEY_ENTER": LineEditor._handle_enter,
@@ -760,5 +1635,43 @@ DEFAULT_KEYMAP: Dict[str, Callable[..., LineEditResult]] = {
     "KEY_CTRL_N": LineEditor._history_next,
     "KEY_CTRL_P": LineEditor._history_prev,
     "KEY_CTRL_Z": LineEditor._undo,
+    "KEY_CTRL_SHIFT_Z": LineEditor._redo,
+}
+# pylint: enable=protected-access
+
+# pylint: disable=protected-access
+DEFAULT_MULTILINE_KEYMAP: Dict[str, Callable[..., LineEditResult]] = {
+    "KEY_ENTER": MultiLineEditor._newline,
+    "KEY_ALT_ENTER": MultiLineEditor._handle_accept,
+    "KEY_CTRL_C": MultiLineEditor._handle_ctrl_c,
+    "KEY_CTRL_D": MultiLineEditor._handle_ctrl_d,
+    "KEY_LEFT": MultiLineEditor._move_left,
+    "KEY_RIGHT": MultiLineEditor._move_right,
+    "KEY_UP": MultiLineEditor._move_up,
+    "KEY_DOWN": MultiLineEditor._move_down,
+    "KEY_HOME": MultiLineEditor._move_home,
+    "KEY_END": MultiLineEditor._move_end,
+    "KEY_PGUP": MultiLineEditor._page_up,
+    "KEY_PGDOWN": MultiLineEditor._page_down,
+    "KEY_CTRL_HOME": MultiLineEditor._move_doc_start,
+    "KEY_CTRL_END": MultiLineEditor._move_doc_end,
+    "KEY_CTRL_A": MultiLineEditor._move_home,
+    "KEY_CTRL_B": MultiLineEditor._move_left,
+    "KEY_CTRL_E": MultiLineEditor._move_end,
+    "KEY_CTRL_F": MultiLineEditor._move_right,
+    "KEY_CTRL_N": MultiLineEditor._move_down,
+    "KEY_CTRL_P": MultiLineEditor._move_up,
+    "KEY_SLEFT": MultiLineEditor._move_word_left,
+    "KEY_SRIGHT": MultiLineEditor._move_word_right,
+    "KEY_CTRL_LEFT": MultiLineEditor._move_word_left,
+    "KEY_CTRL_RIGHT": MultiLineEditor._move_word_right,
+    "KEY_BACKSPACE": MultiLineEditor._backspace,
+    "KEY_DELETE": MultiLineEditor._delete_at_cursor,
+    "KEY_CTRL_K": MultiLineEditor._kill_to_end,
+    "KEY_CTRL_U": MultiLineEditor._kill_line,
+    "KEY_CTRL_W": MultiLineEditor._kill_word_back,
+    "KEY_CTRL_Y": MultiLineEditor._yank,
+    "KEY_CTRL_Z": MultiLineEditor._undo,
+    "KEY_CTRL_SHIFT_Z": MultiLineEditor._redo,
 }
 # pylint: enable=protected-access
@@ -0,0 +1,230 @@
+"""
+Sub-module providing buffering and non-blocking writing of terminal output.
+
+:meth:`~.Terminal.frame` replaces :attr:`~.Terminal.stream` by a :class:`_FrameBuffer` for the
+duration of a frame, collecting every write, by the application or by the terminal itself, such
+as :meth:`~.Terminal.hidden_cursor`, into one write and flush of the original stream.
+
+:class:`FrameWriter` writes frames to a file descriptor without blocking, so that a slow client,
+such as over a congested network, does not stall the application.  Frames not yet begun are
+replaced by newer ones, so that output converges on the latest frame rather than queueing.
+"""
+# std imports
+import os
+import time
+import select
+import asyncio
+from types import TracebackType
+from typing import IO, Any, List, Type, Optional
+
+try:
+    # std imports
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+#: Default number of bytes pending of :class:`FrameWriter` beyond which it is
+#: :attr:`~FrameWriter.backlogged`.
+DEFAULT_MAX_PENDING = 1 << 16
+
+
+class _FrameBuffer:
+    """Output stream collecting writes until :meth:`drain`, where flushes are deferred."""
+
+    def __init__(self, stream: IO[str]) -> None:
+        self.stream = stream
+        self._parts: List[str] = []
+
+    def write(self, text: str) -> int:
+        """Collect *text*, return its length."""
+        self._parts.append(text)
+        return len(text)
+
+    def flush(self) -> None:
+        """Do nothing, output is flushed by :meth:`drain` at the end of the frame."""
+
+    def getvalue(self) -> str:
+        """Return all collected output, and clear it."""
+        text = ''.join(self._parts)
+        self._parts.clear()
+        return text
+
+    def drain(self) -> None:
+        """Write all collected output to the original stream by one write, and flush it."""
+        if self._parts:
+            self.stream.write(self.getvalue())
+        self.stream.flush()
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.stream, attr)
+
+
+class FrameWriter:  # pylint: disable=too-many-instance-attributes
+    """
+    Non-blocking writer of frames to a terminal, with backpressure.
+
+    A frame is written as far as the terminal accepts without blocking, and the remainder by later
+    calls to :meth:`flush`, :meth:`wait`, or :meth:`drain`.  A frame once begun is always written
+    whole, but frames submitted with ``replace=True`` while others wait discard them, so that a
+    renderer of complete frames converges on the latest one.  A renderer may also skip drawing
+    while :attr:`backlogged`::
+
+        with FrameWriter(term.stream.fileno()) as writer:
+            while True:
+                if not writer.backlogged:
+                    with term.frame(writer=writer, replace=True):
+                        draw(term)
+                writer.wait(timeout=1 / 30)
+
+    A terminal is written by a file descriptor of its own, opened with ``O_NONBLOCK``, so that
+    other users of the terminal, such as :meth:`~.Terminal.inkey`, are not affected.  Other file
+    descriptors, such as pipes, are set ``O_NONBLOCK`` until :meth:`close`.  Where :mod:`fcntl`
+    is not available, such as Windows, writes block.
+
+    Other output to the same terminal, written by its blocking stream, would split a frame
+    written in part, and should first await it by ``wait(current=True)``, as
+    :meth:`~.Terminal.frame` does.  Queries within a frame, such as
+    :meth:`~.Terminal.get_location`, are written by the writer, after all frames before them.
+
+    :arg int fd: File descriptor written, such as ``term.stream.fileno()``.
+    :arg int max_pending: Number of bytes pending beyond which the writer is :attr:`backlogged`.
+    :arg str encoding: Encoding of frames.
+    """
+
+    def __init__(self, fd: int, max_pending: int = DEFAULT_MAX_PENDING,
+                 encoding: str = 'utf-8') -> None:
+        """Open a non-blocking file descriptor of terminal *fd*, or set *fd* non-blocking."""
+        self.max_pending = max_pending
+        self.encoding = encoding
+        #: Number of frames discarded by frames submitted with ``replace=True``.
+        self.dropped = 0
+        self._fd = fd
+        self._owned = False
+        self._flags: Optional[int] = None
+        if fcntl is not None:
+            if os.isatty(fd):
+                self._fd = os.open(os.ttyname(fd), os.O_WRONLY | os.O_NONBLOCK | os.O_NOCTTY)
+                self._owned = True
+            else:
+                self._flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+                fcntl.fcntl(fd, fcntl.F_SETFL, self._flags | os.O_NONBLOCK)
+        self._current = memoryview(b'')
+        self._waiting: List[bytes] = []
+        self._waiting_size = 0
+
+    def fileno(self) -> int:
+        """Return the file descriptor written, for use with :func:`select.select`."""
+        return self._fd
+
+    @property
+    def pending(self) -> int:
+        """Number of bytes submitted and not yet written."""
+        return len(self._current) + self._waiting_size
+
+    @property
+    def backlogged(self) -> bool:
+        """Whether more than :attr:`max_pending` bytes are not yet written."""
+        return self.pending > self.max_pending
+
+    def submit(self, frame: str, replace: bool = False) -> bool:
+        """
+        Submit *frame* for writing, and write as much as possible without blocking.
+
+        :arg str frame: Output of one frame.
+        :arg bool replace: Whether *frame* is complete, discarding any frames not yet begun,
+            otherwise it is written after them.
+        :rtype: bool
+        :returns: Whether all output is written.
+        """
+        if replace and self._waiting:
+            self.dropped += len(self._waiting)
+            self._waiting.clear()
+            self._waiting_size = 0
+        data = frame.encode(self.encoding)
+        if data:
+            self._waiting.append(data)
+            self._waiting_size += len(data)
+        return self.flush()
+
+    def flush(self) -> bool:
+        """
+        Write as much pending output as possible without blocking.
+
+        :rtype: bool
+        :returns: Whether all output is written.
+        """
+        while self._write_current():
+            if not self._waiting:
+                return True
+            self._current = memoryview(b''.join(self._waiting))
+            self._waiting.clear()
+            self._waiting_size = 0
+        return False
+
+    def _write_current(self) -> bool:
+        """Write as much of the frame begun as possible without blocking, return whether whole."""
+        while self._current:
+            try:
+                written = os.write(self._fd, self._current)
+            except BlockingIOError:
+                return False
+            self._current = self._current[written:]
+        return True
+
+    def wait(self, timeout: Optional[float] = None, current: bool = False) -> bool:
+        """
+        Block until all output is written, or *timeout* elapses.
+
+        :arg float timeout: Seconds to wait, or ``None`` to wait indefinitely.
+        :arg bool current: Whether to wait only for the frame begun, if any, to be written whole,
+            without beginning those waiting.
+        :rtype: bool
+        :returns: Whether all output, or the frame begun, is written.
+        """
+        write = self._write_current if current else self.flush
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not write():
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            select.select([], [self._fd], [], remaining)
+        return True
+
+    async def drain(self) -> bool:
+        """
+        Write all pending output, yielding to the :mod:`asyncio` event loop while it blocks.
+
+        :rtype: bool
+        :returns: ``True``, once all output is written.
+        """
+        loop = asyncio.get_running_loop()
+        while not self.flush():
+            writable: asyncio.Future[None] = loop.create_future()
+
+            def _on_writable(future: 'asyncio.Future[None]' = writable) -> None:
+                if not future.done():
+                    future.set_result(None)
+
+            loop.add_writer(self._fd, _on_writable)
+            try:
+                await writable
+            finally:
+                loop.remove_writer(self._fd)
+        return True
+
+    def close(self) -> None:
+        """Close the file descriptor opened for a terminal, or restore the flags of another."""
+        if self._owned:
+            os.close(self._fd)
+            self._owned = False
+        elif self._flags is not None:
+            fcntl.fcntl(self._fd, fcntl.F_SETFL, self._flags)
+            self._flags = None
+
+    def __enter__(self) -> 'FrameWriter':
+        return self
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]],
+                 exc_value: Optional[BaseException],
+                 traceback: Optional[TracebackType]) -> None:
+        self.close()
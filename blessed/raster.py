@@ -0,0 +1,256 @@
+"""
+Sub-module providing rendering of RGB pixels as colored block, sextant, or braille characters.
+
+Each character cell displays several pixels by a glyph of two colors, foreground and background,
+
+- ``'halfblock'``: 1x2 pixels per cell, the upper half block ``▀`` of the upper pixel color
+  over the lower pixel color, exact to the pixel.
+- ``'sextant'``: 2x3 pixels per cell, by block sextants of Unicode 13.
+- ``'braille'``: 2x4 pixels per cell, by braille patterns.
+
+For sextant and braille, the pixels of each cell brighter than its mean are drawn by the
+foreground color, their average, and the remaining pixels by the background color.
+
+Per-cell colors and glyphs are computed for the whole image at once, for sextant and braille
+with NumPy_ when installed, and color sequences are written only where they change.
+
+.. _NumPy: https://numpy.org/
+"""
+# std imports
+import sys
+import array
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple, Union, Callable, Optional, Sequence
+
+try:
+    # 3rd party
+    import numpy
+except ImportError:
+    numpy = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:  # pragma: no cover
+    # local
+    from .terminal import Terminal
+
+#: Pixels per cell, ``(width, height)``, of each mode of :func:`render_raster`.
+RASTER_MODES = {'halfblock': (1, 2), 'sextant': (2, 3), 'braille': (2, 4)}
+
+# Glyph of each bit mask, bit i set when pixel i of the cell, in row-major order, is
+# foreground.  Sextants 0b010101 and 0b101010 are the left and right half blocks, and are not
+# repeated in the sextant block of U+1FB00.
+_SEXTANTS = [' '] + [
+    '▌' if mask == 21 else '▐' if mask == 42 else '█' if mask == 63
+    else chr(0x1FB00 + mask - 1 - (mask > 21) - (mask > 42)) for mask in range(1, 64)]
+
+# braille dots are numbered by column, 1-2-3-7 on the left and 4-5-6-8 on the right
+_BRAILLE_DOTS = (0x01, 0x08, 0x02, 0x10, 0x04, 0x20, 0x40, 0x80)
+_BRAILLE = [chr(0x2800 + sum(dot for bit, dot in enumerate(_BRAILLE_DOTS) if mask & (1 << bit)))
+            for mask in range(256)]
+
+_GLYPHS = {'halfblock': [' ', '▀'], 'sextant': _SEXTANTS, 'braille': _BRAILLE}
+
+# luminance weights, approximately those of Rec. 601, scaled to integers
+_LUMA = (2, 5, 1)
+
+
+def _split_cell(cell: Sequence[Tuple[int, int, int]]) -> Tuple[int, Optional[int], int]:
+    """
+    Return bit mask, foreground, and background color of a cell of pixels.
+
+    Pixels brighter than the mean are foreground, the remaining are background, each drawn by
+    their average color.  When all pixels are equally bright, the mask is 0 and the foreground
+    ``None``.
+    """
+    lums = [red * 2 + green * 5 + blue for red, green, blue in cell]
+    total = sum(lums)
+    count = len(cell)
+    mask = 0
+    fg_sum = [0, 0, 0]
+    bg_sum = [0, 0, 0]
+    for bit, (lum, pixel) in enumerate(zip(lums, cell)):
+        acc = bg_sum
+        if lum * count > total:
+            mask |= 1 << bit
+            acc = fg_sum
+        acc[0] += pixel[0]
+        acc[1] += pixel[1]
+        acc[2] += pixel[2]
+    if not mask:
+        return 0, None, _pack(bg_sum, count)
+    fg_count = bin(mask).count('1')
+    return mask, _pack(fg_sum, fg_count), _pack(bg_sum, count - fg_count)
+
+
+def _pack(rgb_sum: List[int], count: int) -> int:
+    return (rgb_sum[0] // count) << 16 | (rgb_sum[1] // count) << 8 | rgb_sum[2] // count
+
+
+def _packed_row(line: bytes) -> List[int]:
+    # 0xRRGGBB of each pixel, by copying into zero-padded 32-bit big-endian words
+    words = bytearray(len(line) // 3 * 4)
+    words[1::4], words[2::4], words[3::4] = line[0::3], line[1::3], line[2::3]
+    packed = array.array('I', bytes(words))
+    if sys.byteorder == 'little':
+        packed.byteswap()
+    return packed.tolist()
+
+
+def _cells_python(pixels: bytes, width: int, height: int,
+                  mode: str) -> List[List[Tuple[int, Optional[int], int]]]:
+    cell_width, cell_height = RASTER_MODES[mode]
+    columns = -(-width // cell_width)
+    padding = columns * cell_width - width
+    lines = [pixels[y * width * 3:(y + 1) * width * 3] + bytes(padding * 3)
+             for y in range(height)]
+    lines.extend(bytes(columns * cell_width * 3) for _ in range(-height % cell_height))
+
+    result = []
+    for top in range(0, len(lines), cell_height):
+        band = lines[top:top + cell_height]
+        if mode == 'halfblock':
+            # exact colors of both pixels, no glyph is needed when they are the same
+            result.append([(0, None, upper) if upper == lower else (1, upper, lower)
+                           for upper, lower in zip(*map(_packed_row, band))])
+        else:
+            rows = [list(zip(line[0::3], line[1::3], line[2::3])) for line in band]
+            result.append([_split_cell([pixel for row in rows
+                                        for pixel in row[left:left + cell_width]])
+                           for left in range(0, columns * cell_width, cell_width)])
+    return result
+
+
+def _numpy_cells(pixels: Any, width: int, height: int, mode: str) -> Any:
+    # array of shape (rows, columns, pixels per cell, 3), the pixels of each cell in row-major
+    # order, padded by black pixels
+    cell_width, cell_height = RASTER_MODES[mode]
+    columns, rows = -(-width // cell_width), -(-height // cell_height)
+    image = numpy.zeros((rows * cell_height, columns * cell_width, 3), dtype=numpy.int32)
+    image[:height, :width] = pixels.reshape((height, width, 3))
+    return image.reshape((rows, cell_height, columns, cell_width, 3)).transpose(
+        (0, 2, 1, 3, 4)).reshape((rows, columns, cell_width * cell_height, 3))
+
+
+def _numpy_packed(colors: Any) -> List[List[int]]:
+    packed: List[List[int]] = (colors[..., 0] << 16 | colors[..., 1] << 8
+                               | colors[..., 2]).tolist()
+    return packed
+
+
+def _cells_numpy(pixels: Any, width: int, height: int,
+                 mode: str) -> List[List[Tuple[int, Optional[int], int]]]:
+    cells = _numpy_cells(pixels, width, height, mode)
+    count = cells.shape[2]
+
+    lums = cells @ numpy.array(_LUMA, dtype=numpy.int32)
+    fg_mask = lums * count > lums.sum(axis=-1, keepdims=True)
+    fg_count = fg_mask.sum(axis=-1)
+    fg = (cells * fg_mask[..., None]).sum(axis=-2) // numpy.maximum(fg_count, 1)[..., None]
+    bg = (cells * ~fg_mask[..., None]).sum(axis=-2) // (count - fg_count)[..., None]
+    masks = (fg_mask * (1 << numpy.arange(count))).sum(axis=-1)
+
+    return [[(mask, fg_color if mask else None, bg_color)
+             for mask, fg_color, bg_color in zip(mask_row, fg_row, bg_row)]
+            for mask_row, fg_row, bg_row in zip(
+                masks.tolist(), _numpy_packed(fg), _numpy_packed(bg))]
+
+
+def _truecolor_sgr(fg_color: Optional[int], bg_color: Optional[int]) -> str:
+    if fg_color is None:
+        assert bg_color is not None
+        return f'\x1b[48;2;{bg_color >> 16};{bg_color >> 8 & 255};{bg_color & 255}m'
+    if bg_color is None:
+        return f'\x1b[38;2;{fg_color >> 16};{fg_color >> 8 & 255};{fg_color & 255}m'
+    return (f'\x1b[38;2;{fg_color >> 16};{fg_color >> 8 & 255};{fg_color & 255};'
+            f'48;2;{bg_color >> 16};{bg_color >> 8 & 255};{bg_color & 255}m')
+
+
+def _joined_sgr(fg_seq: Optional[str], bg_seq: Optional[str]) -> str:
+    return (fg_seq or '') + (bg_seq or '')
+
+
+def _downconvert_rows(term: 'Terminal', rows: List[List[Tuple[int, Optional[int], int]]]
+                      ) -> List[List[Tuple[int, Optional[str], str]]]:
+    # replace colors by the sequences of the nearest color supported, so that colors mapping
+    # to the same sequence are not repeated
+    fg_cache: Dict[int, str] = {}
+    bg_cache: Dict[int, str] = {}
+
+    def fg_sequence(color: int) -> str:
+        if color not in fg_cache:
+            fg_cache[color] = str(term.color_rgb(color >> 16, color >> 8 & 255, color & 255))
+        return fg_cache[color]
+
+    def bg_sequence(color: int) -> str:
+        if color not in bg_cache:
+            bg_cache[color] = str(term.on_color_rgb(color >> 16, color >> 8 & 255, color & 255))
+        return bg_cache[color]
+
+    return [[(mask, None if fg_color is None else fg_sequence(fg_color), bg_sequence(bg_color))
+             for mask, fg_color, bg_color in row] for row in rows]
+
+
+def _render_lines(rows: Sequence[Sequence[Tuple[int, Any, Any]]],
+                  sgr: Callable[[Any, Any], str], glyphs: Sequence[str],
+                  normal: str) -> List[str]:
+    lines = []
+    for row in rows:
+        out = []
+        last_fg = last_bg = None
+        for mask, fg_color, bg_color in row:
+            fg_changed = fg_color is not None and fg_color != last_fg
+            bg_changed = bg_color != last_bg
+            if fg_changed or bg_changed:
+                out.append(sgr(fg_color if fg_changed else None,
+                               bg_color if bg_changed else None))
+                if fg_changed:
+                    last_fg = fg_color
+                last_bg = bg_color
+            out.append(glyphs[mask])
+        out.append(normal)
+        lines.append(''.join(out))
+    return lines
+
+
+def render_raster(term: 'Terminal', pixels: Union[bytes, bytearray, memoryview, Any],
+                  width: int, height: int, mode: str = 'halfblock') -> List[str]:
+    """
+    Render RGB pixels as lines of colored characters.
+
+    Images not a multiple of the cell size of *mode* are padded with black pixels.  Colors are
+    those of :meth:`~.Terminal.color_rgb` and :meth:`~.Terminal.on_color_rgb`, and a sequence
+    is written only where the foreground or background color changes, as a single SGR
+    sequence for truecolor terminals.  Each line ends by :attr:`~.Terminal.normal`.
+
+    :arg Terminal term: Terminal whose color depth is used.
+    :arg pixels: Row-major, 8-bit RGB pixel data of ``width * height * 3`` bytes, or a NumPy
+        array of shape ``(height, width, 3)``.
+    :arg int width: Image width in pixels.
+    :arg int height: Image height in pixels.
+    :arg str mode: One of :data:`RASTER_MODES`, ``'halfblock'``, ``'sextant'``, or
+        ``'braille'``.
+    :raises ValueError: Unknown *mode*, or *pixels* is not ``width * height * 3`` bytes.
+    :rtype: list
+    :returns: One string for each row of cells, ``ceil(height / cell height)`` in all.
+    """
+    if mode not in RASTER_MODES:
+        raise ValueError(f'mode must be one of {tuple(RASTER_MODES)}, got {mode!r}')
+    if numpy is not None and isinstance(pixels, numpy.ndarray):
+        size = pixels.size
+    else:
+        pixels = bytes(pixels)
+        size = len(pixels)
+    if size != width * height * 3:
+        raise ValueError(f'expected {width * height * 3} bytes of RGB pixels for '
+                         f'{width}x{height}, got {size}')
+    if numpy is None or mode == 'halfblock':
+        # halfblock colors are those of the pixels, which are packed as fast without numpy
+        if not isinstance(pixels, bytes):
+            pixels = pixels.astype(numpy.uint8).tobytes()
+        rows = _cells_python(pixels, width, height, mode)
+    else:
+        rows = _cells_numpy(numpy.frombuffer(pixels, dtype=numpy.uint8)
+                            if isinstance(pixels, bytes) else pixels, width, height, mode)
+
+    if term.number_of_colors == 1 << 24:
+        return _render_lines(rows, _truecolor_sgr, _GLYPHS[mode], str(term.normal))
+    return _render_lines(_downconvert_rows(term, rows), _joined_sgr, _GLYPHS[mode],
+                         str(term.normal))
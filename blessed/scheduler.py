@@ -0,0 +1,342 @@
+"""
+Sub-module providing a render loop of keyboard input, timers, and resize events.
+
+:class:`Scheduler` waits for keyboard input, the next timer, the next frame, and window resize
+(``SIGWINCH``) by one :func:`select.select` call, or in :mod:`asyncio` by one event.  Any
+number of invalidations, such as by a burst of keystrokes, are coalesced into one redraw, and
+redraws are paced to no more than the target frames per second.  :meth:`.Terminal.run` and
+:meth:`.Terminal.async_run` are the most convenient way to use it.
+"""
+# std imports
+import os
+import time
+import heapq
+import select
+import signal
+import asyncio
+import platform
+import contextlib
+from typing import TYPE_CHECKING, Any, List, Callable, Optional, Generator
+
+if TYPE_CHECKING:  # pragma: no cover
+    # local
+    from .keyboard import Keystroke
+    from .terminal import Terminal
+
+# select() of file descriptors other than sockets is not supported on Windows
+_SELECT_FDS = platform.system() != 'Windows'
+
+# interval of polling for input where the event loop cannot watch file descriptors
+_POLL_INTERVAL = 0.01
+
+
+@contextlib.contextmanager
+def _chained_sigwinch(callback: Callable[[], Any]) -> Generator[bool, None, None]:
+    """
+    Context manager calling *callback* by ``SIGWINCH``, followed by any handler it replaces.
+
+    The handler replaced is restored on exit.  Yields whether the handler is set, which it is
+    not where ``SIGWINCH`` is not available, such as Windows, or when not called by the main
+    thread, where signal handlers cannot be set.
+    """
+    if not hasattr(signal, 'SIGWINCH'):
+        yield False
+        return
+    prev_handler = signal.getsignal(signal.SIGWINCH)
+
+    def on_winch(signum: int, frame: Any) -> None:
+        callback()
+        if callable(prev_handler):
+            prev_handler(signum, frame)
+
+    try:
+        signal.signal(signal.SIGWINCH, on_winch)
+    except ValueError:
+        # signal handlers may only be set by the main thread
+        yield False
+        return
+    try:
+        yield True
+    finally:
+        # a handler not set from Python is reported as None, and cannot be restored
+        signal.signal(signal.SIGWINCH, prev_handler or signal.SIG_DFL)
+
+
+class Timer:
+    """Callback scheduled by :meth:`Scheduler.call_later`."""
+
+    __slots__ = ('when', 'callback', 'cancelled')
+
+    def __init__(self, when: float, callback: Callable[[], Any]) -> None:
+        """Initialize a timer calling *callback* at *when*."""
+        #: Time of :func:`time.monotonic` the callback is due.
+        self.when = when
+        #: Function called without arguments.
+        self.callback = callback
+        #: Whether :meth:`cancel` was called.
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """Cancel the timer, if it is not yet called."""
+        self.cancelled = True
+
+    def __lt__(self, other: 'Timer') -> bool:
+        return self.when < other.when
+
+
+class Scheduler:  # pylint: disable=too-many-instance-attributes
+    """
+    Render loop of a :class:`~.Terminal`.
+
+    *on_frame* is called to draw the screen within :meth:`~.Terminal.frame`, so that each frame
+    is one write, first when the loop begins and then after each invalidation, no sooner than
+    ``1 / fps`` seconds after the previous frame.  Each :class:`~.Keystroke` received is passed
+    to *on_key*, which invalidates the screen, unless it returns ``False``, stopping the loop.
+    Window resize, by ``SIGWINCH``, invalidates the screen, too.
+
+    Given a *quiet_period*, window resizes, by ``SIGWINCH`` or by ``RESIZE_EVENT`` keystrokes of
+    :meth:`~.Terminal.notify_on_resize`, are handled once no other is received for
+    *quiet_period* seconds, so that dragging the window border redraws once, for its final size.
+    Only the last ``RESIZE_EVENT`` keystroke is passed to *on_key*.
+
+    The loop should be run within :meth:`~.Terminal.cbreak` or :meth:`~.Terminal.raw`.  It ends
+    by :meth:`stop`, or when nothing remains that could wake it: no keyboard, no resize signal,
+    no timers, and no animation.
+
+    The loop is stopped, too, when a read of the keyboard comes back empty, which is end of
+    file, such as of a closed pipe or a terminal hangup, or Ctrl+D outside of
+    :meth:`~.Terminal.cbreak` or :meth:`~.Terminal.raw`.
+    """
+
+    def __init__(self, term: 'Terminal', on_frame: Callable[[], Any],
+                 on_key: Optional[Callable[['Keystroke'], Any]] = None,
+                 *, fps: float = 30.0, animate: bool = False,
+                 quiet_period: Optional[float] = None) -> None:
+        """
+        Initialize a render loop, not yet running.
+
+        :arg Terminal term: Terminal of keyboard input and output.
+        :arg on_frame: Function drawing the screen, called without arguments.
+        :arg on_key: Function called with each :class:`~.Keystroke` received.
+        :arg float fps: Largest number of frames drawn per second.
+        :arg bool animate: Whether to draw frames continuously, at *fps*, rather than only when
+            invalidated.
+        :arg float quiet_period: Seconds without another window resize before one is handled,
+            or ``None`` to handle each at once.
+        :raises ValueError: *fps* is not positive.
+        """
+        if fps <= 0:
+            raise ValueError(f'fps must be positive, got {fps!r}')
+        self.term = term
+        self.on_frame = on_frame
+        self.on_key = on_key
+        self.animate = animate
+        self.quiet_period = quiet_period
+        #: Seconds between frames, ``1 / fps``.
+        self.interval = 1.0 / fps
+        #: Number of frames drawn.
+        self.frames = 0
+        self._timers: List[Timer] = []
+        self._dirty = True
+        self._running = False
+        self._last_frame = -self.interval
+        self._wake_r: Optional[int] = None
+        self._resize_timer: Optional[Timer] = None
+        self._resize_key: Optional['Keystroke'] = None
+
+    def invalidate(self) -> None:
+        """Request a redraw, coalesced with any other before the next frame."""
+        self._dirty = True
+
+    def call_later(self, delay: float, callback: Callable[[], Any]) -> Timer:
+        """
+        Call *callback* after *delay* seconds, within the loop.
+
+        :arg float delay: Seconds from now.
+        :arg callback: Function called without arguments.
+        :rtype: Timer
+        :returns: Timer, which may be cancelled.
+        """
+        timer = Timer(time.monotonic() + delay, callback)
+        heapq.heappush(self._timers, timer)
+        return timer
+
+    def stop(self) -> None:
+        """Stop the loop, after the current callback returns."""
+        self._running = False
+
+    def run(self) -> None:
+        """Run the loop until stopped."""
+        self._running = True
+        keyboard_fd = self.term._keyboard_fd  # pylint: disable=protected-access
+        try:
+            with self._resize_wakeup():
+                while self._run_due():
+                    timeout = self._timeout()
+                    if self.term._keyboard_buf:  # pylint: disable=protected-access
+                        # keystrokes buffered by ungetch()
+                        timeout = 0
+                    fds = [fd for fd in (keyboard_fd, self._wake_r) if fd is not None]
+                    if not _SELECT_FDS:
+                        self.term.kbhit(timeout=timeout)
+                    elif fds or timeout is not None:
+                        select.select(fds, [], [], timeout)
+                    else:
+                        break
+                    self._handle_input()
+        finally:
+            self._running = False
+
+    async def run_async(self) -> None:
+        """Run the loop until stopped, yielding to the :mod:`asyncio` event loop while idle."""
+        loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+        self._running = True
+        watched: List[int] = []
+        try:
+            with self._resize_wakeup():
+                try:
+                    for fd in (self.term._keyboard_fd,  # pylint: disable=protected-access
+                               self._wake_r):
+                        if fd is not None:
+                            loop.add_reader(fd, wake.set)
+                            watched.append(fd)
+                except NotImplementedError:
+                    # such as the ProactorEventLoop of Windows, input is polled instead
+                    pass
+                try:
+                    await self._run_async_loop(wake, watched)
+                finally:
+                    for fd in watched:
+                        loop.remove_reader(fd)
+        finally:
+            self._running = False
+
+    async def _run_async_loop(self, wake: asyncio.Event, watched: List[int]) -> None:
+        """Run the loop of :meth:`run_async`, woken by *wake* of the *watched* descriptors."""
+        keyboard_fd = self.term._keyboard_fd  # pylint: disable=protected-access
+        while self._run_due():
+            timeout = self._timeout()
+            if self.term._keyboard_buf:  # pylint: disable=protected-access
+                timeout = 0
+            if keyboard_fd is not None and not watched:
+                timeout = _POLL_INTERVAL if timeout is None else min(timeout, _POLL_INTERVAL)
+            if not watched and timeout is None:
+                break
+            try:
+                await asyncio.wait_for(wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            wake.clear()
+            self._handle_input()
+
+    def _keyboard_eof(self) -> bool:
+        """Return whether the keyboard is at end of file, reading ahead one byte of it if ready."""
+        term = self.term
+        # pylint: disable=protected-access
+        if term._keyboard_fd is None or term._keyboard_buf or not term.kbhit(timeout=0):
+            return False
+        decoder = term._keyboard_decoder
+        pending = decoder.getstate()[0]
+        text = term.getch()
+        term.ungetch(text)
+        # a read that is empty neither decodes text nor adds a partial character to the decoder
+        return not text and decoder.getstate()[0] == pending
+
+    def _run_due(self) -> bool:
+        """Call timers due, draw a frame when due, and return whether the loop continues."""
+        now = time.monotonic()
+        while self._running and self._timers and self._timers[0].when <= now:
+            timer = heapq.heappop(self._timers)
+            if not timer.cancelled:
+                timer.callback()
+        if (self._running and (self._dirty or self.animate)
+                and now >= self._last_frame + self.interval):
+            self._dirty = False
+            self._last_frame = now
+            with self.term.frame():
+                self.on_frame()
+            self.frames += 1
+        return self._running
+
+    def _timeout(self) -> Optional[float]:
+        """Return seconds until the next timer or frame is due, or ``None`` if neither is."""
+        while self._timers and self._timers[0].cancelled:
+            heapq.heappop(self._timers)
+        due = [self._timers[0].when] if self._timers else []
+        if self._dirty or self.animate:
+            due.append(self._last_frame + self.interval)
+        return max(0.0, min(due) - time.monotonic()) if due else None
+
+    def _handle_input(self) -> None:
+        """Invalidate by any resize signal, and pass each keystroke received to on_key."""
+        if self._wake_r is not None:
+            try:
+                if os.read(self._wake_r, 4096):
+                    self._resized()
+            except BlockingIOError:
+                pass
+        if self._keyboard_eof():
+            # which inkey() would otherwise read again and again
+            self.stop()
+            return
+        while self._running:
+            keystroke = self.term.inkey(timeout=0)
+            if not keystroke:
+                break
+            if self.quiet_period is not None and keystroke.name == 'RESIZE_EVENT':
+                self._resized(keystroke)
+            else:
+                self._handle_key(keystroke)
+
+    def _handle_key(self, keystroke: 'Keystroke') -> None:
+        """Pass *keystroke* to on_key, stopping the loop when it returns False."""
+        if self.on_key is not None and self.on_key(keystroke) is False:
+            self.stop()
+        else:
+            self.invalidate()
+
+    def _resized(self, keystroke: Optional['Keystroke'] = None) -> None:
+        """Handle window resize, after quiet_period without another, if any."""
+        if self.quiet_period is None:
+            self.invalidate()
+            return
+        if keystroke is not None:
+            self._resize_key = keystroke
+        if self._resize_timer is not None:
+            self._resize_timer.cancel()
+        self._resize_timer = self.call_later(self.quiet_period, self._resize_settled)
+
+    def _resize_settled(self) -> None:
+        """Handle the last window resize, once quiet_period elapsed without another."""
+        keystroke, self._resize_key, self._resize_timer = self._resize_key, None, None
+        if keystroke is None:
+            self.invalidate()
+        else:
+            self._handle_key(keystroke)
+
+    @contextlib.contextmanager
+    def _resize_wakeup(self) -> Generator[None, None, None]:
+        """Wake the loop by ``SIGWINCH``, by a pipe written by the signal handler."""
+        if not hasattr(signal, 'SIGWINCH'):
+            yield
+            return
+        wake_r, wake_w = os.pipe()
+        os.set_blocking(wake_r, False)
+        os.set_blocking(wake_w, False)
+
+        def on_winch() -> None:
+            try:
+                os.write(wake_w, b'\x00')
+            except OSError:
+                pass
+
+        try:
+            with _chained_sigwinch(on_winch) as installed:
+                if installed:
+                    self._wake_r = wake_r
+                yield
+        finally:
+            self._wake_r = None
+            os.close(wake_r)
+            os.close(wake_w)
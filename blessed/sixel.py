@@ -0,0 +1,215 @@
+"""
+Sub-module providing sixel image encoding.
+
+:func:`encode_sixel` converts a buffer of 8-bit RGB pixels into a sixel escape sequence, yielding
+it in chunks so that large images may be streamed to the terminal as they are encoded.
+
+Pixels are quantized to a uniform color cube sized to the number of color registers reported by
+:meth:`~.Terminal.get_sixel_colors`.  When NumPy_ is installed, quantization and band building
+are done with array operations; otherwise whole rows are processed at once with
+:meth:`bytes.translate` and integer arithmetic, avoiding any per-pixel Python loop.
+
+.. _NumPy: https://numpy.org/
+"""
+# std imports
+import re
+from typing import Any, List, Tuple, Union, Iterator
+
+try:
+    # 3rd party
+    import numpy
+except ImportError:
+    numpy = None  # type: ignore[assignment]
+
+#: Largest number of color registers used, one palette index must fit in a byte.
+MAX_SIXEL_COLORS = 256
+
+#: Sixel bitmap characters range from ``?`` (no pixels set) to ``~`` (all six set).
+_SIXEL_OFFSET = 0x3F
+
+# a run of four or more identical sixels is shorter as a repeat introducer, '!<count><sixel>'.
+# Runs of empty sixels are by far the most common, and matching them without a backreference
+# is several times faster.
+_RE_SIXEL_RUN = re.compile(rb'\?{4,}|([@-~])\1{3,}')
+
+
+def palette_levels(colors: int) -> Tuple[int, int, int]:
+    """
+    Return the red, green, and blue levels of the largest color cube fitting *colors*.
+
+    Green, to which the eye is most sensitive, receives any spare level first, so that
+    256 registers yields a 6x7x6 cube of 252 colors.  Fewer than 8 registers cannot fit two
+    levels of every channel, and blue, then red, is left at a single level of 0.
+
+    :arg int colors: Number of available color registers, clamped to range 1 through 256.
+    :rtype: tuple
+    :returns: Tuple of ``(red, green, blue)`` level counts, each at least 1.
+    """
+    colors = max(1, min(MAX_SIXEL_COLORS, colors))
+    level = round(colors ** (1 / 3))
+    while level ** 3 > colors:
+        level -= 1
+    red = green = blue = level
+    if red * (green + 1) * blue <= colors:
+        green += 1
+    if (red + 1) * green * blue <= colors:
+        red += 1
+    return red, green, blue
+
+
+def sixel_palette(levels: Tuple[int, int, int]) -> List[Tuple[int, int, int]]:
+    """
+    Return the RGB value of each palette index of the color cube of *levels*.
+
+    :arg tuple levels: Tuple of ``(red, green, blue)`` level counts, as returned by
+        :func:`palette_levels`.
+    :rtype: list
+    :returns: List of ``(red, green, blue)`` tuples, in palette index order.
+    """
+    red, green, blue = levels
+    return [(_level_value(r_lvl, red), _level_value(g_lvl, green), _level_value(b_lvl, blue))
+            for r_lvl in range(red) for g_lvl in range(green) for b_lvl in range(blue)]
+
+
+def _level_value(level: int, levels: int) -> int:
+    if levels == 1:
+        return 0
+    return (level * 255 + (levels - 1) // 2) // (levels - 1)
+
+
+def _channel_table(levels: int, multiplier: int) -> bytes:
+    # maps an 8-bit channel value to its nearest level, pre-multiplied to its place in the index
+    return bytes(((value * (levels - 1) + 127) // 255) * multiplier for value in range(256))
+
+
+def _rle(sixels: bytes) -> bytes:
+    return _RE_SIXEL_RUN.sub(
+        lambda match: b'!%d%c' % (len(match.group(0)), match.group(0)[0]), sixels)
+
+
+def _quantize_bytes(pixels: bytes, levels: Tuple[int, int, int]) -> bytes:
+    """
+    Return one palette index byte per pixel of RGB *pixels*.
+
+    Each channel is mapped to its share of the index with :meth:`bytes.translate`, and the three
+    shares are summed as big integers: no index exceeds 255, so no byte carries into another.
+    """
+    red, green, blue = levels
+    count = len(pixels) // 3
+    total = (int.from_bytes(pixels[0::3].translate(_channel_table(red, green * blue)), 'big')
+             + int.from_bytes(pixels[1::3].translate(_channel_table(green, blue)), 'big')
+             + int.from_bytes(pixels[2::3].translate(_channel_table(blue, 1)), 'big'))
+    return total.to_bytes(count, 'big')
+
+
+def _iter_bands_bytes(indices: bytes, width: int, height: int) -> Iterator[bytes]:
+    """
+    Yield each six-row band of palette *indices* as sixel data, without band separators.
+
+    For every color in a band, each row is translated to a mask of 0 or 1 per pixel, weighted by
+    its bit in the sixel, and the rows are summed as big integers, which again cannot carry.
+    """
+    masks = {}
+    blank = int.from_bytes(bytes([_SIXEL_OFFSET]) * width, 'big')
+    for top in range(0, height, 6):
+        rows = [indices[row * width:(row + 1) * width] for row in range(top, min(top + 6, height))]
+        colors = []
+        for color in sorted(set(b''.join(rows))):
+            if color not in masks:
+                masks[color] = bytes(int(value == color) for value in range(256))
+            total = blank
+            for bit, row in enumerate(rows):
+                total += int.from_bytes(row.translate(masks[color]), 'big') * (1 << bit)
+            colors.append(b'#%d%s' % (color, _rle(total.to_bytes(width, 'big').rstrip(b'?'))))
+        yield b'$'.join(colors)
+
+
+def _iter_bands_numpy(indices: Any) -> Iterator[bytes]:
+    """
+    Yield each six-row band of a 2-dimensional NumPy array of palette *indices* as sixel data.
+
+    The sixels of all colors present in a band are computed at once with :func:`numpy.bincount`,
+    weighting each pixel by its bit in the sixel of its color and column.
+    """
+    height, width = indices.shape
+    weights = numpy.repeat(1 << numpy.arange(6), width)
+    columns = numpy.tile(numpy.arange(width), 6)
+    for top in range(0, height, 6):
+        band = indices[top:top + 6]
+        present, inverse = numpy.unique(band, return_inverse=True)
+        cells = inverse.reshape(-1) * width + columns[:band.size]
+        bits = numpy.bincount(cells, weights=weights[:band.size], minlength=len(present) * width)
+        sixels = (bits.reshape(len(present), width) + _SIXEL_OFFSET).astype(numpy.uint8)
+        yield b'$'.join(b'#%d%s' % (color, _rle(row.tobytes().rstrip(b'?')))
+                        for color, row in zip(present.tolist(), sixels))
+
+
+def _quantize_numpy(pixels: Any, width: int, height: int, levels: Tuple[int, int, int]) -> Any:
+    """Return a 2-dimensional NumPy array of the palette index of each pixel of RGB *pixels*."""
+    pixels = numpy.frombuffer(pixels, dtype=numpy.uint8) if not isinstance(
+        pixels, numpy.ndarray) else numpy.ascontiguousarray(pixels, dtype=numpy.uint8)
+    if pixels.size != width * height * 3:
+        raise ValueError(f'expected {width * height * 3} bytes of RGB pixels for '
+                         f'{width}x{height}, got {pixels.size}')
+    channels = pixels.reshape(height, width, 3)
+    red, green, blue = (numpy.frombuffer(_channel_table(levels[0], levels[1] * levels[2]),
+                                         dtype=numpy.uint8),
+                        numpy.frombuffer(_channel_table(levels[1], levels[2]),
+                                         dtype=numpy.uint8),
+                        numpy.frombuffer(_channel_table(levels[2], 1), dtype=numpy.uint8))
+    return red[channels[..., 0]] + green[channels[..., 1]] + blue[channels[..., 2]]
+
+
+def encode_sixel(pixels: Union[bytes, bytearray, memoryview, Any], width: int, height: int,
+                 colors: int = MAX_SIXEL_COLORS, chunk_size: int = 65536) -> Iterator[str]:
+    """
+    Encode RGB *pixels* as a sixel image, yielding chunks of its escape sequence.
+
+    The image is quantized to a uniform color cube of no more than *colors* registers, and
+    only those colors in use are defined.  Each band of six pixel rows is run-length encoded,
+    and bands are collected into chunks of roughly *chunk_size* characters, so that writing may
+    begin before the whole image is encoded.
+
+    :arg pixels: Row-major, 8-bit RGB pixel data of ``width * height * 3`` bytes, such as
+        :meth:`PIL.Image.Image.tobytes` of an ``'RGB'`` image, or a NumPy array of shape
+        ``(height, width, 3)``.
+    :arg int width: Image width in pixels.
+    :arg int height: Image height in pixels.
+    :arg int colors: Number of color registers available, as returned by
+        :meth:`~.Terminal.get_sixel_colors`.
+    :arg int chunk_size: Approximate number of characters yielded at a time.
+    :raises ValueError: *pixels* is not ``width * height * 3`` bytes.
+    :rtype: Iterator[str]
+    :returns: Iterator of strings which, concatenated, form the complete sixel sequence.
+    """
+    levels = palette_levels(colors)
+    if numpy is not None:
+        indices = _quantize_numpy(pixels, width, height, levels)
+        used = numpy.unique(indices).tolist()
+        bands = _iter_bands_numpy(indices)
+    else:
+        pixels = bytes(pixels)
+        if len(pixels) != width * height * 3:
+            raise ValueError(f'expected {width * height * 3} bytes of RGB pixels for '
+                             f'{width}x{height}, got {len(pixels)}')
+        indices = _quantize_bytes(pixels, levels)
+        used = sorted(set(indices))
+        bands = _iter_bands_bytes(indices, width, height)
+
+    palette = sixel_palette(levels)
+    # P2=1: pixels of unset bits remain transparent, raster attributes give 1:1 aspect ratio
+    chunk = [f'\x1bP0;1;0q"1;1;{width};{height}']
+    chunk.extend(f'#{index};2;' + ';'.join(str(round(value * 100 / 255))
+                                           for value in palette[index])
+                 for index in used)
+    length = sum(map(len, chunk))
+    for number, band in enumerate(bands):
+        # '-' moves to the next band, it is not written after the last so that the cursor
+        # does not advance beyond the image
+        chunk.append(('-' if number else '') + band.decode('ascii'))
+        length += len(band) + 1
+        if length >= chunk_size:
+            yield ''.join(chunk)
+            chunk, length = [], 0
+    chunk.append('\x1b\\')
+    yield ''.join(chunk)
@@ -0,0 +1,147 @@
+"""
+Sub-module providing opt-in counters of terminal input, output, and queries.
+
+Assign a :class:`TerminalStats` to :attr:`.Terminal.stats` to begin counting::
+
+    >>> from blessed.stats import TerminalStats
+    >>> term.stats = TerminalStats()
+    >>> term.get_location(timeout=1)
+    >>> print(term.stats.summary())
+
+Counting is done only while :attr:`~.Terminal.stats` is set, so that a laggy session, such as
+one of repeated one-second query timeouts, may be diagnosed without attaching a profiler, and
+at no cost otherwise.
+"""
+# std imports
+from typing import IO, Any, Dict
+from dataclasses import field, dataclass
+
+
+@dataclass
+class FeatureStats:
+    """Counters of the queries of one feature, such as :meth:`~.Terminal.get_location`."""
+
+    #: Number of queries written to the terminal.
+    queries: int = 0
+    #: Number of queries not answered within their timeout.
+    timeouts: int = 0
+    #: Total seconds spent awaiting responses, including timeouts.
+    seconds: float = 0.0
+    #: Number of calls answered from cache, without writing a query.
+    cache_hits: int = 0
+
+
+@dataclass
+class TerminalStats:  # pylint: disable=too-many-instance-attributes
+    """
+    Counters and timings of a :class:`~.Terminal`, collected while set as its ``stats``.
+
+    Input counters are those of :meth:`~.Terminal.inkey`, :meth:`~.Terminal.kbhit`, and
+    :meth:`~.Terminal.getch`, where each call to ``kbhit`` and ``getch`` issues one system call.
+    :meth:`~.Terminal.async_inkey` is counted the same, each wait of the event loop for keyboard
+    input as one ``kbhit`` call, and each byte read as one ``getch`` call.
+    Output counters are those of writes to :attr:`~.Terminal.stream`, by the application or by
+    the terminal itself.
+    """
+
+    #: Number of calls to :meth:`~.Terminal.inkey` and :meth:`~.Terminal.async_inkey`.
+    inkey_calls: int = 0
+    #: Total seconds spent in :meth:`~.Terminal.inkey` and :meth:`~.Terminal.async_inkey`,
+    #: including time awaiting input.
+    inkey_seconds: float = 0.0
+    #: Number of calls to :meth:`~.Terminal.kbhit`, each a :func:`select.select` call.
+    kbhit_calls: int = 0
+    #: Number of calls to :meth:`~.Terminal.getch`, each a :func:`os.read` call.
+    getch_calls: int = 0
+    #: Number of bytes read from the keyboard.
+    bytes_read: int = 0
+    #: Number of times a bare escape awaited ``esc_delay`` for the remainder of a sequence.
+    escape_delay_waits: int = 0
+    #: Total seconds spent awaiting ``esc_delay``.
+    escape_delay_seconds: float = 0.0
+    #: Number of writes to :attr:`~.Terminal.stream`.
+    write_calls: int = 0
+    #: Number of flushes of :attr:`~.Terminal.stream`.
+    flush_calls: int = 0
+    #: Number of bytes written to :attr:`~.Terminal.stream`, as encoded by its encoding.
+    bytes_written: int = 0
+    #: Number of capabilities and compound formatters resolved by attribute, such as
+    #: ``term.bold_red``.  Each is resolved once, and later accesses are ordinary attributes.
+    attribute_resolutions: int = 0
+    #: :class:`FeatureStats` of each feature by the name of its public method.
+    features: Dict[str, FeatureStats] = field(default_factory=dict)
+
+    def feature(self, name: str) -> FeatureStats:
+        """
+        Return the counters of feature *name*, created when first used.
+
+        :arg str name: Feature name, the name of its public method, such as ``'get_location'``.
+        :rtype: FeatureStats
+        """
+        if name not in self.features:
+            self.features[name] = FeatureStats()
+        return self.features[name]
+
+    def record_query(self, feature: str, timed_out: bool, seconds: float) -> None:
+        """
+        Count one query round trip.
+
+        :arg str feature: Feature name, the name of its public method.
+        :arg bool timed_out: Whether the query went unanswered within its timeout.
+        :arg float seconds: Time spent awaiting the response.
+        """
+        stats = self.feature(feature)
+        stats.queries += 1
+        stats.timeouts += timed_out
+        stats.seconds += seconds
+
+    def record_cache_hit(self, feature: str) -> None:
+        """
+        Count one call answered from cache.
+
+        :arg str feature: Feature name, the name of its public method.
+        """
+        self.feature(feature).cache_hits += 1
+
+    def summary(self) -> str:
+        """
+        Return a human-readable report of all counters, features by most time spent first.
+
+        :rtype: str
+        """
+        lines = [
+            f'inkey: {self.inkey_calls} calls, {self.inkey_seconds:.3f}s',
+            f'read: {self.bytes_read} bytes, {self.kbhit_calls} kbhit, '
+            f'{self.getch_calls} getch',
+            f'escape delay: {self.escape_delay_waits} waits, {self.escape_delay_seconds:.3f}s',
+            f'write: {self.bytes_written} bytes, {self.write_calls} writes, '
+            f'{self.flush_calls} flushes',
+            f'attributes resolved: {self.attribute_resolutions}',
+        ]
+        for name, stats in sorted(self.features.items(), key=lambda item: -item[1].seconds):
+            lines.append(f'{name}: {stats.queries} queries, {stats.timeouts} timeouts, '
+                         f'{stats.seconds:.3f}s, {stats.cache_hits} cache hits')
+        return '\n'.join(lines)
+
+
+class _CountingStream:
+    """Output stream wrapper counting the writes, flushes, and bytes of a :class:`~.Terminal`."""
+
+    def __init__(self, stream: IO[str], stats: TerminalStats) -> None:
+        self.stream = stream
+        self._stats = stats
+        self._encoding = getattr(stream, 'encoding', None) or 'utf-8'
+
+    def write(self, text: str) -> int:
+        """Write *text* to the stream, counting one write and its encoded bytes."""
+        self._stats.write_calls += 1
+        self._stats.bytes_written += len(text.encode(self._encoding, 'replace'))
+        return self.stream.write(text)
+
+    def flush(self) -> None:
+        """Flush the stream, counting one flush."""
+        self._stats.flush_calls += 1
+        self.stream.flush()
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.stream, attr)
@@ -5,8 +5,10 @@ import os
 import re
 import sys
 import time
+import array
 import codecs
 import locale
+import random
 import select
 import struct
 import asyncio
@@ -14,7 +16,17 @@ import platform
 import warnings
 import contextlib
 import collections
-from typing import IO, Dict, List, Match, Tuple, Union, Optional, Generator, SupportsIndex
+from typing import (IO,
+                    Any,
+                    Dict,
+                    List,
+                    Match,
+                    Tuple,
+                    Union,
+                    Callable,
+                    Optional,
+                    Generator,
+                    SupportsIndex)
 
 # 3rd party
 from wcwidth import wrap as wcwidth_wrap
@@ -24,7 +36,21 @@ from wcwidth import width as wcwidth_width
 from wcwidth import center as wcwidth_center
 
 # local
-from .color import COLOR_DISTANCE_ALGORITHMS, xterm256gray_from_rgb, xterm256color_from_rgb
+from .color import (DITHER_METHODS,
+                    COLOR_DISTANCE_ALGORITHMS,
+                    COLOR_DISTANCE_LAB_ALGORITHMS,
+                    ColorsLike,
+                    palette_lab,
+                    bayer_dither,
+                    nearest_color_batch,
+                    xterm256gray_from_rgb,
+                    floyd_steinberg_dither,
+                    xterm256color_from_rgb,
+                    xterm256_from_rgb_batch)
+from .sixel import MAX_SIXEL_COLORS, encode_sixel
+from .stats import TerminalStats, _CountingStream
+from .output import FrameWriter, _FrameBuffer
+from .graphics import kitty_place, kitty_probe, kitty_delete, kitty_discard, kitty_transmit
 from .keyboard import (DEFAULT_ESCDELAY,
                        Keystroke,
                        ResizeEvent,
@@ -33,14 +59,17 @@ from .keyboard import (DEFAULT_ESCDELAY,
                        KittyKeyboardProtocol,
                        _time_left,
                        _read_until,
+                       _DecModeCache,
                        resolve_sequence,
                        get_keyboard_codes,
+                       get_sequence_index,
                        get_leading_prefixes,
                        get_keyboard_sequences)
 from .dec_modes import DecPrivateMode as _DecPrivateMode
 from .dec_modes import DecModeResponse
+from .scheduler import Scheduler, _chained_sigwinch
 from .sequences import Termcap, Sequence
-from .colorspace import RGB_256TABLE, hex_to_rgb, rgb_to_hex, xparse_color
+from .colorspace import RGB_256TABLE, RGBColor, hex_to_rgb, rgb_to_hex, xparse_color
 from .formatters import (COLORS,
                          COMPOUNDABLES,
                          FormattingString,
@@ -111,6 +140,13 @@ _RE_CPR_BOUNDARY = re.compile(r'\x1b\[[0-9]+;[0-9]+R')
 _RE_KITTY_CLIPBOARD = re.compile(r'\x1b\[\?5522;(\d+)\$y')
 _RE_KITTY_POINTER = re.compile(r'\x1b\]22;([^\x07\x1b]+)[\x07\x1b]')
 
+# OSC 4 color register response: ESC]4;<index>;rgb:<r>/<g>/<b> terminated by BEL or ST
+_RE_GET_PALETTE_RESPONSE = re.compile(
+    '\x1b]4;([0-9]+);rgb:([0-9a-fA-F]+)/([0-9a-fA-F]+)/([0-9a-fA-F]+)(?:\x07|\x1b\\\\)')
+
+# largest number of colors remembered by rgb_downconvert_dithered() for Floyd-Steinberg
+_DITHER_CACHE_MAX = 1 << 16
+
 
 class Terminal():
     """
@@ -167,6 +203,9 @@ class Terminal():
     #: DEC Private Mode constants accessible via Terminal.DecPrivateMode or term.DecPrivateMode
     DecPrivateMode = _DecPrivateMode
 
+    # counters of :attr:`stats`, when set
+    _stats: Optional[TerminalStats] = None
+
     def __init__(self,
                  kind: Optional[str] = None,
                  stream: Optional[IO[str]] = None,
@@ -221,6 +260,8 @@ class Terminal():
         self._line_buffered = True
 
         self._stream = stream
+        self._frame: Optional[_FrameBuffer] = None
+        self._frame_writer: Optional[FrameWriter] = None
         self._keyboard_fd = None
         self._init_descriptor = None
         self._is_a_tty = False
@@ -258,59 +299,12 @@ class Terminal():
                         ' returned for the remainder of this process.'
                     )
 
+        self.__init__query_caches()
         self.__init__color_capabilities()
         self.__init__capabilities()
         self.__init__keycodes()
         self.__init__dec_private_modes()
 
-        # Initialize Kitty keyboard protocol tracking
-        self._kitty_kb_first_query_failed = False
-
-        # Device Attributes (DA1) cache and sticky failure tracking
-        self._device_attributes_cache: Optional[DeviceAttribute] = None
-        self._device_attributes_first_query_failed = False
-
-        # Software Version cache
-        self._software_version_cache: Optional[SoftwareVersion] = None
-
-        # Initialize sixel graphics query caches,
-        # Cache for _get_xtsmgraphics() query result - (height, width) or (-1, -1)
-        # the value of (-1, -1) is used for 'sticky failure' unless force=True
-        self._xtsmgraphics_cache: Optional[Tuple[int, int]] = None
-        # Cache for XTWINOPS window pixel dimensions - (height, width) or (-1, -1)
-        self._xtwinops_cache: Optional[Tuple[int, int]] = None
-        # Cache for get_sixel_colors() - stores color count or -1
-        self._xtsmgraphics_colors_cache: Optional[int] = None
-        # Cache for get_cell_height_and_width() - (height, width) or (-1, -1)
-        self._xtwinops_cell_cache: Optional[Tuple[int, int]] = None
-
-        # Cache for in-band resize notifications (mode 2048)
-        # When notify_on_resize() context manager is active, this stores the latest
-        # terminal dimensions from resize events
-        self._preferred_size_cache: Optional["WINSZ"] = None
-
-        # XTGETTCAP cache and sticky failure tracking
-        self._xtgettcap_cache: Optional[TermcapResponse] = None
-        self._xtgettcap_first_query_failed = False
-
-        # Kitty Graphics protocol detection cache
-        self._kitty_graphics_supported: Optional[bool] = None
-
-        # iTerm2 capabilities cache
-        self._iterm2_capabilities_cache: Optional["ITerm2Capabilities"] = None
-
-        # Kitty notifications (OSC 99) detection cache
-        self._kitty_notifications_supported: Optional[bool] = None
-
-        # Kitty clipboard protocol (DECRQM 5522) detection cache
-        self._kitty_clipboard_supported: Optional[bool] = None
-
-        # Kitty pointer shapes (OSC 22) detection cache
-        self._kitty_pointer_shapes_result: Optional[Tuple[bool, str]] = None
-
-        # Text sizing (OSC 66) detection cache
-        self._text_sizing_cache: Optional[TextSizingResult] = None
-
     def __init_set_styling(self, force_styling: bool) -> None:
         self._does_styling = False
         if os.getenv('NO_COLOR'):
@@ -377,6 +371,7 @@ class Terminal():
                 self.errors.append(f'Unable to determine __stdout__ file descriptor: {err}')
 
     def __init__color_capabilities(self) -> None:
+        self._palette: Tuple[RGBColor, ...] = RGB_256TABLE
         self._color_distance_algorithm = 'cie2000'
         if not self.does_styling:
             self.number_of_colors = 0
@@ -388,6 +383,7 @@ class Terminal():
     def __clear_color_capabilities(self) -> None:
         for cached_color_cap in set(dir(self)) & COLORS:
             delattr(self, cached_color_cap)
+        self._dither_cache.clear()
 
     def __init__capabilities(self) -> None:
         # important that we lay these in their ordered direction, so that our
@@ -454,8 +450,9 @@ class Terminal():
         # Build database of sequence <=> KEY_NAME.
         self._keymap = get_keyboard_sequences(self)
 
-        # build set of prefixes of sequences
+        # build set of prefixes of sequences, and index of sequences
         self._keymap_prefixes = get_leading_prefixes(self._keymap)
+        self._keymap_index = get_sequence_index(self._keymap)
 
         # Add DEC event prefixes (mouse, bracketed paste, focus tracking) These
         # are not in the keymap but need to be recognized as valid "prefixes",
@@ -490,10 +487,86 @@ class Terminal():
                 self._encoding = 'UTF-8'
                 self._keyboard_decoder = codecs.getincrementaldecoder(self._encoding)()
 
+    def __init__query_caches(self) -> None:
+        """Initialize caches of query responses, window size, and dithered colors."""
+        # Initialize Kitty keyboard protocol tracking
+        self._kitty_kb_first_query_failed = False
+
+        # Device Attributes (DA1) cache and sticky failure tracking
+        self._device_attributes_cache: Optional[DeviceAttribute] = None
+        self._device_attributes_first_query_failed = False
+
+        # Software Version cache
+        self._software_version_cache: Optional[SoftwareVersion] = None
+
+        # Initialize sixel graphics query caches,
+        # Cache for _get_xtsmgraphics() query result - (height, width) or (-1, -1)
+        # the value of (-1, -1) is used for 'sticky failure' unless force=True
+        self._xtsmgraphics_cache: Optional[Tuple[int, int]] = None
+        # Cache for XTWINOPS window pixel dimensions - (height, width) or (-1, -1)
+        self._xtwinops_cache: Optional[Tuple[int, int]] = None
+        # Cache for get_sixel_colors() - stores color count or -1
+        self._xtsmgraphics_colors_cache: Optional[int] = None
+        # Cache for get_cell_height_and_width() - (height, width) or (-1, -1)
+        self._xtwinops_cell_cache: Optional[Tuple[int, int]] = None
+
+        # Cache for in-band resize notifications (mode 2048)
+        # When notify_on_resize() context manager is active, this stores the latest
+        # terminal dimensions from resize events
+        self._preferred_size_cache: Optional["WINSZ"] = None
+
+        # Cache of the window size while cached_size() is active, cleared by SIGWINCH, which
+        # also counts resizes, so that a size read across a resize is not cached
+        self._size_cache: Optional["WINSZ"] = None
+        self._size_cache_enabled = False
+        self._size_resizes = 0
+
+        # Seconds within which consecutive in-band resize events are coalesced by inkey(), set
+        # by notify_on_resize()
+        self._resize_quiet_period: Optional[float] = None
+
+        # XTGETTCAP cache and sticky failure tracking
+        self._xtgettcap_cache: Optional[TermcapResponse] = None
+        self._xtgettcap_first_query_failed = False
+
+        # Kitty Graphics protocol detection cache
+        self._kitty_graphics_supported: Optional[bool] = None
+
+        # Kitty Graphics transmission medium cache, and next image id to allocate, begun at
+        # random so as not to collide with images of other programs in the same window, and
+        # above the ids of queries, such as 31 of does_kitty_graphics()
+        self._kitty_graphics_medium: Optional[str] = None
+        self._kitty_next_image_id = random.randrange(1 << 8, 1 << 31)
+
+        # iTerm2 capabilities cache
+        self._iterm2_capabilities_cache: Optional["ITerm2Capabilities"] = None
+
+        # Kitty notifications (OSC 99) detection cache
+        self._kitty_notifications_supported: Optional[bool] = None
+
+        # Kitty clipboard protocol (DECRQM 5522) detection cache
+        self._kitty_clipboard_supported: Optional[bool] = None
+
+        # Kitty pointer shapes (OSC 22) detection cache
+        self._kitty_pointer_shapes_result: Optional[Tuple[bool, str]] = None
+
+        # Text sizing (OSC 66) detection cache
+        self._text_sizing_cache: Optional[TextSizingResult] = None
+
+        # Color palette (OSC 4) cache, an empty tuple when the terminal did not respond
+        self._palette_cache: Optional[Tuple[RGBColor, ...]] = None
+
+        # Synchronized output (DEC mode 2026) support of frame(), queried once
+        self._frame_synchronized_cache: Optional[bool] = None
+
+        # Palette color of each RGB color quantized by rgb_downconvert_dithered(), cleared with
+        # the color capabilities
+        self._dither_cache: Dict[Tuple[int, int, int], Tuple[int, Tuple[int, int, int]]] = {}
+
     def __init__dec_private_modes(self) -> None:
         """Initialize DEC Private Mode caching and state tracking."""
         # Cache for queried DEC private modes to avoid repeated queries
-        self._dec_mode_cache: Dict[int, int] = {}
+        self._dec_mode_cache: Dict[int, int] = _DecModeCache()
         # Global timeout tracking state
         self._dec_any_query_succeeded = False
         self._dec_first_query_failed = False
@@ -533,6 +606,8 @@ class Terminal():
         # that's precisely the idea of the cache!
         val = resolve_attribute(self, attr)
         setattr(self, attr, val)
+        if self._stats is not None:
+            self._stats.attribute_resolutions += 1
         return val
 
     @property
@@ -655,7 +730,17 @@ class Terminal():
         # Return preferred cache if available (from in-band resize notifications)
         if self._preferred_size_cache is not None:
             return self._preferred_size_cache
+        if self._size_cache is not None:
+            return self._size_cache
 
+        resizes = self._size_resizes
+        winsize = self._winsize_or_environ()
+        if self._size_cache_enabled and resizes == self._size_resizes:
+            self._size_cache = winsize
+        return winsize
+
+    def _winsize_or_environ(self) -> "WINSZ":
+        """Return the window size by :meth:`_winsize`, or by environment variables."""
         for fd in (self._init_descriptor, sys.__stdout__):
             try:
                 if fd is not None:
@@ -668,14 +753,53 @@ class Terminal():
                      ws_xpixel=None,
                      ws_ypixel=None)
 
+    @contextlib.contextmanager
+    def cached_size(self) -> Generator[None, None, None]:
+        """
+        Context manager caching the window size, until the window is resized.
+
+        Each access of :attr:`height`, :attr:`width`, :attr:`pixel_height`, or
+        :attr:`pixel_width` is otherwise a system call, :const:`termios.TIOCGWINSZ`.  Within this
+        context, the size is read once and cached, until a ``SIGWINCH`` signal of window resize
+        clears it, so that a render loop may refer to the size freely::
+
+            with term.cached_size(), term.cbreak():
+                while term.inkey(timeout=0.1) != 'q':
+                    print(term.home + term.clear + f'{term.height}x{term.width}', end='')
+
+        The ``SIGWINCH`` handler calls any handler it replaces, which is restored on exit.  Sizes
+        received by in-band resize notifications, of :meth:`notify_on_resize`, are preferred
+        over the cached size, as always.
+
+        Where ``SIGWINCH`` is not available, such as Windows, or when not called by the main
+        thread, where signal handlers cannot be set, the size is not cached.
+        """
+        if self._size_cache_enabled:
+            yield
+            return
+
+        def on_winch() -> None:
+            self._size_cache = None
+            self._size_resizes += 1
+
+        with _chained_sigwinch(on_winch) as installed:
+            self._size_cache_enabled = installed
+            try:
+                yield
+            finally:
+                self._size_cache_enabled, self._size_cache = False, None
+
     def _query_response(self, query_str: str, response_re: Union[str, Match[str]],
-                        timeout: Optional[float]) -> Optional[Match[str]]:
+                        timeout: Optional[float], *, feature: str = ''
+                        ) -> Optional[Match[str]]:
         """
         Sends a query string to the terminal and waits for a response.
 
         :arg str query_str: Query string written to output
         :arg str response_re: Regular expression matching query response
         :arg float timeout: Return after time elapsed in seconds
+        :arg str feature: Name of the public method querying, counted by :attr:`stats`,
+            or empty not to count the query.
         :return: re.match object for response_re or None if not found
         :rtype: re.Match
         """
@@ -692,13 +816,16 @@ class Terminal():
                 ctx.__enter__()
 
             # Emit the query sequence,
+            stime = time.perf_counter()
             self.stream.write(query_str)
-            self.stream.flush()
+            self._flush_query()
 
             # Wait for response
             match, data = _read_until(term=self,
                                       pattern=response_re,
                                       timeout=timeout)
+            if self._stats is not None and feature:
+                self._stats.record_query(feature, match is None, time.perf_counter() - stime)
 
             # Exclude response from subsequent input
             if match:
@@ -717,7 +844,8 @@ class Terminal():
     def _query_with_boundary(self, query_str: str,
                              feature_re: "re.Pattern[str]",
                              timeout: Optional[float],
-                             requires_styling: bool = True
+                             requires_styling: bool = True,
+                             *, feature: str = ''
                              ) -> Optional[Match[str]]:
         """
         Query the terminal with a CPR boundary guard for fast negatives.
@@ -732,12 +860,42 @@ class Terminal():
         :arg bool requires_styling: When True (default), return None if
             :attr:`does_styling` is False.  Set to False for queries
             unrelated to visual styling, such as keyboard protocol state.
+        :arg str feature: Name of the public method querying, counted by :attr:`stats`,
+            or empty not to count the query.
         :rtype: re.Match or None
         """
+        matches = self._query_all_with_boundary(query_str, feature_re, timeout,
+                                                requires_styling, count=1, feature=feature)
+        return matches[0] if matches else None
+
+    def _query_all_with_boundary(self, query_str: str,
+                                 feature_re: "re.Pattern[str]",
+                                 timeout: Optional[float],
+                                 requires_styling: bool = True,
+                                 count: int = 0,
+                                 *, feature: str = ''
+                                 ) -> List[Match[str]]:
+        """
+        Query the terminal with a CPR boundary guard, returning every feature response.
+
+        As :meth:`_query_with_boundary`, for queries of many responses written at once, such as
+        one for each color register.  All responses arriving before the CPR are matched in one
+        pass, and any other input between them is re-buffered.
+
+        :arg str query_str: Query string written to output.
+        :arg re.Pattern feature_re: Compiled regex for each feature response.
+        :arg float timeout: Timeout in seconds for each sub-query.
+        :arg bool requires_styling: When True (default), return an empty list if
+            :attr:`does_styling` is False.
+        :arg int count: Largest number of responses matched, or 0 for all.
+        :arg str feature: Name of the public method querying, counted by :attr:`stats`,
+            or empty not to count the query.
+        :rtype: list
+        """
         if not self.is_a_tty:
-            return None
+            return []
         if requires_styling and not self._does_styling:
-            return None
+            return []
 
         # Send feature query + CPR request. We always wait for the CPR
         # as the boundary marker, then check if the feature also responded.
@@ -748,29 +906,65 @@ class Terminal():
                 ctx = self.cbreak()
                 ctx.__enter__()
 
+            stime = time.perf_counter()
             self.stream.write(query_str + '\x1b[6n')
-            self.stream.flush()
+            self._flush_query()
 
             # Wait for CPR boundary -- this is always the last response
             match, data = _read_until(self, _RE_CPR_BOUNDARY.pattern, timeout)
+            if self._stats is not None and feature:
+                self._stats.record_query(feature, match is None, time.perf_counter() - stime)
 
             # Strip the CPR from the buffer
             if match:
                 data = data[:match.start()] + data[match.end():]
 
-            # Check if the feature response arrived before the CPR
-            feature_match = feature_re.search(data)
-            if feature_match:
-                data = data[:feature_match.start()] + data[feature_match.end():]
+            # Check if the feature responses arrived before the CPR
+            feature_matches = []
+            remainder = []
+            position = 0
+            for feature_match in feature_re.finditer(data):
+                feature_matches.append(feature_match)
+                remainder.append(data[position:feature_match.start()])
+                position = feature_match.end()
+                if len(feature_matches) == count:
+                    break
+            remainder.append(data[position:])
 
             # Re-buffer any remaining keyboard input
-            self.ungetch(data)
+            self.ungetch(''.join(remainder))
 
         finally:
             if ctx is not None:
                 ctx.__exit__(None, None, None)
 
-        return feature_match
+        return feature_matches
+
+    def _flush_query(self) -> None:
+        """Flush a query to the terminal, with any output preceding it held by :meth:`frame`."""
+        self.stream.flush()
+        if self._frame is None:
+            return
+        if self._frame_writer is None:
+            self._frame.drain()
+        else:
+            # after any frames waiting, so that output reaches the terminal in order
+            self._frame_writer.wait()
+            self._frame.stream.flush()
+            self._submit_frame(self._frame_writer, self._frame.getvalue())
+            self._frame_writer.wait()
+
+    def _submit_frame(self, writer: FrameWriter, text: str, replace: bool = False) -> None:
+        """Submit *text* to *writer*, counted as one write by :attr:`stats`, when set."""
+        if self._stats is not None:
+            self._stats.write_calls += 1
+            self._stats.bytes_written += len(text.encode(writer.encoding, 'replace'))
+        writer.submit(text, replace=replace)
+
+    def _record_cache_hit(self, feature: str) -> None:
+        """Count a query of *feature* answered from cache, when :attr:`stats` is set."""
+        if self._stats is not None:
+            self._stats.record_cache_hit(feature)
 
     @contextlib.contextmanager
     def location(self, x: Optional[int] = None, y: Optional[int]
@@ -877,7 +1071,8 @@ class Terminal():
 
         response_str = getattr(self, self.caps['cursor_report'].attribute) or '\x1b[%i%d;%dR'
         match = self._query_response(
-            self.u7 or '\x1b[6n', self.caps['cursor_report'].re_compiled, timeout)
+            self.u7 or '\x1b[6n', self.caps['cursor_report'].re_compiled, timeout,
+            feature='get_location')
 
         if match:
             # return matching sequence response, the cursor location.
@@ -934,7 +1129,8 @@ class Terminal():
         """
         if bits not in (8, 16):
             raise ValueError(f"bits must be 8 or 16, got {bits}")
-        match = self._query_with_boundary('\x1b]10;?\x07', RE_GET_FGCOLOR_RESPONSE, timeout)
+        match = self._query_with_boundary('\x1b]10;?\x07', RE_GET_FGCOLOR_RESPONSE, timeout,
+                                          feature='get_fgcolor')
         if not match:
             return (-1, -1, -1)
         return tuple(xparse_color(val, bits=bits) for val in match.groups())
@@ -973,7 +1169,8 @@ class Terminal():
         """
         if bits not in (8, 16):
             raise ValueError(f"bits must be 8 or 16, got {bits}")
-        match = self._query_with_boundary('\x1b]11;?\x07', RE_GET_BGCOLOR_RESPONSE, timeout)
+        match = self._query_with_boundary('\x1b]11;?\x07', RE_GET_BGCOLOR_RESPONSE, timeout,
+                                          feature='get_bgcolor')
         if not match:
             return (-1, -1, -1)
         return tuple(xparse_color(val, bits=bits) for val in match.groups())
@@ -1014,6 +1211,47 @@ class Terminal():
             return ''
         return rgb_to_hex(*rgb, maybe_short=maybe_short)
 
+    def get_palette(self, timeout: Optional[float] = 1,
+                    force: bool = False) -> Optional[Tuple[RGBColor, ...]]:
+        """
+        Query the terminal's 256-color palette, and use it to downconvert colors.
+
+        Color themes commonly remap the 16 ANSI colors, so that :meth:`rgb_downconvert` of
+        terminals of 16 or fewer colors chooses the wrong color by the default palette,
+        :data:`~.colorspace.RGB_256TABLE`.  An `OSC 4 color query
+        <https://invisible-island.net/xterm/ctlseqs/ctlseqs.html#h3-Operating-System-Commands>`_
+        of all 256 registers is written at once, and the responses are parsed in one pass.  When
+        any register is reported, the result is assigned to :attr:`palette`.
+
+        The result is cached, and returned without inquiry unless *force* is True.
+
+        When :attr:`is_a_tty` is False, no sequences are transmitted or response
+        awaited, and ``None`` is returned without inquiry.
+
+        :arg float timeout: Timeout in seconds for the query.
+        :arg bool force: Bypass cache and re-query the terminal.
+        :rtype: tuple or None
+        :returns: Tuple of 256 :class:`~.colorspace.RGBColor` of 8-bit values, those registers
+            not reported by the terminal from :data:`~.colorspace.RGB_256TABLE`, or ``None``
+            when the terminal did not respond.
+        """
+        if self._palette_cache is not None and not force:
+            self._record_cache_hit('get_palette')
+            return self._palette_cache or None
+
+        query = ''.join(f'\x1b]4;{index};?\x07' for index in range(256))
+        matches = self._query_all_with_boundary(query, _RE_GET_PALETTE_RESPONSE, timeout,
+                                                feature='get_palette')
+        colors = list(RGB_256TABLE)
+        for match in matches:
+            index = int(match.group(1))
+            if index < len(colors):
+                colors[index] = RGBColor(*(xparse_color(val, bits=8) for val in match.groups()[1:]))
+        self._palette_cache = tuple(colors) if matches else ()
+        if self._palette_cache:
+            self.palette = self._palette_cache
+        return self._palette_cache or None
+
     def get_device_attributes(self, timeout: Optional[float] = 1,
                               force: bool = False) -> Optional[DeviceAttribute]:
         """
@@ -1054,14 +1292,17 @@ class Terminal():
         """
         # Return None if first query failed and force is not set
         if self._device_attributes_first_query_failed and not force:
+            self._record_cache_hit('get_device_attributes')
             return None
 
         # Return cached result unless force=True
         if self._device_attributes_cache is not None and not force:
+            self._record_cache_hit('get_device_attributes')
             return self._device_attributes_cache
 
         query = '\x1b[c'
-        match = self._query_with_boundary(query, DeviceAttribute.RE_RESPONSE, timeout)
+        match = self._query_with_boundary(query, DeviceAttribute.RE_RESPONSE, timeout,
+                                          feature='get_device_attributes')
 
         # invalid or no response (timeout)
         if match is None:
@@ -1115,12 +1356,14 @@ class Terminal():
 
         # Return cached result unless force=True
         if self._software_version_cache is not None and not force:
+            self._record_cache_hit('get_software_version')
             return self._software_version_cache
 
         # Build and send query sequence and expected response pattern
         query = '\x1b[>q'
 
-        match = self._query_with_boundary(query, _RE_GET_SOFTWARE_VERSION_RESPONSE, timeout)
+        match = self._query_with_boundary(query, _RE_GET_SOFTWARE_VERSION_RESPONSE, timeout,
+                                          feature='get_software_version')
 
         # invalid or no response (timeout)
         if match is None:
@@ -1274,10 +1517,12 @@ class Terminal():
         if self._dec_first_query_failed and not force:
             # When the first query is not responded, we can safely assume all
             # subsequent inqueries will be ignored
+            self._record_cache_hit('get_dec_mode')
             return DecModeResponse(mode, DecModeResponse.NOT_QUERIED)
 
         # Always return the cached response when available unless force=True
         if int(mode) in self._dec_mode_cache and not force:
+            self._record_cache_hit('get_dec_mode')
             cached_value = self._dec_mode_cache[int(mode)]
             return DecModeResponse(mode, cached_value)
 
@@ -1285,7 +1530,7 @@ class Terminal():
         query = f'\x1b[?{int(mode):d}$p'
         response_pattern = re.compile(f'\x1b\\[\\?{int(mode):d};([0-4])\\$y')
 
-        match = self._query_with_boundary(query, response_pattern, timeout)
+        match = self._query_with_boundary(query, response_pattern, timeout, feature='get_dec_mode')
 
         # invalid or no response (timeout or not a TTY)
         if match is None:
@@ -1564,9 +1809,11 @@ class Terminal():
             return None
 
         if self._xtgettcap_cache is not None and not force:
+            self._record_cache_hit('get_xtgettcap')
             return self._xtgettcap_cache
 
         if self._xtgettcap_first_query_failed and not force:
+            self._record_cache_hit('get_xtgettcap')
             return None
 
         # Phase 1: Probe with single capability via _query_with_boundary,
@@ -1575,7 +1822,7 @@ class Terminal():
         probe_cap = XTGETTCAP_CAPABILITIES[0][0]
         probe_query = f'\x1bP+q{TermcapResponse.hex_encode(probe_cap)}\x1b\\'
         match = self._query_with_boundary(
-            probe_query, _RE_XTGETTCAP_RESPONSE, timeout)
+            probe_query, _RE_XTGETTCAP_RESPONSE, timeout, feature='get_xtgettcap')
 
         if match is None:
             self._xtgettcap_first_query_failed = True
@@ -1662,16 +1909,122 @@ class Terminal():
         if not self.does_styling:
             return False
         if self._kitty_graphics_supported is not None and not force:
+            self._record_cache_hit('does_kitty_graphics')
             return self._kitty_graphics_supported
 
         match = self._query_with_boundary(
             '\x1b_Gi=31,s=1,v=1,a=q,t=d,f=24;AAAA\x1b\\',
             _RE_KITTY_GRAPHICS_RESPONSE,
-            timeout)
+            timeout, feature='does_kitty_graphics')
         supported = match is not None and 'OK' in match.group(1)
         self._kitty_graphics_supported = supported
         return supported
 
+    def get_kitty_graphics_medium(self, timeout: Optional[float] = 1,
+                                  force: bool = False) -> Optional[str]:
+        """
+        Determine the fastest Kitty graphics transmission medium supported.
+
+        For local sessions, that is, when none of ``SSH_CONNECTION``, ``SSH_CLIENT``, or
+        ``SSH_TTY`` are set, the terminal is asked to read a single pixel from POSIX shared
+        memory, ``'s'``, and then from a temporary file, ``'t'``, avoiding base64 encoding
+        of pixel data.  Otherwise, or when neither succeeds, direct transmission, ``'d'``,
+        is returned.
+
+        :arg float timeout: Timeout in seconds for each query.
+        :arg bool force: Bypass cached result.
+        :rtype: str or None
+        :returns: ``'s'``, ``'t'``, or ``'d'``, or ``None`` when
+            :meth:`does_kitty_graphics` is False.
+        """
+        if self._kitty_graphics_medium is not None and not force:
+            self._record_cache_hit('get_kitty_graphics_medium')
+            return self._kitty_graphics_medium
+        if not self.does_kitty_graphics(timeout=timeout, force=force):
+            return None
+
+        medium = 'd'
+        if not any(os.environ.get(key) for key in ('SSH_CONNECTION', 'SSH_CLIENT', 'SSH_TTY')):
+            for candidate in ('s', 't'):
+                try:
+                    query, name = kitty_probe(candidate)
+                except OSError:
+                    continue
+                try:
+                    match = self._query_with_boundary(
+                        query, _RE_KITTY_GRAPHICS_RESPONSE, timeout,
+                        feature='get_kitty_graphics_medium')
+                finally:
+                    kitty_discard(candidate, name)
+                if match is not None and 'OK' in match.group(1):
+                    medium = candidate
+                    break
+        self._kitty_graphics_medium = medium
+        return medium
+
+    def upload_kitty_image(self, data: Union[bytes, bytearray, memoryview, str],
+                           width: int = 0, height: int = 0, *, fmt: int = 24,
+                           image_id: Optional[int] = None, medium: Optional[str] = None,
+                           timeout: Optional[float] = 1) -> int:
+        """
+        Transmit an image by the Kitty graphics protocol, without displaying it.
+
+        The image is stored by the terminal and may then be displayed any number of times
+        by :meth:`draw_kitty_image` without sending its data again.
+
+        :arg data: Image data, ``width * height`` pixels of 24-bit RGB or 32-bit RGBA,
+            or a PNG file for *fmt* ``100``.  For *medium* ``'f'``, the path of a file
+            containing it.
+        :arg int width: Image width in pixels, not required for PNG.
+        :arg int height: Image height in pixels, not required for PNG.
+        :arg int fmt: Pixel format, ``24`` (RGB), ``32`` (RGBA), or ``100`` (PNG).
+        :arg int image_id: Id to store the image by, replacing any image of the same id.
+            By default, a new id is allocated, beginning at random, as image ids are shared
+            by all programs of the terminal window.
+        :arg str medium: Transmission medium, ``'d'``, ``'s'``, ``'t'``, or ``'f'``, by
+            default that returned by :meth:`get_kitty_graphics_medium`.
+        :arg float timeout: Timeout in seconds for :meth:`get_kitty_graphics_medium`, when
+            not yet cached.
+        :raises ValueError: Unknown *fmt* or *medium*, or size of *data* does not match
+            dimensions.
+        :rtype: int
+        :returns: Image id.
+        """
+        if medium is None:
+            medium = self.get_kitty_graphics_medium(timeout=timeout) or 'd'
+        if image_id is None:
+            image_id = self._kitty_next_image_id
+            self._kitty_next_image_id += 1
+        for sequence in kitty_transmit(data, image_id, width, height, fmt=fmt, medium=medium):
+            self.stream.write(sequence)
+        self.stream.flush()
+        return image_id
+
+    def draw_kitty_image(self, image_id: int, columns: Optional[int] = None,
+                         rows: Optional[int] = None,
+                         placement_id: Optional[int] = None) -> None:
+        """
+        Display an image sent by :meth:`upload_kitty_image` at the cursor position.
+
+        :arg int image_id: Image id returned by :meth:`upload_kitty_image`.
+        :arg int columns: Number of cells to scale the image width to.
+        :arg int rows: Number of cells to scale the image height to.
+        :arg int placement_id: Placement id, drawing the same image and placement id
+            again moves the existing placement rather than adding another.
+        """
+        self.stream.write(kitty_place(image_id, columns=columns, rows=rows,
+                                      placement_id=placement_id))
+        self.stream.flush()
+
+    def delete_kitty_image(self, image_id: int) -> None:
+        """
+        Remove all placements of an image sent by :meth:`upload_kitty_image` and free its data.
+
+        :arg int image_id: Image id returned by :meth:`upload_kitty_image`.
+        """
+        self.stream.write(kitty_delete(image_id))
+        self.stream.flush()
+
     def get_iterm2_capabilities(self, timeout: Optional[float] = 1,
                                 force: bool = False
                                 ) -> Optional["ITerm2Capabilities"]:
@@ -1695,12 +2048,13 @@ class Terminal():
             return None
 
         if self._iterm2_capabilities_cache is not None and not force:
+            self._record_cache_hit('get_iterm2_capabilities')
             return self._iterm2_capabilities_cache
 
         match = self._query_with_boundary(
             '\x1b]1337;Capabilities\x07',
             _RE_ITERM2_CAPABILITIES_RESPONSE,
-            timeout)
+            timeout, feature='get_iterm2_capabilities')
         if match:
             features = ITerm2Capabilities.parse_feature_string(
                 match.group(1))
@@ -1759,12 +2113,13 @@ class Terminal():
         :rtype: bool
         """
         if self._kitty_notifications_supported is not None and not force:
+            self._record_cache_hit('does_kitty_notifications')
             return self._kitty_notifications_supported
 
         match = self._query_with_boundary(
             '\x1b]99;i=blessed:p=?\x1b\\',
             _RE_KITTY_NOTIFICATIONS_RESPONSE,
-            timeout)
+            timeout, feature='does_kitty_notifications')
         supported = match is not None
         self._kitty_notifications_supported = supported
         return supported
@@ -1782,10 +2137,11 @@ class Terminal():
         :rtype: bool
         """
         if self._kitty_clipboard_supported is not None and not force:
+            self._record_cache_hit('does_kitty_clipboard')
             return self._kitty_clipboard_supported
 
         match = self._query_with_boundary(
-            '\x1b[?5522$p', _RE_KITTY_CLIPBOARD, timeout)
+            '\x1b[?5522$p', _RE_KITTY_CLIPBOARD, timeout, feature='does_kitty_clipboard')
         supported = False
         if match:
             ps = int(match.group(1))
@@ -1811,11 +2167,13 @@ class Terminal():
         :rtype: str or None
         """
         if self._kitty_pointer_shapes_result is not None and not force:
+            self._record_cache_hit('does_kitty_pointer_shapes')
             supported, shape = self._kitty_pointer_shapes_result
             return shape if supported else None
 
         match = self._query_with_boundary(
-            '\x1b]22;?__current__\x1b\\', _RE_KITTY_POINTER, timeout)
+            '\x1b]22;?__current__\x1b\\', _RE_KITTY_POINTER, timeout,
+            feature='does_kitty_pointer_shapes')
         if match:
             shape = match.group(1)
             self._kitty_pointer_shapes_result = (True, shape)
@@ -1843,6 +2201,7 @@ class Terminal():
         if not self.is_a_tty or not self._does_styling:
             return TextSizingResult()
         if self._text_sizing_cache is not None and not force:
+            self._record_cache_hit('does_text_sizing')
             return self._text_sizing_cache
 
         _, col0 = self.get_location(timeout)
@@ -1969,7 +2328,8 @@ class Terminal():
             yield
 
     @contextlib.contextmanager
-    def notify_on_resize(self, timeout: float = 1.0) -> Generator[None, None, None]:
+    def notify_on_resize(self, timeout: float = 1.0,
+                         quiet_period: Optional[float] = None) -> Generator[None, None, None]:
         """
         Context manager for enabling in-band window resize notifications.
 
@@ -1985,7 +2345,15 @@ class Terminal():
         conditions and signal handling complexity of SIGWINCH on Unix systems, and provides
         a consistent cross-platform API.
 
+        While a window is resized, such as by dragging its border, the terminal sends many resize
+        events.  Given a *quiet_period*, :meth:`inkey` and :meth:`async_inkey` coalesce
+        consecutive resize events into one, of the final size, returned once no other is received
+        for *quiet_period* seconds, so that a program redraws once rather than for each event.
+        Waiting for the quiet period may exceed the *timeout* given to :meth:`inkey`.
+
         :arg float timeout: Timeout for mode query (default 1.0s)
+        :arg float quiet_period: Seconds without another resize event before one is returned, or
+            ``None`` (default) to return each resize event.
 
         Example::
 
@@ -1998,12 +2366,14 @@ class Terminal():
                     elif inp == 'q':
                         break
         """
+        prev_quiet_period, self._resize_quiet_period = self._resize_quiet_period, quiet_period
         try:
             with self.dec_modes_enabled(_DecPrivateMode.IN_BAND_WINDOW_RESIZE, timeout=timeout):
                 yield
         finally:
-            # Clear the cache when exiting the context
-            self._preferred_size_cache = None
+            # Clear the caches when exiting the context, the size may have changed since
+            self._preferred_size_cache = self._size_cache = None
+            self._resize_quiet_period = prev_quiet_period
 
     def _dec_mode_set_enabled(self, *modes: Union[int, _DecPrivateMode]) -> None:
         """
@@ -2189,6 +2559,7 @@ class Terminal():
             XTSMGRAPHICS fails, or ``-1`` if unsupported/timeout
         """
         if self._xtsmgraphics_colors_cache is not None and not force:
+            self._record_cache_hit('get_sixel_colors')
             return self._xtsmgraphics_colors_cache
 
         stime = time.time()
@@ -2207,6 +2578,30 @@ class Terminal():
 
         return self._xtsmgraphics_colors_cache
 
+    def draw_sixel(self, pixels: Union[bytes, bytearray, memoryview, Any], width: int,
+                   height: int, timeout: Optional[float] = 1) -> None:
+        """
+        Draw RGB pixels as a sixel image at the cursor position.
+
+        The image is quantized to the number of color registers returned by
+        :meth:`get_sixel_colors`, or 256 when unknown, and written to :attr:`stream` in
+        chunks as it is encoded by :func:`~.sixel.encode_sixel`.  Whether the terminal
+        supports sixel at all should first be checked with :meth:`does_sixel`.
+
+        :arg pixels: Row-major, 8-bit RGB pixel data of ``width * height * 3`` bytes,
+            or a NumPy array of shape ``(height, width, 3)``.
+        :arg int width: Image width in pixels.
+        :arg int height: Image height in pixels.
+        :arg float timeout: Timeout in seconds for :meth:`get_sixel_colors`, when not
+            yet cached.
+        :raises ValueError: *pixels* is not ``width * height * 3`` bytes.
+        """
+        colors = self.get_sixel_colors(timeout=timeout)
+        for chunk in encode_sixel(pixels, width, height,
+                                  colors=colors if colors > 0 else MAX_SIXEL_COLORS):
+            self.stream.write(chunk)
+        self.stream.flush()
+
     def get_cell_height_and_width(self, timeout: Optional[float] = 1,
                                   force: bool = False) -> Tuple[int, int]:
         """
@@ -2223,6 +2618,7 @@ class Terminal():
         :returns: ``(height, width)`` in pixels, or ``(-1, -1)`` if unsupported/timeout
         """
         if self._xtwinops_cell_cache is not None and not force:
+            self._record_cache_hit('get_cell_height_and_width')
             return self._xtwinops_cell_cache
 
         result = self._get_xtwinops_cell_size(timeout)
@@ -2233,7 +2629,8 @@ class Terminal():
         # Query XTWINOPS 14t for window size: ESC[14t
         # Response: ESC[4;<height>;<width>t - return (height, width)
         query = '\x1b[14t'
-        match = self._query_with_boundary(query, _RE_XTWINOPS_14_RESPONSE, timeout)
+        match = self._query_with_boundary(query, _RE_XTWINOPS_14_RESPONSE, timeout,
+                                          feature='get_sixel_height_and_width')
 
         if match is None:
             return -1, -1
@@ -2245,7 +2642,8 @@ class Terminal():
         # Query XTWINOPS 16t for cell size: ESC[16t
         # Response: ESC[6;<height>;<width>t - return (height, width)
         query = '\x1b[16t'
-        match = self._query_with_boundary(query, _RE_XTWINOPS_16_RESPONSE, timeout)
+        match = self._query_with_boundary(query, _RE_XTWINOPS_16_RESPONSE, timeout,
+                                          feature='get_cell_height_and_width')
 
         if match is None:
             return -1, -1
@@ -2257,7 +2655,8 @@ class Terminal():
         # Query XTSMGRAPHICS for sixel geometry: ESC[?2;1;0S
         # Response: ESC[?2;0;<width>;<height>S - return (height, width)
         query = '\x1b[?2;1;0S'
-        match = self._query_with_boundary(query, _RE_XTSMGRAPHICS_RESPONSE, timeout)
+        match = self._query_with_boundary(query, _RE_XTSMGRAPHICS_RESPONSE, timeout,
+                                          feature='get_sixel_height_and_width')
 
         if match is None:
             return -1, -1
@@ -2276,7 +2675,8 @@ class Terminal():
         # Query XTSMGRAPHICS for color registers: ESC[?1;1;0S
         # Response: ESC[?1;0;<colors>S
         query = '\x1b[?1;1;0S'
-        match = self._query_with_boundary(query, _RE_XTSMGRAPHICS_COLORS_RESPONSE, timeout)
+        match = self._query_with_boundary(query, _RE_XTSMGRAPHICS_COLORS_RESPONSE, timeout,
+                                          feature='get_sixel_colors')
 
         if match is None:
             return -1
@@ -2317,12 +2717,13 @@ class Terminal():
         :returns: KittyKeyboardProtocol instance with current flags, or None if unsupported/timeout
         """
         if self._kitty_kb_first_query_failed and not force:
+            self._record_cache_hit('get_kitty_keyboard_state')
             return None
 
         response_pattern = re.compile(r'\x1b\[\?([0-9]*)u')
         match = self._query_with_boundary(
             '\x1b[?u', response_pattern, timeout,
-            requires_styling=False)
+            requires_styling=False, feature='get_kitty_keyboard_state')
 
         if match is None:
             if self.is_a_tty:
@@ -2435,6 +2836,84 @@ class Terminal():
             self.stream.write(self.exit_fullscreen)
             self.stream.flush()
 
+    @contextlib.contextmanager
+    def frame(self, synchronized: bool = True, timeout: float = 1.0,
+              writer: Optional[FrameWriter] = None,
+              replace: bool = False) -> Generator[None, None, None]:
+        """
+        Context manager collecting all output into one write and flush on exit.
+
+        Output to :attr:`stream` within the frame, by the application or by the terminal, such as
+        the sequences of :meth:`hidden_cursor` or :meth:`dec_modes_enabled`, is buffered and
+        written at once, so that each frame is one system call and, over SSH, one TCP segment.
+        When :attr:`stream` is :obj:`sys.stdout`, the output of :func:`print` is collected, too::
+
+            with term.frame():
+                print(term.home + term.clear, end='')
+                for y, line in enumerate(lines):
+                    print(term.move_yx(y, 0) + line, end='', flush=True)
+
+        When the terminal supports synchronized output, as determined by
+        :meth:`does_synchronized_output` on the first frame, output is begun and ended by its
+        sequences within the same write, so that the terminal displays the frame at once, without
+        tearing.  Synchronized output is not begun when it is already enabled, such as by
+        :meth:`synchronized_output`.
+
+        Queries, such as :meth:`get_location`, write any output collected so far with the query,
+        so that the response reflects it.  Frames may be nested: output is written at the end of
+        the outermost frame, and is written even when an exception is raised.
+
+        Given a :class:`~.FrameWriter`, the frame is submitted to it instead, written without
+        blocking, see :mod:`blessed.output`.  Queries within the frame are submitted to it, too,
+        and await all output of the writer.  Output written to :attr:`stream` before the frame
+        awaits the remainder of any frame begun by the writer.
+
+        :arg bool synchronized: Whether to use synchronized output, when supported.
+        :arg float timeout: Timeout in seconds of the first query of synchronized output support.
+        :arg FrameWriter writer: Non-blocking writer the frame is submitted to.
+        :arg bool replace: Whether the frame is complete, replacing any frames waiting to be
+            written by *writer*.
+        """
+        if self._frame is not None:
+            yield
+            return
+        synchronized = synchronized and self._frame_synchronized(timeout)
+        buffer = self._frame = _FrameBuffer(self._stream)
+        self._stream = buffer  # type: ignore[assignment]
+        self._frame_writer = writer
+        if synchronized:
+            buffer.write('\x1b[?2026h')
+        stream = buffer.stream.stream if isinstance(
+            buffer.stream, _CountingStream) else buffer.stream
+        redirect = (contextlib.redirect_stdout(buffer)
+                    if sys.stdout is stream else contextlib.nullcontext())
+        try:
+            with redirect:
+                yield
+        finally:
+            self._stream, self._frame, self._frame_writer = buffer.stream, None, None
+            if synchronized:
+                buffer.write('\x1b[?2026l')
+            if writer is None:
+                buffer.drain()
+            else:
+                # output written to the stream before the frame precedes it, and must not split
+                # a frame begun by the writer
+                writer.wait(current=True)
+                buffer.stream.flush()
+                self._submit_frame(writer, buffer.getvalue(), replace)
+
+    def _frame_synchronized(self, timeout: float) -> bool:
+        """Return whether :meth:`frame` should begin and end synchronized output."""
+        if not self._does_styling:
+            return False
+        if self._frame_synchronized_cache is None:
+            self._frame_synchronized_cache = self.does_synchronized_output(timeout=timeout)
+        # not when already enabled, such as within synchronized_output()
+        state = self._dec_mode_cache.get(_DecPrivateMode.SYNCHRONIZED_OUTPUT)
+        return self._frame_synchronized_cache and state not in (DecModeResponse.SET,
+                                                                DecModeResponse.PERMANENTLY_SET)
+
     @contextlib.contextmanager
     def hidden_cursor(self) -> Generator[None, None, None]:
         """
@@ -2710,7 +3189,15 @@ class Terminal():
             return 7
 
         target_rgb = (red, green, blue)
-        fn_distance = COLOR_DISTANCE_ALGORITHMS[self.color_distance_algorithm]
+        fn_distance: Callable[[Any, Any], float]
+        if self.color_distance_algorithm in COLOR_DISTANCE_LAB_ALGORITHMS:
+            # the target is converted to CIE-Lab only once, palette colors are precomputed
+            fn_distance = COLOR_DISTANCE_LAB_ALGORITHMS[self.color_distance_algorithm]
+            convert: Callable[[Tuple[int, int, int]], Any] = palette_lab
+        else:
+            fn_distance = COLOR_DISTANCE_ALGORITHMS[self.color_distance_algorithm]
+            convert = tuple
+        target = convert(target_rgb)
 
         if self.number_of_colors < 256:  # 8 or 16 colors
             # because there just are not very many colors, we can use a color distance
@@ -2718,7 +3205,7 @@ class Terminal():
             best_idx = 7
             best_distance = float('inf')
             for idx in range(min(self.number_of_colors, 16)):
-                distance = fn_distance(RGB_256TABLE[idx], target_rgb)
+                distance = fn_distance(convert(self._palette[idx]), target)
                 if distance < best_distance:
                     best_distance = distance
                     best_idx = idx
@@ -2730,10 +3217,76 @@ class Terminal():
         # anyway! We chose the nearest distance of either color.
         cube_idx, cube_rgb = xterm256color_from_rgb(red, green, blue)
         gray_idx, gray_rgb = xterm256gray_from_rgb(red, green, blue)
-        cube_distance = fn_distance(cube_rgb, target_rgb)
-        gray_distance = fn_distance(gray_rgb, target_rgb)
+        cube_distance = fn_distance(convert(cube_rgb), target)
+        gray_distance = fn_distance(convert(gray_rgb), target)
         return cube_idx if cube_distance <= gray_distance else gray_idx
 
+    def rgb_downconvert_batch(self, colors: ColorsLike) -> Any:
+        """
+        Translate many RGB colors to color codes of the terminal's color depth.
+
+        The result is that of :meth:`rgb_downconvert` for each color, computed by
+        :func:`~.color.nearest_color_batch` or :func:`~.color.xterm256_from_rgb_batch`, as
+        array operations when NumPy is installed.
+
+        :arg colors: RGB colors, a sequence of ``(red, green, blue)`` tuples, flat 8-bit RGB
+            bytes, or a NumPy array of shape ``(..., 3)``.
+        :returns: NumPy array of color codes when NumPy is installed, otherwise
+            :class:`array.array` of typecode ``'B'``.
+        """
+        if self.number_of_colors == 0:
+            # as rgb_downconvert(), color #7 for each
+            codes = nearest_color_batch(colors, [RGB_256TABLE[7]], 'rgb')
+            if isinstance(codes, array.array):
+                return array.array('B', [7]) * len(codes)
+            return codes + 7
+        if self.number_of_colors < 256:
+            return nearest_color_batch(colors, self._palette[:min(self.number_of_colors, 16)],
+                                       self.color_distance_algorithm)
+        return xterm256_from_rgb_batch(colors, self.color_distance_algorithm)
+
+    def rgb_downconvert_dithered(self, pixels: Union[bytes, bytearray, memoryview, Any],
+                                 width: int, height: int, method: str = 'bayer') -> Any:
+        """
+        Translate an image of RGB pixels to color codes of the terminal's color depth, dithered.
+
+        Where :meth:`rgb_downconvert_batch` draws gradients as bands of the nearest color,
+        dithering mixes neighboring palette colors to approximate the colors between them:
+
+        - ``'bayer'``: ordered dithering by :func:`~.color.bayer_dither`, each pixel offset by
+          its position in a repeating 8x8 pattern.  Fast, and stable between frames of
+          animation.
+        - ``'floyd-steinberg'``: error diffusion by :func:`~.color.floyd_steinberg_dither`,
+          more accurate, but slower, the colors of each pixel depending on those before it.
+
+        :arg pixels: Row-major, 8-bit RGB pixel data of ``width * height * 3`` bytes, or a NumPy
+            array of shape ``(height, width, 3)``.
+        :arg int width: Image width in pixels.
+        :arg int height: Image height in pixels.
+        :arg str method: One of :data:`~.color.DITHER_METHODS`.
+        :raises ValueError: Unknown *method*, or *pixels* is not ``width * height * 3`` bytes.
+        :returns: NumPy array of shape ``(height, width)`` when NumPy is installed, otherwise
+            :class:`array.array` of typecode ``'B'``, in row-major order.
+        """
+        if method not in DITHER_METHODS:
+            raise ValueError(f'method must be one of {DITHER_METHODS}, got {method!r}')
+        if method == 'bayer':
+            # distance between neighboring levels of each channel: 40 of the 256-color cube,
+            # but for its first, and half or all of the range of 16, 8, or 4 colors
+            spread = (40.0 if self.number_of_colors >= 256 else
+                      255 / (max(2, round(self.number_of_colors ** (1 / 3.0))) - 1))
+            return self.rgb_downconvert_batch(bayer_dither(pixels, width, height, spread))
+
+        def quantize(rgb: Tuple[int, int, int]) -> Tuple[int, Tuple[int, int, int]]:
+            code = self.rgb_downconvert(*rgb)
+            # a palette may be of only 16 colors, the cube and grayscale ramp are standard
+            return code, (self._palette[code] if code < 16 else RGB_256TABLE[code])
+
+        # colors diffused by error are many, but repeat between frames of animation
+        if len(self._dither_cache) > _DITHER_CACHE_MAX:
+            self._dither_cache.clear()
+        return floyd_steinberg_dither(pixels, width, height, quantize, cache=self._dither_cache)
+
     @property
     def normal(self) -> str:
         """
@@ -2786,6 +3339,60 @@ class Terminal():
         """
         return self._stream
 
+    @property
+    def stats(self) -> Optional[TerminalStats]:
+        """
+        Counters of input, output, and queries of this terminal, ``None`` by default.
+
+        Assign a :class:`~.TerminalStats` instance to begin counting, and ``None`` to stop::
+
+            >>> term.stats = TerminalStats()
+            >>> term.get_device_attributes()
+            >>> term.stats.features['get_device_attributes'].timeouts
+            1
+
+        While set, writes to :attr:`stream` are counted by wrapping it.
+
+        :rtype: TerminalStats or None
+        """
+        return self._stats
+
+    @stats.setter
+    def stats(self, value: Optional[TerminalStats]) -> None:
+        # the stream written by a frame, if any, is the one counted
+        stream = self._frame.stream if self._frame is not None else self._stream
+        if isinstance(stream, _CountingStream):
+            stream = stream.stream
+        self._stats = value
+        if value is not None:
+            stream = _CountingStream(stream, value)  # type: ignore[assignment]
+        if self._frame is not None:
+            self._frame.stream = stream  # type: ignore[assignment]
+        else:
+            self._stream = stream
+
+    @property
+    def palette(self) -> Tuple[RGBColor, ...]:
+        """
+        RGB value of each color code, used by :meth:`rgb_downconvert` for 16 or fewer colors.
+
+        By default :data:`~.colorspace.RGB_256TABLE`, it is assigned the terminal's own palette
+        by :meth:`get_palette`, or may be assigned any sequence of at least 16 ``(r, g, b)``
+        colors.  Colors of the 256-color cube and grayscale ramp are always matched by their
+        standard values.
+
+        :raises ValueError: Assigned fewer than 16 colors.
+        """
+        return self._palette
+
+    @palette.setter
+    def palette(self, value: Union[List[Tuple[int, int, int]],
+                                   Tuple[Tuple[int, int, int], ...]]) -> None:
+        if len(value) < 16:
+            raise ValueError(f'palette must be of at least 16 colors, got {len(value)}')
+        self._palette = tuple(RGBColor(*rgb) for rgb in value)
+        self.__clear_color_capabilities()
+
     @property
     def number_of_colors(self) -> int:
         """
@@ -3071,6 +3678,9 @@ class Terminal():
         """
         assert self._keyboard_fd is not None
         byte = os.read(self._keyboard_fd, 1)
+        if self._stats is not None:
+            self._stats.getch_calls += 1
+            self._stats.bytes_read += len(byte)
         if decode_latin1:
             # Latin-1 is a simple 1:1 byte-to-character mapping (0-255)
             # No incremental decoder needed
@@ -3109,6 +3719,8 @@ class Terminal():
 
         if HAS_TTY:
             ready_r, _, _ = select.select(check_r, [], [], timeout)
+            if self._stats is not None:
+                self._stats.kbhit_calls += 1
 
         return False if self._keyboard_fd is None else check_r == ready_r
 
@@ -3296,11 +3908,21 @@ class Terminal():
         _`ncurses(3)`: https://www.man7.org/linux/man-pages/man3/ncurses.3x.html
         """
         stime = time.time()
+        ks = self._inkey(timeout, esc_delay)
+        if self._stats is not None:
+            self._stats.inkey_calls += 1
+            self._stats.inkey_seconds += time.time() - stime
+        return ks
+
+    def _inkey(self, timeout: Optional[float], esc_delay: float) -> Keystroke:
+        """Read and return the next keyboard event of :meth:`inkey`, without recording stats."""
+        stime = time.time()
         ucs = self.flushinp()
 
         # decode buffered keystroke, if any
         ks = resolve_sequence(ucs, self._keymap, self._keycodes, self._keymap_prefixes,
-                              final=False, dec_mode_cache=self._dec_mode_cache)
+                              final=False, dec_mode_cache=self._dec_mode_cache,
+                              index=self._keymap_index)
 
         # so long as the most immediately received or buffered keystroke is
         # incomplete, (which may be a multibyte encoding), block until until
@@ -3315,7 +3937,8 @@ class Terminal():
 
             # and then resolve for sequence
             ks = resolve_sequence(ucs, self._keymap, self._keycodes, self._keymap_prefixes,
-                                  final=False, dec_mode_cache=self._dec_mode_cache)
+                                  final=False, dec_mode_cache=self._dec_mode_cache,
+                                  index=self._keymap_index)
 
         # handle escape key (KEY_ESCAPE) vs. escape sequence (like those
         # that begin with \x1b[ or \x1bO) up to esc_delay when
@@ -3339,13 +3962,18 @@ class Terminal():
                 # re-check 'final' after reading more bytes
                 final = bool(ucs) and not self._is_incomplete_keystroke(ucs)
                 ks = resolve_sequence(ucs, self._keymap, self._keycodes, self._keymap_prefixes,
-                                      final=final, dec_mode_cache=self._dec_mode_cache)
+                                      final=final, dec_mode_cache=self._dec_mode_cache,
+                                      index=self._keymap_index)
+            if self._stats is not None:
+                self._stats.escape_delay_waits += 1
+                self._stats.escape_delay_seconds += time.time() - esctime
 
             # If we still have KEY_ESCAPE and ucs is a prefix, resolve with final=True
             # to handle unmatched sequences like '\x1b[' (CSI)
             if ks.code == self.KEY_ESCAPE and self._is_incomplete_keystroke(ucs):
                 ks = resolve_sequence(ucs, self._keymap, self._keycodes, self._keymap_prefixes,
-                                      final=True, dec_mode_cache=self._dec_mode_cache)
+                                      final=True, dec_mode_cache=self._dec_mode_cache,
+                                      index=self._keymap_index)
 
         # buffer any remaining text received
         self.ungetch(ucs[len(ks):])
@@ -3354,14 +3982,38 @@ class Terminal():
         if ks._mode == _DecPrivateMode.IN_BAND_WINDOW_RESIZE:  # pylint: disable=protected-access
             event_vals = ks._mode_values  # pylint: disable=protected-access
             assert isinstance(event_vals, ResizeEvent)
+            self._size_cache = None
             self._preferred_size_cache = WINSZ(
                 ws_row=event_vals.height_chars,
                 ws_col=event_vals.width_chars,
                 ws_xpixel=event_vals.width_pixels,
                 ws_ypixel=event_vals.height_pixels)
-
+            if self._resize_quiet_period is not None:
+                ks = self._coalesce_resize(ks, self._resize_quiet_period, esc_delay)
         return ks
 
+    def _coalesce_resize(self, ks: Keystroke, quiet_period: float,
+                         esc_delay: float) -> Keystroke:
+        """
+        Return the last of consecutive resize events received within *quiet_period* of another.
+
+        A keystroke received other than a resize event is buffered for the next :meth:`inkey`.
+        """
+        self._resize_quiet_period = None
+        try:
+            while True:
+                following = self._inkey(quiet_period, esc_delay)
+                if following.mode != _DecPrivateMode.IN_BAND_WINDOW_RESIZE:
+                    self._unread(following)
+                    return ks
+                ks = following
+        finally:
+            self._resize_quiet_period = quiet_period
+
+    def _unread(self, text: str) -> None:
+        """Buffer *text* as keyboard input before any already buffered, unlike :meth:`ungetch`."""
+        self._keyboard_buf.extend(reversed(text))
+
     async def async_inkey(
         self, timeout: Optional[float] = None,
         esc_delay: float = DEFAULT_ESCDELAY,
@@ -3389,6 +4041,15 @@ class Terminal():
         :returns: :class:`~.Keystroke`, which may be empty (``''``) if
             ``timeout`` is specified and keystroke is not received.
         """
+        stime = time.time()
+        ks = await self._async_inkey(timeout, esc_delay)
+        if self._stats is not None:
+            self._stats.inkey_calls += 1
+            self._stats.inkey_seconds += time.time() - stime
+        return ks
+
+    async def _async_inkey(self, timeout: Optional[float], esc_delay: float) -> Keystroke:
+        """Read and return the next keyboard event of :meth:`async_inkey`."""
         # pylint: disable=too-complex,too-many-branches
         loop = asyncio.get_running_loop()
 
@@ -3398,7 +4059,8 @@ class Terminal():
         # resolve any buffered keystroke
         ks = resolve_sequence(ucs, self._keymap, self._keycodes,
                               self._keymap_prefixes, final=False,
-                              dec_mode_cache=self._dec_mode_cache)
+                              dec_mode_cache=self._dec_mode_cache,
+                              index=self._keymap_index)
 
         # read bytes until a complete keystroke is resolved
         while not ks:
@@ -3418,7 +4080,8 @@ class Terminal():
 
             ks = resolve_sequence(ucs, self._keymap, self._keycodes,
                                   self._keymap_prefixes, final=False,
-                                  dec_mode_cache=self._dec_mode_cache)
+                                  dec_mode_cache=self._dec_mode_cache,
+                                  index=self._keymap_index)
 
         # escape key disambiguation: wait esc_delay for more bytes
         if ks.code == self.KEY_ESCAPE and len(ks) == 1:
@@ -3440,13 +4103,15 @@ class Terminal():
                 ks = resolve_sequence(
                     ucs, self._keymap, self._keycodes,
                     self._keymap_prefixes, final=final,
-                    dec_mode_cache=self._dec_mode_cache)
+                    dec_mode_cache=self._dec_mode_cache,
+                    index=self._keymap_index)
 
             if ks.code == self.KEY_ESCAPE and self._is_incomplete_keystroke(ucs):
                 ks = resolve_sequence(
                     ucs, self._keymap, self._keycodes,
                     self._keymap_prefixes, final=True,
-                    dec_mode_cache=self._dec_mode_cache)
+                    dec_mode_cache=self._dec_mode_cache,
+                    index=self._keymap_index)
 
         # buffer any remaining text
         self.ungetch(ucs[len(ks):])
@@ -3455,14 +4120,32 @@ class Terminal():
         if ks._mode == _DecPrivateMode.IN_BAND_WINDOW_RESIZE:  # pylint: disable=protected-access
             event_vals = ks._mode_values  # pylint: disable=protected-access
             assert isinstance(event_vals, ResizeEvent)
+            self._size_cache = None
             self._preferred_size_cache = WINSZ(
                 ws_row=event_vals.height_chars,
                 ws_col=event_vals.width_chars,
                 ws_xpixel=event_vals.width_pixels,
                 ws_ypixel=event_vals.height_pixels)
+            if self._resize_quiet_period is not None:
+                ks = await self._async_coalesce_resize(ks, self._resize_quiet_period,
+                                                       esc_delay)
 
         return ks
 
+    async def _async_coalesce_resize(self, ks: Keystroke, quiet_period: float,
+                                     esc_delay: float) -> Keystroke:
+        """Asynchronous version of :meth:`_coalesce_resize`."""
+        self._resize_quiet_period = None
+        try:
+            while True:
+                following = await self._async_inkey(quiet_period, esc_delay)
+                if following.mode != _DecPrivateMode.IN_BAND_WINDOW_RESIZE:
+                    self._unread(following)
+                    return ks
+                ks = following
+        finally:
+            self._resize_quiet_period = quiet_period
+
     async def _async_read_byte(
         self,
         loop: "asyncio.AbstractEventLoop",  # noqa: F821
@@ -3481,14 +4164,12 @@ class Terminal():
         fut: asyncio.Future[bytes] = loop.create_future()
 
         def _on_readable() -> None:
-            if not fut.done():
-                try:
-                    data = os.read(self._keyboard_fd, 1)
-                    fut.set_result(data)
-                except OSError as exc:
-                    fut.set_exception(exc)
+            self._read_byte_into(fut)
 
         loop.add_reader(self._keyboard_fd, _on_readable)
+        if self._stats is not None:
+            # awaiting the keyboard by the event loop, rather than by kbhit()
+            self._stats.kbhit_calls += 1
         try:
             if timeout is not None:
                 try:
@@ -3499,6 +4180,80 @@ class Terminal():
         finally:
             loop.remove_reader(self._keyboard_fd)
 
+    def _read_byte_into(self, fut: "asyncio.Future[bytes]") -> None:
+        """Read one byte from keyboard fd into *fut*, once readable by the event loop."""
+        if fut.done():
+            return
+        assert self._keyboard_fd is not None
+        try:
+            data = os.read(self._keyboard_fd, 1)
+        except OSError as exc:
+            fut.set_exception(exc)
+            return
+        if self._stats is not None:
+            self._stats.getch_calls += 1
+            self._stats.bytes_read += len(data)
+        fut.set_result(data)
+
+    def run(self, on_frame: Callable[[], Any],
+            on_key: Optional[Callable[[Keystroke], Any]] = None,
+            fps: float = 30.0, animate: bool = False,
+            quiet_period: Optional[float] = None) -> None:
+        """
+        Run a render loop of keyboard input and frames until *on_key* returns ``False``.
+
+        *on_frame* draws the screen within :meth:`frame`, when the loop begins and after each
+        keystroke or window resize, coalescing any number of them into one redraw, no more than
+        *fps* times a second.  Each keystroke is passed to *on_key*.  Keyboard input, resize,
+        and the next frame are awaited by one :func:`select.select` call.  For timers and other
+        control of the loop, use a :class:`~.Scheduler` directly.
+
+        Should be called within :meth:`cbreak` or :meth:`raw`::
+
+            def draw():
+                print(term.home + term.clear + f'pressed: {keys}', end='')
+
+            def on_key(key):
+                keys.append(key)
+                return key != 'q'
+
+            with term.cbreak(), term.fullscreen():
+                term.run(draw, on_key)
+
+        :arg on_frame: Function drawing the screen, called without arguments.
+        :arg on_key: Function called with each :class:`~.Keystroke` received, stopping the loop
+            when it returns ``False``.
+        :arg float fps: Largest number of frames drawn per second.
+        :arg bool animate: Whether to draw frames continuously, at *fps*.
+        :arg float quiet_period: Seconds without another window resize before one is handled, or
+            ``None`` to handle each at once.
+        :raises ValueError: *fps* is not positive.
+        """
+        Scheduler(self, on_frame, on_key, fps=fps, animate=animate,
+                  quiet_period=quiet_period).run()
+
+    async def async_run(self, on_frame: Callable[[], Any],
+                        on_key: Optional[Callable[[Keystroke], Any]] = None,
+                        fps: float = 30.0, animate: bool = False,
+                        quiet_period: Optional[float] = None) -> None:
+        """
+        Asynchronous version of :meth:`run` for use with :mod:`asyncio`.
+
+        Keyboard input and resize are awaited by the event loop, so that other tasks run while
+        the screen is idle.
+
+        :arg on_frame: Function drawing the screen, called without arguments.
+        :arg on_key: Function called with each :class:`~.Keystroke` received, stopping the loop
+            when it returns ``False``.
+        :arg float fps: Largest number of frames drawn per second.
+        :arg bool animate: Whether to draw frames continuously, at *fps*.
+        :arg float quiet_period: Seconds without another window resize before one is handled, or
+            ``None`` to handle each at once.
+        :raises ValueError: *fps* is not positive.
+        """
+        await Scheduler(self, on_frame, on_key, fps=fps, animate=animate,
+                        quiet_period=quiet_period).run_async()
+
 
 class WINSZ(collections.namedtuple('WINSZ', (
         'ws_row', 'ws_col', 'ws_xpixel', 'ws_ypixel'))):
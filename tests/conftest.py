@@ -159,3 +159,20 @@ def many_lines(request):
 def many_columns(request):
     """Various number of columns for screen width."""
     return request.param
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def numpy_backend(request, monkeypatch):
+    """
+    Run a test with and without NumPy, when it is installed.
+
+    The module of the NumPy backend is named by ``NUMPY_BACKEND_MODULE`` of the test module, and
+    its ``numpy`` attribute is set to None for the pure python backend.
+    """
+    module = request.module.NUMPY_BACKEND_MODULE
+    if request.param == 'numpy':
+        if module.numpy is None:
+            pytest.skip('numpy not installed')
+    else:
+        monkeypatch.setattr(module, 'numpy', None)
+    return request.param
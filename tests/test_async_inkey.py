@@ -149,6 +149,36 @@ def test_async_inkey_resize_event():
     assert output == 'OK'
 
 
+def test_async_inkey_resize_quiet_period():
+    """async_inkey coalesces consecutive resize events into the last, given a quiet period."""
+    def child(term):
+        os.write(sys.__stdout__.fileno(), SEMAPHORE)
+        # local
+        from blessed.terminal import _DecPrivateMode
+        term._dec_mode_cache[_DecPrivateMode.IN_BAND_WINDOW_RESIZE] = True
+        term._resize_quiet_period = 0.2
+        with term.cbreak():
+            loop = asyncio.new_event_loop()
+            try:
+                ks = loop.run_until_complete(term.async_inkey(timeout=2.0))
+                following = loop.run_until_complete(term.async_inkey(timeout=2.0))
+            finally:
+                loop.close()
+            assert ks.name == 'RESIZE_EVENT'
+            assert (term.height, term.width) == (30, 100)
+            assert following == 'x'
+            return b'OK'
+
+    def parent(master_fd):
+        read_until_semaphore(master_fd)
+        os.write(master_fd, b'\x1b[48;24;80;480;1600t')
+        time.sleep(0.05)
+        os.write(master_fd, b'\x1b[48;30;100;600;2000tx')
+
+    output = pty_test(child, parent, 'test_async_inkey_resize_quiet_period')
+    assert output == 'OK'
+
+
 def test_async_read_byte_oserror_propagates():
     """OSError from os.read propagates through the future."""
     @as_subprocess
@@ -1,8 +1,15 @@
-"""Performance benchmarks for blessed Sequence methods."""
+"""Performance benchmarks for blessed Sequence methods, input decoding, formatting, and colors."""
+# 3rd party
+import pytest
+
 # local
+from blessed.color import rgb_to_lab
+from blessed.keyboard import Keystroke, _read_until, resolve_sequence
+from blessed.dec_modes import DecPrivateMode
+from blessed.formatters import ParameterizingString
+from blessed.line_editor import LineEditor
 from .accessories import TestTerminal
 
-
 # Test data (raw strings, no Terminal dependency at module level)
 TEXT_ASCII = "Hello world " * 100
 TEXT_CJK = "コンニチハ セカイ " * 50
@@ -204,3 +211,126 @@ def test_wrap_emoji_zwj(benchmark):
     """Benchmark wrap() with ZWJ emoji sequences."""
     term = TestTerminal(force_styling=True)
     benchmark(term.wrap, TEXT_EMOJI_ZWJ, 40)
+
+
+# resolve_sequence() benchmarks
+
+INPUT_SEQUENCES = {
+    'legacy_csi': '\x1b[A',
+    'legacy_ss3': '\x1bOP',
+    'legacy_tilde': '\x1b[15~',
+    'modified_csi': '\x1b[1;5A',
+    'kitty': '\x1b[97;5u',
+    'mouse_sgr': '\x1b[<0;10;20M',
+    'paste': '\x1b[200~' + 'pasted text ' * 20 + '\x1b[201~',
+    'alphanumeric': 'a',
+}
+
+# DEC private modes enabled, so that mouse and paste events are decoded
+DEC_MODES_ENABLED = {DecPrivateMode.MOUSE_EXTENDED_SGR: 1,
+                     DecPrivateMode.MOUSE_REPORT_CLICK: 1,
+                     DecPrivateMode.BRACKETED_PASTE: 1}
+
+
+@pytest.mark.parametrize('name', list(INPUT_SEQUENCES))
+def test_resolve_sequence(benchmark, name):
+    """Benchmark resolve_sequence() of legacy, kitty, mouse, and paste input."""
+    term = TestTerminal(force_styling=True)
+    benchmark(resolve_sequence, INPUT_SEQUENCES[name], term._keymap, term._keycodes,
+              term._keymap_prefixes, final=True, dec_mode_cache=DEC_MODES_ENABLED,
+              index=term._keymap_index)
+
+
+@pytest.mark.parametrize('name', list(INPUT_SEQUENCES))
+def test_keystroke_dispatch(benchmark, name):
+    """Benchmark name, value, and modifiers of a keystroke, as read repeatedly by dispatch."""
+    term = TestTerminal(force_styling=True)
+    ks = resolve_sequence(INPUT_SEQUENCES[name], term._keymap, term._keycodes,
+                          term._keymap_prefixes, final=True, dec_mode_cache=DEC_MODES_ENABLED)
+    benchmark(lambda: (ks.name, ks.value, ks.modifiers))
+
+
+def test_keystroke_predicates(benchmark):
+    """Benchmark modifier, application key, and mouse predicates of a keystroke."""
+    term = TestTerminal(force_styling=True)
+    ks = resolve_sequence('\x1b[1;5A', term._keymap, term._keycodes, term._keymap_prefixes,
+                          final=True)
+    benchmark(lambda: (ks.is_ctrl('a'), ks.is_ctrl_up(), ks.is_shift_f1_released(),
+                       ks.is_mouse_left()))
+
+
+# _read_until() benchmarks
+
+def test_read_until(benchmark):
+    """Benchmark _read_until() of a cursor position report following keyboard input."""
+    term = TestTerminal(force_styling=True)
+
+    def read_response():
+        term.ungetch('typed input\x1b[10;20R')
+        return _read_until(term, r'\x1b\[(\d+);(\d+)R', timeout=0)
+    benchmark(read_response)
+
+
+# Terminal initialization and formatting benchmarks
+
+def test_terminal_init(benchmark):
+    """Benchmark Terminal() initialization."""
+    benchmark(TestTerminal, force_styling=True)
+
+
+def test_getattr_compound(benchmark):
+    """Benchmark __getattr__ resolution of a compound formatter, bypassing its cache."""
+    term = TestTerminal(force_styling=True)
+    benchmark(term.__getattr__, 'bold_underline_red_on_bright_blue')
+
+
+def test_parameterizing_string_call(benchmark):
+    """Benchmark ParameterizingString.__call__ of cursor movement."""
+    term = TestTerminal(force_styling=True)
+    assert isinstance(term.move, ParameterizingString)
+    benchmark(term.move, 10, 20)
+
+
+def test_formatting_string_call(benchmark):
+    """Benchmark calling a compound formatter with text."""
+    term = TestTerminal(force_styling=True)
+    benchmark(term.bold_red_on_blue, TEXT_ASCII)
+
+
+# rgb_downconvert() benchmarks
+
+# every 17th color of each channel, 3375 colors
+RGB_COLORS = [(red, green, blue) for red in range(0, 256, 17)
+              for green in range(0, 256, 17) for blue in range(0, 256, 17)]
+
+
+@pytest.mark.parametrize('number_of_colors', [16, 256])
+@pytest.mark.parametrize('algorithm', ['rgb', 'rgb-weighted', 'cie76', 'cie94', 'cie2000'])
+def test_rgb_downconvert(benchmark, algorithm, number_of_colors):
+    """Benchmark rgb_downconvert() of many colors by each distance algorithm."""
+    term = TestTerminal(force_styling=True)
+    term.number_of_colors = number_of_colors
+    term.color_distance_algorithm = algorithm
+
+    def downconvert_all():
+        return [term.rgb_downconvert(*rgb) for rgb in RGB_COLORS]
+    # the colors fit in the rgb_to_lab() cache, clear it so each round converts every color
+    benchmark.pedantic(downconvert_all, setup=rgb_to_lab.cache_clear, rounds=20)
+
+
+# LineEditor.feed_key() benchmarks
+
+def test_line_editor_feed_key(benchmark):
+    """Benchmark LineEditor.feed_key() of typing, cursor movement, and deletion."""
+    term = TestTerminal(force_styling=True)
+    keys = (list('The quick brown fox jumps over the lazy dog. ') +
+            [Keystroke('\x1b[D', code=term.KEY_LEFT, name='KEY_LEFT')] * 10 +
+            [Keystroke('\x7f', code=term.KEY_BACKSPACE, name='KEY_BACKSPACE')] * 5 +
+            [Keystroke('\x1b[F', code=term.KEY_END, name='KEY_END')] + list('more text'))
+
+    def edit_line():
+        editor = LineEditor()
+        for key in keys:
+            editor.feed_key(key)
+        return editor
+    benchmark(edit_line)
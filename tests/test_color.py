@@ -7,12 +7,23 @@ import re
 import pytest
 
 # local
-from blessed.color import COLOR_DISTANCE_ALGORITHMS
-from blessed.colorspace import RGBColor
+import blessed.color
+from blessed.color import (COLOR_DISTANCE_ALGORITHMS,
+                           COLOR_DISTANCE_LAB_ALGORITHMS,
+                           COLOR_DISTANCE_BATCH_ALGORITHMS,
+                           rgb_to_lab,
+                           palette_lab,
+                           bayer_dither,
+                           rgb_to_lab_batch,
+                           nearest_color_batch,
+                           floyd_steinberg_dither)
+from blessed.colorspace import RGB_256TABLE, RGBColor
 from blessed.formatters import FormattingString, NullCallableString
 # local
 from .accessories import TestTerminal, as_subprocess
 
+NUMPY_BACKEND_MODULE = blessed.color
+
 
 @pytest.fixture(params=COLOR_DISTANCE_ALGORITHMS.keys())
 def all_algorithms(request):
@@ -498,3 +509,216 @@ def test_get_bgcolor_hex_timeout():
         result = t.get_bgcolor_hex(timeout=0)
         assert result == ''
     child()
+
+
+def test_palette_lab():
+    """Test palette_lab of palette and other colors equals rgb_to_lab."""
+    for rgb in [(0, 0, 0), (95, 135, 175), (238, 238, 238), (128, 0, 0), (1, 2, 3)]:
+        assert palette_lab(rgb) == rgb_to_lab.__wrapped__(*rgb)
+
+
+@pytest.mark.parametrize('algorithm', list(COLOR_DISTANCE_LAB_ALGORITHMS))
+def test_distance_lab(algorithm):
+    """Test distance of CIE-Lab colors equals distance of the same RGB colors."""
+    rgb1, rgb2 = (215, 95, 0), (200, 100, 50)
+    lab1, lab2 = rgb_to_lab(*rgb1), rgb_to_lab(*rgb2)
+    assert (COLOR_DISTANCE_LAB_ALGORITHMS[algorithm](lab1, lab2) ==
+            COLOR_DISTANCE_ALGORITHMS[algorithm](rgb1, rgb2))
+
+
+# a spread of colors, including grays, primaries, and near-black and near-white
+BATCH_COLORS = [(0, 0, 0), (255, 255, 255), (128, 128, 128), (255, 0, 0), (0, 255, 0),
+                (0, 0, 255), (1, 2, 3), (254, 253, 252), (95, 135, 175)] + [
+    ((n * 37) % 256, (n * 101) % 256, (n * 197) % 256) for n in range(200)]
+
+
+@pytest.mark.usefixtures('numpy_backend')
+def test_rgb_to_lab_batch():
+    """Test rgb_to_lab_batch matches rgb_to_lab of each color."""
+    result = rgb_to_lab_batch(BATCH_COLORS)
+    # NumPy arrays are of shape (count, 3), array.array is flat
+    flat = list(result.ravel() if hasattr(result, 'ravel') else result)
+    expected = [value for rgb in BATCH_COLORS for value in rgb_to_lab(*rgb)]
+    assert flat == pytest.approx(expected, abs=1e-9)
+
+
+@pytest.mark.usefixtures('numpy_backend')
+def test_distance_batch(all_algorithms):  # pylint: disable=redefined-outer-name
+    """Test batch distances match the scalar distance of each pair, of pairs and one color."""
+    fn_batch = COLOR_DISTANCE_BATCH_ALGORITHMS[all_algorithms]
+    fn_scalar = COLOR_DISTANCE_ALGORITHMS[all_algorithms]
+    others = BATCH_COLORS[::-1]
+    expected = [fn_scalar(rgb1, rgb2) for rgb1, rgb2 in zip(BATCH_COLORS, others)]
+    assert list(fn_batch(BATCH_COLORS, others)) == pytest.approx(expected, abs=1e-6)
+
+    target = (200, 100, 50)
+    expected = [fn_scalar(target, rgb) for rgb in BATCH_COLORS]
+    assert list(fn_batch(target, BATCH_COLORS)) == pytest.approx(expected, abs=1e-6)
+    buffer = bytes(value for rgb in BATCH_COLORS for value in rgb)
+    assert list(fn_batch(target, buffer)) == pytest.approx(expected, abs=1e-6)
+
+
+@pytest.mark.usefixtures('numpy_backend')
+def test_nearest_color_batch():
+    """Test nearest_color_batch chooses the first of nearest palette colors."""
+    palette = [(0, 0, 0), (255, 0, 0), (255, 0, 0), (255, 255, 255)]
+    colors = [(10, 10, 10), (200, 30, 30), (250, 250, 250), (10, 10, 10)]
+    assert list(nearest_color_batch(colors, palette, 'rgb')) == [0, 1, 3, 0]
+
+
+@pytest.mark.usefixtures('numpy_backend')
+@pytest.mark.parametrize('number_of_colors', [0, 8, 16, 256])
+def test_rgb_downconvert_batch(all_algorithms, number_of_colors):
+    # pylint: disable=redefined-outer-name
+    """Test rgb_downconvert_batch matches rgb_downconvert of each color."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(force_styling=True)
+        term.number_of_colors = number_of_colors
+        term.color_distance_algorithm = all_algorithms
+        expected = [term.rgb_downconvert(*rgb) for rgb in BATCH_COLORS]
+        assert list(term.rgb_downconvert_batch(BATCH_COLORS)) == expected
+        buffer = bytes(value for rgb in BATCH_COLORS for value in rgb)
+        assert list(term.rgb_downconvert_batch(buffer)) == expected
+    child()
+
+
+def _codes(result):
+    # color codes of a NumPy array or array.array, as a flat list
+    return result.ravel().tolist() if hasattr(result, 'ravel') else list(result)
+
+
+@pytest.mark.usefixtures('numpy_backend')
+@pytest.mark.parametrize('method', ['bayer', 'floyd-steinberg'])
+def test_rgb_downconvert_dithered_mixes_colors(method):
+    """Test a color between two palette colors is dithered by both, in proportion."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(force_styling=True)
+        term.number_of_colors = 256
+        term.color_distance_algorithm = 'rgb'
+        # a gray between cube levels 95 (#59) and 135 (#102), three quarters toward 135,
+        # with the gray ramp out of reach by a strong red channel
+        width, height = 16, 16
+        pixels = bytes((255, 125, 125)) * (width * height)
+        codes = _codes(term.rgb_downconvert_dithered(pixels, width, height, method))
+        assert len(codes) == width * height
+        assert set(codes) == {16 + 36 * 5 + 6 * 1 + 1, 16 + 36 * 5 + 6 * 2 + 2}
+        assert 0.6 < codes.count(16 + 36 * 5 + 6 * 2 + 2) / len(codes) < 0.9
+        # exact palette colors are not dithered
+        pixels = bytes((255, 135, 135)) * (width * height)
+        codes = _codes(term.rgb_downconvert_dithered(pixels, width, height, method))
+        assert set(codes) == {16 + 36 * 5 + 6 * 2 + 2}
+    child()
+
+
+@pytest.mark.parametrize('method', ['bayer', 'floyd-steinberg'])
+def test_rgb_downconvert_dithered_palette_of_16(method):
+    """Test dithering to 256 colors with a palette of only 16 colors, and invalid palettes."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(force_styling=True)
+        term.number_of_colors = 256
+        term.palette = RGB_256TABLE[:16]
+        width, height = 8, 8
+        pixels = bytes((255, 125, 125)) * (width * height)
+        codes = _codes(term.rgb_downconvert_dithered(pixels, width, height, method))
+        assert len(codes) == width * height and all(code >= 16 for code in codes)
+        with pytest.raises(ValueError, match='at least 16 colors'):
+            term.palette = RGB_256TABLE[:8]
+        assert len(term.palette) == 16
+    child()
+
+
+def test_bayer_dither_backends_agree():
+    """Test bayer_dither is identical with and without NumPy."""
+    if blessed.color.numpy is None:
+        pytest.skip('numpy not installed')
+    width, height = 21, 11
+    pixels = bytes((x * 37 + y * 11) % 256 for y in range(height) for x in range(width * 3))
+    expected = bayer_dither(pixels, width, height, spread=51).tobytes()
+    blessed.color.numpy, numpy = None, blessed.color.numpy
+    try:
+        assert bayer_dither(pixels, width, height, spread=51) == expected
+    finally:
+        blessed.color.numpy = numpy
+
+
+def test_floyd_steinberg_dither_cache():
+    """Test floyd_steinberg_dither quantizes each distinct color once, shared by cache."""
+    calls = []
+
+    def quantize(rgb):
+        calls.append(rgb)
+        return (0, (0, 0, 0)) if sum(rgb) < 384 else (1, (255, 255, 255))
+    cache = {}
+    first = _codes(floyd_steinberg_dither(bytes([128]) * 48, 4, 4, quantize, cache=cache))
+    assert len(calls) == len(set(calls)) == len(cache)
+    count = len(calls)
+    second = _codes(floyd_steinberg_dither(bytes([128]) * 48, 4, 4, quantize, cache=cache))
+    assert first == second and len(calls) == count
+    assert first.count(1) == 8
+
+
+@pytest.mark.parametrize('kwargs,match', [
+    ({'method': 'atkinson'}, 'method must be one of'),
+    ({'width': 3}, 'expected 18 bytes'),
+])
+def test_rgb_downconvert_dithered_invalid(kwargs, match):
+    """Test rgb_downconvert_dithered raises ValueError for bad arguments."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(force_styling=True)
+        with pytest.raises(ValueError, match=match):
+            term.rgb_downconvert_dithered(bytes(12), **{'width': 2, 'height': 2, **kwargs})
+    child()
+
+
+def test_get_palette():
+    """Test get_palette parses OSC 4 responses of many registers, re-buffering other input."""
+    from io import StringIO
+
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=StringIO(), force_styling=True, is_a_tty=True)
+        term.ungetch('\x1b]4;1;rgb:0000/8080/0000\x07x'
+                     '\x1b]4;9;rgb:ffff/ffff/0000\x1b\\')
+        palette = term.get_palette(timeout=0.01)
+        assert palette is not None
+        assert palette == term.palette
+        assert len(term.palette) == 256
+        assert term.palette[1] == (0, 128, 0) and term.palette[9] == (255, 255, 0)
+        assert term.palette[2] == RGB_256TABLE[2]
+        assert term.inkey(timeout=0) == 'x'
+        query = term.stream.getvalue()
+        assert query.count('\x1b]4;') == 256 and query.endswith('\x1b]4;255;?\x07\x1b[6n')
+
+        # cached, and used by downconversion of 16 colors
+        assert term.get_palette(timeout=0.01) is palette
+        term.number_of_colors = 16
+        assert term.rgb_downconvert(0, 120, 0) == 1
+        assert term.rgb_downconvert(250, 250, 10) == 9
+        assert list(term.rgb_downconvert_batch([(0, 120, 0)])) == [1]
+    child()
+
+
+def test_get_palette_no_response():
+    """Test get_palette returns None without response, and the default palette remains."""
+    from io import StringIO
+
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=StringIO(), force_styling=True, is_a_tty=True)
+        assert term.get_palette(timeout=0.01) is None
+        assert term.palette == RGB_256TABLE
+        # sticky, until forced
+        term.ungetch('\x1b]4;1;rgb:0000/8080/0000\x07')
+        assert term.get_palette(timeout=0.01) is None
+        palette = term.get_palette(timeout=0.01, force=True)
+        assert palette is not None
+        assert palette == term.palette
+        assert term.palette[1] == (0, 128, 0)
+
+        term = TestTerminal(stream=StringIO(), force_styling=True)
+        assert term.get_palette(timeout=0.01) is None
+    child()
@@ -6,6 +6,7 @@ import os
 import sys
 import math
 import time
+import signal
 import platform
 import warnings
 import importlib
@@ -17,7 +18,7 @@ import pytest
 
 # local
 from .conftest import IS_WINDOWS
-from .accessories import TestTerminal, unicode_cap, as_subprocess, pty_test
+from .accessories import TestTerminal, pty_test, unicode_cap, as_subprocess, make_enabled_dec_cache
 
 
 def test_export_only_Terminal():
@@ -369,6 +370,50 @@ def test_winsize_IOError_returns_environ():
     child()
 
 
+@pytest.mark.skipif(IS_WINDOWS, reason="SIGWINCH is not supported on Windows")
+def test_cached_size():
+    """Test the window size is read once within cached_size(), until SIGWINCH."""
+    @as_subprocess
+    def child():
+        # local
+        from blessed.terminal import WINSZ
+        calls = []
+        received = []
+
+        def winsize(fd):
+            calls.append(fd)
+            return WINSZ(ws_row=24 + len(calls), ws_col=80, ws_xpixel=0, ws_ypixel=0)
+
+        def previous(signum, frame):
+            received.append(signum)
+
+        signal.signal(signal.SIGWINCH, previous)
+        term = TestTerminal()
+        term._winsize = winsize
+        assert term.height == 25 and term.height == 26
+
+        with term.cached_size():
+            assert (term.height, term.width, term.height) == (27, 80, 27)
+            assert len(calls) == 3
+            os.kill(os.getpid(), signal.SIGWINCH)
+            assert received == [signal.SIGWINCH]
+            assert term.height == 28 and term.height == 28
+            with term.cached_size():
+                assert term.height == 28
+            # in-band resize notifications are preferred, and supersede the cached size
+            term._dec_mode_cache = make_enabled_dec_cache()
+            term.ungetch('\x1b[48;30;100;600;1000t')
+            assert term.inkey(timeout=0).name == 'RESIZE_EVENT'
+            assert (term.height, term.width) == (30, 100)
+            term._preferred_size_cache = None
+            assert term.height == 29
+
+        assert signal.getsignal(signal.SIGWINCH) is previous
+        assert term.height == 30 and term.height == 31
+
+    child()
+
+
 def test_yield_fullscreen(all_terms):
     """Ensure ``fullscreen()`` writes enter_fullscreen and exit_fullscreen."""
     @as_subprocess
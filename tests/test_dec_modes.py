@@ -2,6 +2,7 @@
 # std imports
 import io
 import re
+import contextlib
 from unittest import mock
 
 # 3rd party
@@ -1064,6 +1065,41 @@ def test_resize_events(sequence, h_chars, w_chars, h_pix, w_pix):
     assert values.width_pixels == w_pix
 
 
+def test_dec_mode_cache_event_matchers():
+    """Test DEC event patterns of a terminal are compiled once, and again when modes change."""
+    @as_subprocess
+    def child():
+        from blessed import keyboard
+        term = TestTerminal(stream=io.StringIO(), force_styling=True)
+        cache = term._dec_mode_cache
+        with mock.patch.object(keyboard, '_compile_dec_event_matchers',
+                               wraps=keyboard._compile_dec_event_matchers) as compile_matchers:
+            term._dec_mode_set_enabled(_DPM.FOCUS_IN_OUT_EVENTS, _DPM.MOUSE_EXTENDED_SGR,
+                                       _DPM.MOUSE_SGR_PIXELS, _DPM.MOUSE_REPORT_CLICK,
+                                       _DPM.MOUSE_REPORT_DRAG)
+            assert _match_dec_event('\x1b[I', cache).mode == _DPM.FOCUS_IN_OUT_EVENTS
+            assert _match_dec_event('\x1b[<0;1;2M', cache).mode == _DPM.MOUSE_SGR_PIXELS
+            assert _match_dec_event('\x1b[A', cache) is None
+            assert compile_matchers.call_count == 1
+
+            term._dec_mode_set_disabled(_DPM.FOCUS_IN_OUT_EVENTS)
+            assert _match_dec_event('\x1b[I', cache) is None
+            cache[_DPM.BRACKETED_PASTE] = DecModeResponse.SET
+            assert _match_dec_event('\x1b[200~a\x1b[201~', cache).mode == _DPM.BRACKETED_PASTE
+            cache |= {_DPM.FOCUS_IN_OUT_EVENTS: DecModeResponse.SET}
+            assert cache is term._dec_mode_cache
+            assert _match_dec_event('\x1b[I', cache).mode == _DPM.FOCUS_IN_OUT_EVENTS
+            assert compile_matchers.call_count == 4
+
+        # patterns shared by several modes are matched only by the first enabled mode
+        assert [pattern.mode for pattern in cache.event_matchers['M']] == [
+            _DPM.MOUSE_SGR_PIXELS, _DPM.MOUSE_REPORT_DRAG]
+        assert [pattern.mode for pattern in cache.event_matchers['m']] == [_DPM.MOUSE_SGR_PIXELS]
+        cache.clear()
+        assert not cache.event_matchers
+    child()
+
+
 def test_notify_on_resize_context_manager():
     """Test notify_on_resize enables and disables mode correctly."""
     @as_subprocess
@@ -1239,6 +1275,34 @@ def test_inkey_updates_preferred_cache_on_resize_event():
     assert 'OK' in output
 
 
+def test_notify_on_resize_quiet_period():
+    """Test consecutive resize events are coalesced into the last, given a quiet period."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=io.StringIO(), force_styling=True)
+        term._dec_mode_cache = make_enabled_dec_cache()
+        with mock.patch.object(term, 'dec_modes_enabled', return_value=contextlib.nullcontext()):
+            with term.notify_on_resize(quiet_period=0.01):
+                term.ungetch('\x1b[48;24;80;0;0t\x1b[48;30;100;0;0t\x1b[48;40;120;0;0tx'
+                             '\x1b[48;50;132;0;0t')
+                ks = term.inkey(timeout=0)
+                assert ks.name == 'RESIZE_EVENT'
+                assert ks._mode_values == ResizeEvent(40, 120, 0, 0)
+                assert (term.height, term.width) == (40, 120)
+                # a keystroke other than a resize ends coalescing, and is received next
+                assert term.inkey(timeout=0) == 'x'
+                assert term.inkey(timeout=0).name == 'RESIZE_EVENT'
+                assert (term.height, term.width) == (50, 132)
+            assert term._resize_quiet_period is None
+
+            # each resize event is received, without a quiet period
+            with term.notify_on_resize():
+                term.ungetch('\x1b[48;24;80;0;0t\x1b[48;30;100;0;0t')
+                assert term.inkey(timeout=0)._mode_values == ResizeEvent(24, 80, 0, 0)
+                assert term.inkey(timeout=0)._mode_values == ResizeEvent(30, 100, 0, 0)
+    child()
+
+
 def test_does_inband_resize_no_styling():
     """Test does_inband_resize returns False when does_styling is False."""
     stream = io.StringIO()
@@ -0,0 +1,324 @@
+"""Tests for kitty graphics protocol image transmission and the image registry."""
+# std imports
+import io
+import os
+import re
+import zlib
+import base64
+
+# 3rd party
+import pytest
+
+# local
+from blessed.graphics import (KITTY_CHUNK_SIZE,
+                              ImageRegistry,
+                              encode_png,
+                              kitty_place,
+                              kitty_probe,
+                              kitty_delete,
+                              kitty_discard,
+                              iterm2_image,
+                              kitty_transmit)
+from blessed._capabilities import ITerm2Capabilities
+from .conftest import IS_WINDOWS
+from .accessories import TestTerminal, as_subprocess, pty_test
+
+_RE_APC = re.compile(r'\x1b_G([^;\x1b]*);?([^\x1b]*)\x1b\\')
+
+
+def _parse(sequence):
+    """Return control keys and payload of a kitty graphics escape sequence."""
+    match = _RE_APC.fullmatch(sequence)
+    assert match is not None, repr(sequence)
+    keys = dict(item.split('=') for item in match.group(1).split(','))
+    return keys, match.group(2)
+
+
+def test_kitty_transmit_direct_chunks():
+    """Test direct transmission is chunked, only the first carrying control keys."""
+    data = bytes(range(256)) * 30  # 7680 bytes, 10240 in base64
+    sequences = list(kitty_transmit(data, 7, width=40, height=64))
+    assert len(sequences) == 3
+
+    keys, payload = _parse(sequences[0])
+    assert keys == {'a': 't', 'q': '2', 'i': '7', 'f': '24', 's': '40', 'v': '64',
+                    't': 'd', 'm': '1'}
+    assert len(payload) == KITTY_CHUNK_SIZE
+    assert [_parse(seq)[0] for seq in sequences[1:]] == [{'m': '1'}, {'m': '0'}]
+    payloads = [_parse(seq)[1] for seq in sequences]
+    assert all(len(chunk) <= KITTY_CHUNK_SIZE for chunk in payloads)
+    assert base64.standard_b64decode(''.join(payloads)) == data
+
+
+def test_kitty_transmit_direct_single_chunk():
+    """Test small images are sent as one sequence."""
+    keys, payload = _parse(*kitty_transmit(b'\xff\x00\x00\x80', 1, 1, 1, fmt=32))
+    assert keys['m'] == '0' and keys['f'] == '32'
+    assert base64.standard_b64decode(payload) == b'\xff\x00\x00\x80'
+
+
+def test_kitty_transmit_png():
+    """Test PNG data is sent without dimensions."""
+    keys, _ = _parse(*kitty_transmit(b'\x89PNG', 2, fmt=100))
+    assert 's' not in keys and 'v' not in keys
+    assert keys['f'] == '100'
+
+
+def test_kitty_transmit_temp_file():
+    """Test temporary file transmission sends only the path, of a file named for deletion."""
+    keys, payload = _parse(*kitty_transmit(bytes(range(12)), 3, 2, 2, medium='t'))
+    path = base64.standard_b64decode(payload).decode()
+    try:
+        assert keys['t'] == 't'
+        assert 'tty-graphics-protocol' in os.path.basename(path)
+        with open(path, 'rb') as fin:
+            assert fin.read() == bytes(range(12))
+    finally:
+        kitty_discard('t', path)
+    assert not os.path.exists(path)
+
+
+@pytest.mark.skipif(not os.path.isdir('/dev/shm'), reason="requires /dev/shm")
+def test_kitty_transmit_shared_memory():
+    """Test shared memory transmission sends only the object name."""
+    keys, payload = _parse(*kitty_transmit(bytes(range(12)), 4, 2, 2, medium='s'))
+    name = base64.standard_b64decode(payload).decode()
+    path = '/dev/shm' + name
+    try:
+        assert keys['t'] == 's'
+        with open(path, 'rb') as fin:
+            assert fin.read(12) == bytes(range(12))
+    finally:
+        kitty_discard('s', name)
+    assert not os.path.exists(path)
+
+
+def test_kitty_transmit_file():
+    """Test file transmission sends the given path."""
+    keys, payload = _parse(*kitty_transmit('/tmp/image.png', 5, fmt=100, medium='f'))
+    assert keys['t'] == 'f'
+    assert base64.standard_b64decode(payload) == b'/tmp/image.png'
+
+
+@pytest.mark.parametrize('kwargs,match', [
+    ({'fmt': 8}, 'fmt must be one of'),
+    ({'medium': 'x'}, 'medium must be one of'),
+    ({'width': 2, 'height': 2}, 'expected 12 bytes'),
+])
+def test_kitty_transmit_invalid(kwargs, match):
+    """Test kitty_transmit raises ValueError for bad arguments."""
+    with pytest.raises(ValueError, match=match):
+        list(kitty_transmit(bytes(11), 1, **kwargs))
+
+
+def test_kitty_probe_temp_file():
+    """Test kitty_probe queries a single pixel with image id 31."""
+    query, name = kitty_probe('t')
+    try:
+        keys, payload = _parse(query)
+        assert keys == {'a': 'q', 'i': '31', 's': '1', 'v': '1', 'f': '24', 't': 't'}
+        assert base64.standard_b64decode(payload).decode() == name
+    finally:
+        kitty_discard('t', name)
+
+
+def test_kitty_place_and_delete():
+    """Test placement and deletion sequences."""
+    assert kitty_place(3) == '\x1b_Ga=p,q=2,i=3\x1b\\'
+    assert kitty_place(3, columns=10, rows=5, placement_id=2) == (
+        '\x1b_Ga=p,q=2,i=3,p=2,c=10,r=5\x1b\\')
+    assert kitty_delete(3) == '\x1b_Ga=d,q=2,d=I,i=3\x1b\\'
+
+
+def test_upload_kitty_image_allocates_ids():
+    """Test upload_kitty_image allocates image ids and draws by id without resending."""
+    @as_subprocess
+    def child():
+        stream = io.StringIO()
+        term = TestTerminal(stream=stream, force_styling=True, is_a_tty=False)
+        assert term.get_kitty_graphics_medium(timeout=0.01) is None
+        first = term.upload_kitty_image(bytes(3), 1, 1)
+        second = term.upload_kitty_image(bytes(3), 1, 1)
+        assert term.upload_kitty_image(bytes(3), 1, 1, image_id=99) == 99
+        # begun at random, to not collide with images of other programs
+        assert 256 <= first < 1 << 31 and second == first + 1
+        assert _parse(stream.getvalue().split('\x1b\\')[0] + '\x1b\\')[0]['t'] == 'd'
+
+        stream.seek(0)
+        stream.truncate()
+        term.draw_kitty_image(first, columns=2)
+        term.delete_kitty_image(first)
+        assert stream.getvalue() == kitty_place(first, columns=2) + kitty_delete(first)
+    child()
+
+
+@pytest.mark.skipif(IS_WINDOWS, reason="ungetch and PTY testing not supported on Windows")
+def test_get_kitty_graphics_medium_shared_memory():
+    """Test a local session selects shared memory when the terminal reads it."""
+    def child(term):
+        for key in ('SSH_CONNECTION', 'SSH_CLIENT', 'SSH_TTY'):
+            os.environ.pop(key, None)
+        # does_kitty_graphics, then shared memory probe
+        term.ungetch('\x1b_Gi=31;OK\x1b\\\x1b[10;20R' * 2)
+        assert term.get_kitty_graphics_medium(timeout=0.01) == 's'
+        assert term.get_kitty_graphics_medium(timeout=0.01) == 's'
+        return b'OK'
+
+    output = pty_test(child, parent_func=None,
+                      test_name='test_get_kitty_graphics_medium_shared_memory')
+    assert 'OK' in output
+
+
+@pytest.mark.skipif(IS_WINDOWS, reason="ungetch and PTY testing not supported on Windows")
+def test_get_kitty_graphics_medium_temp_file():
+    """Test a local session falls back to a temporary file, then direct transmission."""
+    def child(term):
+        for key in ('SSH_CONNECTION', 'SSH_CLIENT', 'SSH_TTY'):
+            os.environ.pop(key, None)
+        term.ungetch('\x1b_Gi=31;OK\x1b\\\x1b[10;20R'
+                     '\x1b_Gi=31;EBADF:shm\x1b\\\x1b[10;20R'
+                     '\x1b_Gi=31;OK\x1b\\\x1b[10;20R')
+        assert term.get_kitty_graphics_medium(timeout=0.01) == 't'
+        term.ungetch('\x1b_Gi=31;OK\x1b\\\x1b[10;20R'
+                     '\x1b_Gi=31;EBADF:shm\x1b\\\x1b[10;20R'
+                     '\x1b_Gi=31;EBADF:file\x1b\\\x1b[10;20R')
+        assert term.get_kitty_graphics_medium(timeout=0.01, force=True) == 'd'
+        return b'OK'
+
+    output = pty_test(child, parent_func=None,
+                      test_name='test_get_kitty_graphics_medium_temp_file')
+    assert 'OK' in output
+
+
+@pytest.mark.skipif(IS_WINDOWS, reason="ungetch and PTY testing not supported on Windows")
+def test_get_kitty_graphics_medium_remote():
+    """Test a remote session uses direct transmission without probing."""
+    def child(term):
+        os.environ['SSH_CONNECTION'] = '10.0.0.1 22 10.0.0.2 22'
+        term.ungetch('\x1b_Gi=31;OK\x1b\\\x1b[10;20R')
+        assert term.get_kitty_graphics_medium(timeout=0.01) == 'd'
+        return b'OK'
+
+    output = pty_test(child, parent_func=None,
+                      test_name='test_get_kitty_graphics_medium_remote')
+    assert 'OK' in output
+
+
+def test_encode_png():
+    """Test encode_png writes unfiltered scanlines of RGB or RGBA pixels."""
+    png = encode_png(bytes(range(12)), 2, 2)
+    assert png[:8] == b'\x89PNG\r\n\x1a\n'
+    assert png[12:16] == b'IHDR'
+    assert png[16:26] == b'\x00\x00\x00\x02\x00\x00\x00\x02\x08\x02'
+    idat = png.index(b'IDAT')
+    length = int.from_bytes(png[idat - 4:idat], 'big')
+    assert zlib.decompress(png[idat + 4:idat + 4 + length]) == (
+        b'\x00' + bytes(range(6)) + b'\x00' + bytes(range(6, 12)))
+    assert png.endswith(b'IEND\xaeB`\x82')
+    assert encode_png(bytes(16), 2, 2, fmt=32)[25] == 6
+    with pytest.raises(ValueError):
+        encode_png(bytes(12), 2, 2, fmt=100)
+
+
+def test_iterm2_image():
+    """Test iTerm2 inline image sequence."""
+    assert iterm2_image(b'GIF89a') == '\x1b]1337;File=inline=1;size=6:R0lGODlh\x07'
+    assert iterm2_image(b'GIF89a', columns=4, rows=2) == (
+        '\x1b]1337;File=inline=1;size=6;width=4;height=2;preserveAspectRatio=0:R0lGODlh\x07')
+
+
+def _registry_terminal(protocol):
+    stream = io.StringIO()
+    term = TestTerminal(stream=stream, force_styling=True, is_a_tty=False)
+    term._is_a_tty = True
+    term._kitty_graphics_supported = protocol == 'kitty'
+    term._kitty_graphics_medium = 'd'
+    # image ids are otherwise begun at random
+    term._kitty_next_image_id = 1
+    term._iterm2_capabilities_cache = ITerm2Capabilities(supported=protocol == 'iterm2')
+    return term, stream
+
+
+def test_image_registry_kitty_uploads_once():
+    """Test ImageRegistry uploads an image once and places it again by id."""
+    @as_subprocess
+    def child():
+        term, stream = _registry_terminal('kitty')
+        registry = ImageRegistry(term)
+        assert registry.protocol == 'kitty'
+        assert registry.draw(bytes(12), 2, 2, columns=2)
+        first = stream.getvalue()
+        assert first.count('a=t') == 1
+        assert first.endswith(kitty_place(1, columns=2))
+
+        stream.seek(0)
+        stream.truncate()
+        assert registry.draw(bytes(12), 2, 2, columns=2)
+        assert stream.getvalue() == kitty_place(1, columns=2)
+        # same bytes, other dimensions, is another image
+        registry.draw(bytes(12), 4, 1)
+        assert 'i=2' in stream.getvalue()
+        assert len(registry) == 2 and registry.size == 24
+    child()
+
+
+def test_image_registry_kitty_evicts_least_recent():
+    """Test ImageRegistry deletes least recently drawn images when over quota."""
+    @as_subprocess
+    def child():
+        term, stream = _registry_terminal('kitty')
+        registry = ImageRegistry(term, max_bytes=30)
+        red, green, blue = b'\xff\x00\x00' * 4, b'\x00\xff\x00' * 4, b'\x00\x00\xff' * 4
+        registry.draw(red, 2, 2)
+        registry.draw(green, 2, 2)
+        registry.draw(red, 2, 2)
+        stream.seek(0)
+        stream.truncate()
+        # green (id 2) is least recently drawn, and deleted before blue is sent
+        registry.draw(blue, 2, 2)
+        assert stream.getvalue().startswith(kitty_delete(2) + '\x1b_Ga=t,q=2,i=3,')
+        assert len(registry) == 2 and registry.size == 24
+
+        registry.max_images = 1
+        registry.draw(green, 2, 2)
+        assert len(registry) == 1
+        assert kitty_delete(1) in stream.getvalue() and kitty_delete(3) in stream.getvalue()
+
+        stream.seek(0)
+        stream.truncate()
+        registry.clear()
+        assert stream.getvalue() == kitty_delete(4)
+        assert len(registry) == 0 and registry.size == 0
+    child()
+
+
+def test_image_registry_iterm2():
+    """Test ImageRegistry sends cached PNG encoding by the iTerm2 protocol."""
+    @as_subprocess
+    def child():
+        term, stream = _registry_terminal('iterm2')
+        registry = ImageRegistry(term)
+        assert registry.protocol == 'iterm2'
+        pixels = bytes(range(12))
+        assert registry.draw(pixels, 2, 2, columns=1, rows=1)
+        assert registry.draw(pixels, 2, 2, columns=1, rows=1)
+        expected = iterm2_image(encode_png(pixels, 2, 2), columns=1, rows=1)
+        assert stream.getvalue() == expected * 2
+        assert len(registry) == 1
+        stream.seek(0)
+        stream.truncate()
+        registry.clear()
+        assert not stream.getvalue()
+    child()
+
+
+def test_image_registry_unsupported():
+    """Test ImageRegistry draws nothing when neither protocol is supported."""
+    @as_subprocess
+    def child():
+        term, stream = _registry_terminal(None)
+        registry = ImageRegistry(term)
+        assert registry.protocol is None
+        assert registry.draw(bytes(3), 1, 1) is False
+        assert not stream.getvalue()
+    child()
@@ -4,6 +4,7 @@ import io
 import os
 import platform
 import sys
+import codecs
 import tempfile
 from unittest import mock
 
@@ -130,6 +131,24 @@ def test_stdin_notty_kb_is_None():
     child()
 
 
+@pytest.mark.skipif(IS_WINDOWS, reason="pseudo-terminals are not supported on Windows")
+def test_inkey_after_canonical_eof():
+    """An empty read, such as by Ctrl+D in canonical mode, does not end keyboard input."""
+    @as_subprocess
+    def child():
+        master_fd, slave_fd = os.openpty()
+        term = TestTerminal(stream=io.StringIO())
+        term._keyboard_fd = slave_fd
+        term._keyboard_decoder = codecs.getincrementaldecoder('utf-8')()
+        os.write(master_fd, b'\x04')
+        assert term.inkey(timeout=0.1) == ''
+        os.write(master_fd, b'a\n')
+        assert term.inkey(timeout=1) == 'a'
+        os.close(master_fd)
+        os.close(slave_fd)
+    child()
+
+
 def test_keystroke_default_args():
     """Test keyboard.Keystroke constructor with default arguments."""
     from blessed.keyboard import Keystroke
@@ -156,6 +175,41 @@ def test_a_keystroke():
     assert repr(ks) == "the X"
 
 
+def test_keystroke_name_and_value_computed_once():
+    """Test Keystroke name and value are computed by first access, and repr is unchanged."""
+    from blessed.keyboard import Keystroke
+    ks = Keystroke('\x01')
+    with mock.patch.object(Keystroke, '_get_control_char_name',
+                           autospec=True, return_value='KEY_CTRL_A') as get_name, \
+            mock.patch.object(Keystroke, '_get_ctrl_sequence_value',
+                              autospec=True, return_value='a') as get_value:
+        name, value = ks.name, ks.value
+        assert ks.name == name == 'KEY_CTRL_A'
+        assert ks.value == value == 'a'
+    assert get_name.call_count == 1 and get_value.call_count == 1
+    assert repr(ks) == "'\\x01'"
+
+    # a name of None is computed once, too
+    ks = Keystroke('x')
+    with mock.patch.object(Keystroke, '_get_meta_escape_name',
+                           autospec=True, return_value=None) as get_name:
+        assert ks.name is None and ks.name is None
+    assert get_name.call_count == 1
+
+
+def test_resolve_sequence_shares_char_keystrokes():
+    """Test keystrokes of single characters resolved are one instance each."""
+    @as_subprocess
+    def child():
+        from blessed.keyboard import resolve_sequence
+        term = TestTerminal()
+        first = resolve_sequence('ab', term._keymap, term._keycodes, term._keymap_prefixes)
+        assert first == 'a' and first.name is None and first.value == 'a'
+        assert resolve_sequence('a', term._keymap, term._keycodes, term._keymap_prefixes) is first
+        assert resolve_sequence('', term._keymap, term._keycodes, term._keymap_prefixes) == ''
+    child()
+
+
 def test_get_keyboard_codes():
     """Test all values returned by get_keyboard_codes are from curses."""
     import blessed.keyboard
@@ -365,6 +419,25 @@ def test_resolve_sequence_order():
     assert repr(ks) == "KEY_L"
 
 
+def test_resolve_sequence_index():
+    """Test resolve_sequence matches sequences by index, of mapper as it was when indexed."""
+    from blessed.keyboard import resolve_sequence, get_sequence_index, OrderedDict
+    mapper = OrderedDict((('LONGSEQ', 1), ('X', 2)))
+    codes = {1: 'KEY_LONGSEQ', 2: 'KEY_X', 3: 'KEY_LONG', 4: 'KEY_LONGSEQ_4'}
+    index = get_sequence_index(mapper)
+    assert index.lengths == (1, 7)
+    assert resolve_sequence('LONGSEQ', mapper, codes, index=index).code == 1
+
+    mapper['LONG'] = 3
+    mapper['LONGSEQ'] = 4
+    assert resolve_sequence('LONGxx', mapper, codes, index=index) == 'L'
+    assert resolve_sequence('LONGSEQ', mapper, codes, index=index).code == 1
+    # without index, mapper is indexed by each call
+    assert resolve_sequence('LONGxx', mapper, codes).code == 3
+    assert resolve_sequence('LONGSEQ', mapper, codes).code == 4
+    assert resolve_sequence('LONGSEQ', OrderedDict(), codes) == 'L'
+
+
 def test_keyboard_prefixes():
     """Test keyboard.prefixes."""
     from blessed.keyboard import get_leading_prefixes
@@ -10,6 +10,8 @@ from blessed.line_editor import PASSWORD_CHAR, LineEditor
 from blessed.line_editor import LineHistory as History
 from blessed.line_editor import (DisplayState,
                                  LineEditResult,
+                                 FileLineHistory,
+                                 MultiLineEditor,
                                  _apply_hscroll)
 
 
@@ -56,6 +58,7 @@ _CTRL_U = _key("KEY_CTRL_U")
 _CTRL_W = _key("KEY_CTRL_W")
 _CTRL_Y = _key("KEY_CTRL_Y")
 _CTRL_Z = _key("KEY_CTRL_Z")
+_CTRL_SHIFT_Z = _key("KEY_CTRL_SHIFT_Z")
 
 _MT = MockTerminal()
 
@@ -168,6 +171,42 @@ class TestHistory:
         h.add("hello")
         assert h.search_prefix("hello") is None
 
+    def test_search_prefix_after_eviction(self) -> None:
+        """Test prefix search does not return entries evicted by max_entries."""
+        h = History(max_entries=2)
+        h.add("make test")
+        h.add("make")
+        h.add("ls")
+        assert h.search_prefix("make") is None
+        assert h.search_prefix("ma") == "make"
+        h.add("make docs")
+        assert h.search_prefix("make") == "make docs"
+        assert h.search_prefix("make t") is None
+
+    def test_search_prefix_repeated_entry(self) -> None:
+        """Test prefix search with non-consecutive duplicates and shared prefixes."""
+        h = History(max_entries=3)
+        for line in ("abc", "abx", "abc", "ab"):
+            h.add(line)
+        assert h.entries == ["abx", "abc", "ab"]
+        assert h.search_prefix("a") == "ab"
+        assert h.search_prefix("ab") == "abc"
+        assert h.search_prefix("abx") is None
+        h.add("x")
+        assert h.search_prefix("ab") == "abc"
+        h.add("y")
+        assert h.search_prefix("ab") is None
+        assert h.search_prefix("a") == "ab"
+
+    def test_entries_assignment(self) -> None:
+        """Test assigning entries replaces history and rebuilds the index."""
+        h = History(max_entries=2)
+        h.add("old command")
+        h.entries = ["one", "two", "three"]
+        assert h.entries == ["two", "three"]
+        assert h.search_prefix("o") is None
+        assert h.search_prefix("t") == "three"
+
     def test_nav_up_down(self) -> None:
         """Test history navigation up and down through entries."""
         h = History()
@@ -188,6 +227,131 @@ class TestHistory:
         assert h.nav_up() is None
 
 
+class TestFileLineHistory:
+    """Test FileLineHistory persistence, sharing, and compaction."""
+
+    def test_persist_and_lazy_load(self, tmp_path) -> None:
+        """Test entries persist to file and are read on first use only."""
+        path = str(tmp_path / "history")
+        h = FileLineHistory(path)
+        h.add("ls -l")
+        h.add("ls -l")
+        h.add("multi\nline \\n")
+        h2 = FileLineHistory(path)
+        h.add("pwd")
+        assert h2.entries == ["ls -l", "multi\nline \\n", "pwd"]
+        assert h2.search_prefix("mu") == "multi\nline \\n"
+
+    def test_max_entries_on_load(self, tmp_path) -> None:
+        """Test only the most recent max_entries records are loaded."""
+        path = tmp_path / "history"
+        path.write_bytes(b"a\nb\nb\nc\nd\n")
+        assert FileLineHistory(str(path), max_entries=3).entries == ["b", "c", "d"]
+
+    def test_partial_record(self, tmp_path) -> None:
+        """Test an unterminated trailing record is ignored, and terminated as ignored."""
+        path = tmp_path / "history"
+        path.write_bytes(b"one\ntw")
+        h1, h2 = FileLineHistory(str(path)), FileLineHistory(str(path))
+        assert h1.entries == ["one"] and h2.entries == ["one"]
+        h1.add("three")
+        assert path.read_bytes() == b"one\ntw\x00\nthree\n"
+        h2.reload()
+        assert h2.entries == ["one", "three"]
+        assert FileLineHistory(str(path)).entries == ["one", "three"]
+
+    def test_nul_escaped(self, tmp_path) -> None:
+        """Test a line containing NUL is not mistaken for a partial record."""
+        path = str(tmp_path / "history")
+        FileLineHistory(path).add("nul\x00")
+        assert FileLineHistory(path).entries == ["nul\x00"]
+
+    def test_shared_between_instances(self, tmp_path) -> None:
+        """Test entries appended by another instance are merged on add."""
+        path = str(tmp_path / "history")
+        h1, h2 = FileLineHistory(path), FileLineHistory(path)
+        h1.add("first")
+        h2.add("second")
+        h1.add("third")
+        assert h1.entries == ["first", "second", "third"]
+        assert h2.entries == ["first", "second"]
+        h2.reload()
+        assert h2.entries == ["first", "second", "third"]
+
+    def test_compact(self, tmp_path) -> None:
+        """Test compaction keeps the retained entries, and is noticed by other instances."""
+        path = tmp_path / "history"
+        h1 = FileLineHistory(str(path), max_entries=3)
+        h2 = FileLineHistory(str(path), max_entries=3)
+        for line in ("a", "b", "a", "c"):
+            h1.add(line)
+        assert h2.entries == ["b", "a", "c"]
+        h1.compact()
+        assert path.read_bytes() == b"b\na\nc\n"
+        assert h1.entries == ["b", "a", "c"]
+        h2.add("d")
+        assert h2.entries == ["a", "c", "d"]
+        # as in memory, only consecutive duplicates are removed
+        h1.entries = ["x", "y", "y", "x"]
+        assert path.read_bytes() == b"x\ny\nx\n"
+        assert FileLineHistory(str(path)).entries == h1.entries == ["x", "y", "x"]
+
+    def test_compact_on_load(self, tmp_path) -> None:
+        """Test a file mostly made of discarded records is compacted when loaded."""
+        path = tmp_path / "history"
+        path.write_bytes(b"".join(b"%d\n" % (n,) for n in range(20000)))
+        h = FileLineHistory(str(path), max_entries=10)
+        assert path.stat().st_size > 65536
+        assert h.search_prefix("1999") == "19999"
+        assert path.read_bytes() == b"".join(b"%d\n" % (n,) for n in range(19990, 20000))
+
+    def test_compact_on_add(self, tmp_path) -> None:
+        """Test a file grown by a long-lived session is compacted when appended to."""
+        path = tmp_path / "history"
+        h = FileLineHistory(str(path), max_entries=10)
+        for n in range(20000):
+            h.add(f"{n}")
+            assert path.stat().st_size <= 65536 + 6
+        assert h.entries == [f"{n}" for n in range(19990, 20000)]
+        assert FileLineHistory(str(path), max_entries=10).entries == h.entries
+
+    def test_lock_msvcrt(self, tmp_path, monkeypatch) -> None:
+        """Test appends are locked by msvcrt.locking() where fcntl is not available."""
+        calls = []
+
+        class FakeMsvcrt:  # pylint: disable=too-few-public-methods
+            """Records calls of locking(), which gives up once before the lock is held."""
+
+            LK_UNLCK, LK_LOCK = 0, 1
+
+            @staticmethod
+            def locking(fd, mode, nbytes):
+                """
+                Record lock *mode*.
+
+                :raises OSError: On the first attempt.
+                """
+                calls.append((mode, nbytes))
+                if len(calls) == 1:
+                    raise OSError("resource deadlock would occur")
+
+        monkeypatch.setattr("blessed.line_editor.fcntl", None)
+        monkeypatch.setattr("blessed.line_editor.msvcrt", FakeMsvcrt)
+        h = FileLineHistory(str(tmp_path / "history"))
+        h.add("ls")
+        assert calls == [(1, 1), (1, 1), (0, 1)]
+        assert FileLineHistory(str(tmp_path / "history")).entries == ["ls"]
+
+    def test_entries_assignment(self, tmp_path) -> None:
+        """Test assigning entries rewrites the file."""
+        path = tmp_path / "history"
+        h = FileLineHistory(str(path))
+        h.add("old")
+        h.entries = ["x", "y"]
+        assert path.read_bytes() == b"x\ny\n"
+        assert FileLineHistory(str(path)).entries == ["x", "y"]
+
+
 class TestLineEditorBasicEditing:
     """Test basic character insertion, deletion, and line submission."""
 
@@ -506,12 +670,68 @@ class TestLineEditorUndo:
     """Test undo for insert, backspace, delete, and kill operations."""
 
     def test_undo_insert(self) -> None:
-        """Test undo reverses character insertion."""
-        ed = _editor("ab", _CTRL_Z)
-        assert ed.line == "a"
+        """Test undo reverses typed words as one step each."""
+        ed = _editor("ab cd", _CTRL_Z)
+        assert ed.line == "ab "
         ed.feed_key(_CTRL_Z)
         assert ed.line == ""
 
+    def test_undo_typing_not_coalesced_across_edits(self) -> None:
+        """Test typing after another edit or cursor jump starts a new undo step."""
+        ed = _editor("abc", _BACKSPACE, "x", _HOME, "y")
+        assert ed.line == "yabx"
+        ed.feed_key(_CTRL_Z)
+        assert ed.line == "abx"
+        ed.feed_key(_CTRL_Z)
+        assert ed.line == "ab"
+        ed.feed_key(_CTRL_Z)
+        assert ed.line == "abc"
+        assert ed._cursor == 3
+
+    def test_undo_typing_not_coalesced_across_cursor_movement(self) -> None:
+        """Test typing after moving the cursor away and back starts a new undo step."""
+        ed = _editor("ab", _LEFT, _RIGHT, "c")
+        assert ed.line == "abc"
+        ed.feed_key(_CTRL_Z)
+        assert ed.line == "ab"
+        assert ed._cursor == 2
+
+    def test_redo(self) -> None:
+        """Test redo re-applies undone edits, and a new edit discards them."""
+        ed = _editor("ab cd", _CTRL_W, _CTRL_Z, _CTRL_Z)
+        assert ed.line == "ab "
+        ed.feed_key(_CTRL_SHIFT_Z)
+        assert ed.line == "ab cd"
+        ed.feed_key(_CTRL_SHIFT_Z)
+        assert ed.line == "ab "
+        r = ed.feed_key(_CTRL_SHIFT_Z)
+        assert r.changed is False
+        ed.feed_key(_CTRL_Z)
+        ed.feed_key("!")
+        assert ed.line == "ab cd!"
+        assert ed.feed_key(_CTRL_SHIFT_Z).changed is False
+
+    def test_undo_history_navigation(self) -> None:
+        """Test undo restores the line replaced by history navigation."""
+        h = History()
+        h.add("alpha")
+        ed = _editor("be", _UP, history=h)
+        assert ed.line == "alpha"
+        ed.feed_key(_CTRL_Z)
+        assert ed.line == "be"
+
+    def test_undo_limit(self) -> None:
+        """Test undo steps are capped at undo_limit."""
+        ed = _editor("a b c d", undo_limit=2)
+        assert len(ed._undo_stack) == 2
+        ed = LineEditor(undo_limit=3)
+        for _ in range(10):
+            ed.insert_text("x")
+        assert len(ed._undo_stack) == 3
+        for _ in range(4):
+            ed.feed_key(_CTRL_Z)
+        assert ed.line == "x" * 7
+
     @pytest.mark.parametrize("action_keys,mid_line,restored_line", [
         (["a", "b", _BACKSPACE], "a", "ab"),
         (list("hello") + [_CTRL_U], "", "hello"),
@@ -750,6 +970,13 @@ class TestApplyHscroll:
         assert ds.overflow_left is True
         assert ds.cursor == 25 - 20 + wcswidth("\u2026")
 
+    def test_wide_grapheme_at_left_edge(self) -> None:
+        """Test text after a wide grapheme straddling the left edge is not styled as suggestion."""
+        ds = _apply_hscroll("c\u4e16e", "x", 3, 4, scroll_offset=2)
+        assert ds.text == "\u4e16e"
+        assert ds.suggestion == ""
+        assert ds.overflow_left is True
+
     def test_scroll_offset_zero(self) -> None:
         """Test _apply_hscroll with zero scroll offset."""
         ds = _apply_hscroll("a" * 30, "", 3, 10, scroll_offset=0)
@@ -830,6 +1057,28 @@ class TestLineEditorMaxWidth:
         assert ds.overflow_left is False
         assert ds.overflow_right is False
 
+    def test_cursor_column_after_mid_line_edits(self) -> None:
+        """Test cached display columns track inserts and deletes before the cursor."""
+        ed = _editor("\u4e16\u754cab", _HOME, _RIGHT, "x\u4e16", max_width=40)
+        assert ed.line == "\u4e16x\u4e16\u754cab"
+        assert ed.display.cursor == 5
+        ed.feed_key(_HOME)
+        ed.feed_key(_DELETE)
+        ed.feed_key(_END)
+        assert ed.display.cursor == wcswidth("x\u4e16\u754cab")
+        ed.feed_key(_CTRL_W)
+        ed.feed_key(_CTRL_Z)
+        assert ed.display.cursor == wcswidth(ed.line)
+
+    def test_scrolled_window_wide_text(self) -> None:
+        """Test the scrolled window of a long line of wide graphemes."""
+        ed = _editor("\u4e16" * 100, max_width=21)
+        ds = ed.display
+        assert ds.overflow_left is True
+        assert set(ds.text) == {"\u4e16"}
+        assert wcswidth(ds.text) + wcswidth(ed.ellipsis) <= 21
+        assert 0 < ds.cursor <= 21
+
 
 class TestStatefulHScroll:
     """Test stateful horizontal scroll offset tracking."""
@@ -1104,3 +1353,141 @@ class TestIncrementalRender:
         assert result is not None
         if sgr_check:
             assert ed.suggestion_sgr in result
+
+
+class TestMultiLineEditor:
+    """Test MultiLineEditor editing, navigation, undo, and viewport rendering."""
+
+    @staticmethod
+    def _editor(text: str, *keys, **kwargs) -> MultiLineEditor:
+        ed = MultiLineEditor(text, **kwargs)
+        for k in keys:
+            if hasattr(k, "name"):
+                ed.feed_key(k)
+            else:
+                for ch in k:
+                    ed.feed_key(ch)
+        return ed
+
+    def test_enter_splits_and_accept(self) -> None:
+        """Test Enter inserts a line break and Alt+Enter accepts the document."""
+        ed = self._editor("", "ab", _LEFT, _ENTER, "c")
+        assert ed.text == "a\ncb"
+        assert ed.cursor == (1, 1)
+        r = ed.feed_key(_key("KEY_ALT_ENTER"))
+        assert r.line == "a\ncb"
+        assert ed.text == ""
+
+    @pytest.mark.parametrize("keys,expected_text,expected_cursor", [
+        ([_DOWN, _END, _BACKSPACE], "ab\nc\nxyz", (1, 1)),
+        ([_DOWN, _BACKSPACE], "abcd\nxyz", (0, 2)),
+        ([_END, _DELETE], "abcd\nxyz", (0, 2)),
+        ([_END, _CTRL_K], "abcd\nxyz", (0, 2)),
+        ([_DOWN, _CTRL_W], "abcd\nxyz", (0, 2)),
+        ([_RIGHT, _CTRL_K, _DOWN, _CTRL_Y], "a\ncbd\nxyz", (1, 2)),
+    ])
+    def test_edits_across_lines(self, keys, expected_text, expected_cursor) -> None:
+        """Test deletions join lines at line boundaries."""
+        ed = self._editor("ab\ncd\nxyz", *keys)
+        assert ed.text == expected_text
+        assert ed.cursor == expected_cursor
+
+    def test_vertical_goal_column(self) -> None:
+        """Test up/down keep the display column across shorter and wide lines."""
+        ed = self._editor("abcdef\nx\n世世世", _END, _DOWN)
+        assert ed.cursor == (1, 1)
+        ed.feed_key(_DOWN)
+        assert ed.cursor == (2, 3)
+        ed.feed_key(_UP)
+        ed.feed_key(_UP)
+        assert ed.cursor == (0, 6)
+        ed.feed_key(_key("KEY_CTRL_END"))
+        assert ed.cursor == (2, 3)
+        ed.feed_key(_key("KEY_CTRL_HOME"))
+        assert ed.cursor == (0, 0)
+
+    def test_left_right_wrap_lines(self) -> None:
+        """Test left/right move across line boundaries."""
+        ed = self._editor("ab\ncd", _DOWN, _LEFT)
+        assert ed.cursor == (0, 2)
+        ed.feed_key(_RIGHT)
+        assert ed.cursor == (1, 0)
+
+    def test_insert_text_multiline(self) -> None:
+        """Test pasted text keeps line breaks and drops other control characters."""
+        ed = self._editor("<>", _RIGHT)
+        ed.insert_text("a\r\nb\x07\rc")
+        assert ed.text == "<a\nb\nc>"
+        assert ed.cursor == (2, 1)
+        assert ed.insert_text("\x1b").changed is False
+
+    def test_undo_redo(self) -> None:
+        """Test undo and redo of typing, line breaks, and joins."""
+        ed = self._editor("x", _END, "ab", _ENTER, "cd", _HOME, _BACKSPACE)
+        assert ed.text == "xabcd"
+        ed.feed_key(_CTRL_Z)
+        assert ed.text == "xab\ncd"
+        assert ed.cursor == (1, 0)
+        ed.feed_key(_CTRL_Z)
+        assert ed.text == "xab\n"
+        ed.feed_key(_CTRL_Z)
+        assert ed.text == "xab"
+        ed.feed_key(_CTRL_Z)
+        assert ed.text == "x"
+        assert ed.feed_key(_CTRL_Z).changed is False
+        for _ in range(4):
+            ed.feed_key(_CTRL_SHIFT_Z)
+        assert ed.text == "xabcd"
+        assert ed.cursor == (0, 3)
+
+    def test_undo_typing_not_coalesced_across_cursor_movement(self) -> None:
+        """Test typing after moving the cursor away and back starts a new undo step."""
+        ed = self._editor("", "ab", _LEFT, _RIGHT, "c")
+        assert ed.text == "abc"
+        ed.feed_key(_CTRL_Z)
+        assert ed.text == "ab"
+        assert ed.cursor == (0, 2)
+
+    def test_undo_separately_typed_combining_mark(self) -> None:
+        """Test undo restores graphemes typed as separate keystrokes exactly."""
+        ed = self._editor("b", "e", "́", _CTRL_U, _CTRL_Z)
+        assert ed.text == "éb"
+        ed.feed_key(_CTRL_Z)
+        assert ed.text == "b"
+
+    def test_ctrl_d(self) -> None:
+        """Test Ctrl+D is EOF on an empty document, delete otherwise."""
+        assert self._editor("").feed_key(_CTRL_D).eof is True
+        ed = self._editor("ab", _CTRL_D)
+        assert ed.text == "b"
+
+    def test_render_viewport(self) -> None:
+        """Test render draws only viewport rows and scrolls to the cursor."""
+        text = "\n".join(f"line {n}" for n in range(1000))
+        ed = self._editor(text, _key("KEY_PGDOWN"), _key("KEY_PGDOWN"),
+                          height=3, text_sgr="", bg_sgr="<BG>")
+        assert ed.cursor == (6, 0)
+        assert ed.render(_MT, 10, 8) == (
+            "<MV:10,0><BG>line 4<BG>  <NORMAL>"
+            "<MV:11,0><BG>line 5<BG>  <NORMAL>"
+            "<MV:12,0><BG>line 6<BG>  <NORMAL>"
+            "<MV:12,0>")
+
+    def test_render_horizontal_scroll(self) -> None:
+        """Test render clips long lines and keeps the cursor column visible."""
+        ed = self._editor("0123456789\nab", _END, height=3, text_sgr="", bg_sgr="<BG>")
+        assert ed.render(_MT, 0, 4) == (
+            "<MV:0,0><BG>789<BG> <NORMAL>"
+            "<MV:1,0><BG><BG>    <NORMAL>"
+            "<MV:2,0><BG><BG>    <NORMAL>"
+            "<MV:0,3>")
+        ed.feed_key(_HOME)
+        assert ed.render(_MT, 0, 4).startswith("<MV:0,0><BG>0123<NORMAL><MV:1,0><BG>ab<BG>  ")
+
+    def test_render_column_offset(self) -> None:
+        """Test render places the viewport and cursor at the given column."""
+        ed = self._editor("ab\ncd", _END, height=2, text_sgr="", bg_sgr="<BG>")
+        assert ed.render(_MT, 3, 4, col=5) == (
+            "<MV:3,5><BG>ab<BG>  <NORMAL>"
+            "<MV:4,5><BG>cd<BG>  <NORMAL>"
+            "<MV:3,7>")
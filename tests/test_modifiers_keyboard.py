@@ -365,6 +365,41 @@ def test_match_legacy_csi_modifiers_tilde_form(sequence, key_num, expected_mod,
     child()
 
 
+@pytest.mark.parametrize('sequence', [
+    '\x1b[1;5A', '\x1b[1;5:3Dx', '\x1b[1;5:3:1A', '\x1b[1;A', '\x1b[1;5Z', '\x1b[1;5',
+    '\x1b[15;2~', '\x1b[3;5:2~', '\x1b[99;5~', '\x1b[15~', '\x1b[;5~', '\x1b[3;5;1~',
+    '\x1bO2P', '\x1bO0P', '\x1bO5T', '\x1bO2',
+    '\x1b[27;5;97~', '\x1b[27;5;97', '\x1b[27;5;97;', '\x1b[27;5~', '\x1b[27;;97~',
+    '\x1b[27;5;9713', 'a\x1b[1;5A', '\x1b', '',
+])
+def test_legacy_forms_match_patterns(sequence):
+    """Test legacy and modifyOtherKeys sequences are parsed as their documented patterns."""
+    from blessed.keyboard import (RE_PATTERN_MODIFY_OTHER,
+                                  RE_PATTERN_LEGACY_CSI_TILDE,
+                                  RE_PATTERN_LEGACY_SS3_FKEYS,
+                                  RE_PATTERN_LEGACY_CSI_MODIFIERS,
+                                  CSI_TILDE_NUM_TO_KEYCODE,
+                                  _match_modify_other_keys,
+                                  _match_legacy_ss3_fkey_form,
+                                  _match_legacy_csi_tilde_form,
+                                  _match_legacy_csi_letter_form)
+    for match_fn, pattern, valid in (
+            (_match_legacy_csi_letter_form, RE_PATTERN_LEGACY_CSI_MODIFIERS, lambda m: True),
+            (_match_legacy_csi_tilde_form, RE_PATTERN_LEGACY_CSI_TILDE,
+             lambda m: int(m.group('key_num')) in CSI_TILDE_NUM_TO_KEYCODE),
+            (_match_legacy_ss3_fkey_form, RE_PATTERN_LEGACY_SS3_FKEYS,
+             lambda m: m.group('mod') != '0'),
+            (_match_modify_other_keys, RE_PATTERN_MODIFY_OTHER, lambda m: True)):
+        match = pattern.match(sequence)
+        ks = match_fn(sequence)
+        if match is None or not valid(match):
+            assert ks is None
+        else:
+            assert ks == match.group(0)
+            assert ks._match.modifiers == int(match.groupdict().get('mod') or
+                                              match.group('modifiers'))
+
+
 def test_match_legacy_csi_modifiers_non_matching():
     """Test legacy CSI modifier sequences that don't match."""
     @as_subprocess
@@ -1400,3 +1435,24 @@ def test_defensive_ctrl_alt_value_esc_sequence_not_special_app_key():
     assert ks[0] == '\x1b'
     assert ks[1] == 'x'
     assert ks.value == 'x'  # Regular letter has its own value
+
+
+def test_predicate_names_compiled_once():
+    """Test predicate attribute names are parsed once, and shared by all keystrokes."""
+    from unittest import mock
+    ctrl_up = resolve_sequence('\x1b[1;5A', {}, {})
+    with mock.patch.dict('blessed.keyboard._PREDICATES', clear=True), \
+            mock.patch.object(Keystroke, '_get_keycode_by_name',
+                              wraps=Keystroke._get_keycode_by_name) as get_keycode:
+        assert ctrl_up.is_ctrl_up_pressed() is True
+        assert ctrl_up.is_ctrl_up_pressed() is True
+        assert Keystroke('a').is_ctrl_up_pressed() is False
+        assert ctrl_up.is_ctrl_up_pressed.__func__ is Keystroke('a').is_ctrl_up_pressed.__func__
+    assert get_keycode.call_count == 1
+
+    # unnamed keystrokes never match application keys, nor invalid names
+    assert Keystroke('a').is_up() is False
+    with pytest.raises(AttributeError, match='invalid modifier'):
+        Keystroke('a').is_ctrl_nonexistent()
+    with pytest.raises(AttributeError, match='invalid modifier'):
+        Keystroke('a').is_ctrl_nonexistent()
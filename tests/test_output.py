@@ -0,0 +1,331 @@
+"""Tests for buffered terminal output."""
+# std imports
+import os
+import sys
+import asyncio
+import threading
+
+# 3rd party
+import pytest
+
+# local
+from blessed.stats import TerminalStats
+from blessed.output import FrameWriter
+# local
+from .conftest import IS_WINDOWS
+from .accessories import TestTerminal, as_subprocess
+
+
+class RecordingStream:
+    """Output stream recording each write and flush."""
+
+    def __init__(self):
+        self.calls = []
+
+    def write(self, text):
+        """Record a write of *text*."""
+        self.calls.append(('write', text))
+        return len(text)
+
+    def flush(self):
+        """Record a flush."""
+        self.calls.append(('flush',))
+
+
+def test_frame_single_write():
+    """Test output within a frame, including by context managers, is one write and flush."""
+    @as_subprocess
+    def child():
+        stream = RecordingStream()
+        term = TestTerminal(stream=stream, force_styling=True)
+        with term.frame():
+            with term.hidden_cursor():
+                term.stream.write('a')
+                term.stream.flush()
+            term.stream.write('b')
+            assert not stream.calls
+        assert stream.calls == [('write', term.hide_cursor + 'a' + term.normal_cursor + 'b'),
+                                ('flush',)]
+        assert term.stream is stream
+    child()
+
+
+def test_frame_nested_and_exception():
+    """Test nested frames write at the end of the outermost, even when an exception is raised."""
+    @as_subprocess
+    def child():
+        stream = RecordingStream()
+        term = TestTerminal(stream=stream, force_styling=True)
+        with pytest.raises(ValueError):
+            with term.frame():
+                term.stream.write('a')
+                with term.frame():
+                    term.stream.write('b')
+                assert not stream.calls
+                raise ValueError
+        assert stream.calls == [('write', 'ab'), ('flush',)]
+    child()
+
+
+def test_frame_captures_print():
+    """Test print() is collected by a frame of a terminal writing to sys.stdout."""
+    @as_subprocess
+    def child():
+        stream = RecordingStream()
+        stdout, sys.stdout = sys.stdout, stream
+        term = TestTerminal(stream=stream, force_styling=True)
+        try:
+            with term.frame():
+                print('a', flush=True)
+                print('b', end='', flush=True)
+        finally:
+            sys.stdout = stdout
+        assert stream.calls == [('write', 'a\nb'), ('flush',)]
+    child()
+
+
+def test_frame_query_writes_preceding_output():
+    """Test a query within a frame is written together with the output preceding it."""
+    @as_subprocess
+    def child():
+        stream = RecordingStream()
+        term = TestTerminal(stream=stream, force_styling=True, is_a_tty=True)
+        with term.frame(synchronized=False):
+            term.stream.write(term.move_yx(3, 4))
+            assert term.get_location(timeout=0.01) == (-1, -1)
+            assert stream.calls == [('write', term.move_yx(3, 4) + '\x1b[6n'), ('flush',)]
+            term.stream.write('c')
+        assert stream.calls[2:] == [('write', 'c'), ('flush',)]
+    child()
+
+
+def test_frame_stats():
+    """Test a frame is counted as one write and flush, also when stats are set within it."""
+    @as_subprocess
+    def child():
+        stream = RecordingStream()
+        term = TestTerminal(stream=stream, force_styling=True)
+        term.stats = stats = TerminalStats()
+        with term.frame():
+            term.stream.write('a')
+            term.stream.write('b')
+        assert (stats.write_calls, stats.flush_calls, stats.bytes_written) == (1, 1, 2)
+
+        with term.frame():
+            term.stats = stats = TerminalStats()
+            term.stream.write('a')
+        assert (stats.write_calls, stats.flush_calls) == (1, 1)
+        term.stats = None
+        assert term.stream is stream
+    child()
+
+
+def test_frame_synchronized():
+    """Test frames begin and end synchronized output in their write, when it is supported."""
+    @as_subprocess
+    def child():
+        stream = RecordingStream()
+        term = TestTerminal(stream=stream, force_styling=True, is_a_tty=True)
+        term.ungetch('\x1b[?2026;2$y\x1b[1;1R')
+        with term.frame(timeout=0.01):
+            term.stream.write('a')
+        # support is queried only by the first frame
+        assert stream.calls[2:] == [('write', '\x1b[?2026ha\x1b[?2026l'), ('flush',)]
+        del stream.calls[:]
+        with term.frame(timeout=0.01):
+            term.stream.write('b')
+        assert stream.calls == [('write', '\x1b[?2026hb\x1b[?2026l'), ('flush',)]
+
+        # not when already enabled, nor when disabled by argument
+        del stream.calls[:]
+        with term.synchronized_output(), term.frame():
+            term.stream.write('c')
+        with term.frame(synchronized=False):
+            term.stream.write('d')
+        assert stream.calls == [('write', '\x1b[?2026h'), ('flush',),
+                                ('write', 'c'), ('flush',),
+                                ('write', '\x1b[?2026l'), ('flush',),
+                                ('write', 'd'), ('flush',)]
+    child()
+
+
+def test_frame_synchronized_unsupported():
+    """Test frames without synchronized output query its support once, and not for pipes."""
+    @as_subprocess
+    def child():
+        stream = RecordingStream()
+        term = TestTerminal(stream=stream, force_styling=True, is_a_tty=True)
+        with term.frame(timeout=0.01):
+            term.stream.write('a')
+        with term.frame(timeout=0.01):
+            term.stream.write('b')
+        writes = [call[1] for call in stream.calls if call[0] == 'write']
+        assert writes[1:] == ['a', 'b'] and '2026' in writes[0]
+
+        stream = RecordingStream()
+        term = TestTerminal(stream=stream, force_styling=True)
+        with term.frame(timeout=0.01):
+            term.stream.write('a')
+        assert stream.calls == [('write', 'a'), ('flush',)]
+    child()
+
+
+def _read_all(read_fd, size):
+    data = b''
+    while len(data) < size:
+        data += os.read(read_fd, size - len(data))
+    return data
+
+
+@pytest.mark.skipif(IS_WINDOWS, reason="non-blocking pipes are not supported on Windows")
+def test_frame_writer_replaces_waiting_frames():
+    """Test a slow reader receives the frame begun whole, then only the latest frame."""
+    @as_subprocess
+    def child():
+        read_fd, write_fd = os.pipe()
+        with FrameWriter(write_fd, max_pending=1000) as writer:
+            # larger than any pipe buffer, so that it cannot be written at once
+            first = 'a' * (1 << 20)
+            assert not writer.submit(first)
+            assert writer.backlogged and 0 < writer.pending < len(first)
+            assert not writer.submit('b' * 10)
+            assert not writer.submit('c' * 10, replace=True)
+            assert writer.dropped == 1
+            assert not writer.wait(timeout=0.01)
+
+            received = []
+            reader = threading.Thread(
+                target=lambda: received.append(_read_all(read_fd, len(first) + 10)))
+            reader.start()
+            assert writer.wait(timeout=10)
+            reader.join()
+            assert received == [first.encode() + b'c' * 10]
+            assert writer.pending == 0 and not writer.backlogged
+        # blocking mode is restored
+        assert os.get_blocking(write_fd)
+        os.close(read_fd)
+        os.close(write_fd)
+    child()
+
+
+@pytest.mark.skipif(IS_WINDOWS, reason="non-blocking pipes are not supported on Windows")
+def test_frame_writer_drain_async():
+    """Test drain() writes all pending output as the reader catches up."""
+    @as_subprocess
+    def child():
+        read_fd, write_fd = os.pipe()
+        os.set_blocking(read_fd, False)
+
+        async def main(writer):
+            loop = asyncio.get_running_loop()
+            received = bytearray()
+
+            def on_readable():
+                try:
+                    received.extend(os.read(read_fd, 1 << 16))
+                except BlockingIOError:
+                    pass
+
+            loop.add_reader(read_fd, on_readable)
+            try:
+                writer.submit('x' * (1 << 20))
+                assert await writer.drain()
+                while len(received) < 1 << 20:
+                    await asyncio.sleep(0.001)
+            finally:
+                loop.remove_reader(read_fd)
+            return bytes(received)
+
+        with FrameWriter(write_fd) as writer:
+            loop = asyncio.new_event_loop()
+            try:
+                assert loop.run_until_complete(main(writer)) == b'x' * (1 << 20)
+            finally:
+                loop.close()
+        os.close(read_fd)
+        os.close(write_fd)
+    child()
+
+
+@pytest.mark.skipif(IS_WINDOWS, reason="non-blocking pipes are not supported on Windows")
+def test_frame_submitted_to_writer():
+    """Test a frame given a writer is submitted to it, after output preceding the frame."""
+    @as_subprocess
+    def child():
+        read_fd, write_fd = os.pipe()
+        stream = RecordingStream()
+        term = TestTerminal(stream=stream, force_styling=True)
+        with FrameWriter(write_fd) as writer:
+            term.stream.write('a')
+            with term.frame(writer=writer, replace=True):
+                term.stream.write('b')
+                term.stream.write('é')
+        assert stream.calls == [('write', 'a'), ('flush',)]
+        assert os.read(read_fd, 10) == 'bé'.encode('utf-8')
+        os.close(read_fd)
+        os.close(write_fd)
+    child()
+
+
+@pytest.mark.skipif(IS_WINDOWS, reason="non-blocking pipes are not supported on Windows")
+def test_frame_writer_query_and_stats():
+    """Test a query within a frame given a writer is written by it, and its writes counted."""
+    @as_subprocess
+    def child():
+        read_fd, write_fd = os.pipe()
+        stream = RecordingStream()
+        term = TestTerminal(stream=stream, force_styling=True, is_a_tty=True)
+        term.stats = stats = TerminalStats()
+        with FrameWriter(write_fd) as writer:
+            writer.submit('a')
+            with term.frame(writer=writer, synchronized=False):
+                term.stream.write('b')
+                assert term.get_location(timeout=0.01) == (-1, -1)
+                assert os.read(read_fd, 100) == b'ab\x1b[6n'
+                term.stream.write('c')
+            assert os.read(read_fd, 100) == b'c'
+        assert not [call for call in stream.calls if call[0] == 'write']
+        assert (stats.write_calls, stats.bytes_written) == (2, 6)
+        os.close(read_fd)
+        os.close(write_fd)
+    child()
+
+
+@pytest.mark.skipif(IS_WINDOWS, reason="non-blocking pipes are not supported on Windows")
+def test_frame_writer_wait_current():
+    """Test wait(current=True) writes the frame begun whole, and not those waiting."""
+    @as_subprocess
+    def child():
+        read_fd, write_fd = os.pipe()
+        with FrameWriter(write_fd) as writer:
+            first = 'a' * (1 << 20)
+            writer.submit(first)
+            writer.submit('b' * 10)
+            received = []
+            reader = threading.Thread(
+                target=lambda: received.append(_read_all(read_fd, len(first))))
+            reader.start()
+            assert writer.wait(timeout=10, current=True)
+            reader.join()
+            assert received == [first.encode()]
+            assert writer.pending == 10
+        os.close(read_fd)
+        os.close(write_fd)
+    child()
+
+
+@pytest.mark.skipif(IS_WINDOWS, reason="pseudo-terminals are not supported on Windows")
+def test_frame_writer_tty():
+    """Test a terminal is written by a non-blocking descriptor of its own."""
+    @as_subprocess
+    def child():
+        master_fd, slave_fd = os.openpty()
+        with FrameWriter(slave_fd) as writer:
+            assert writer.fileno() != slave_fd
+            assert not os.get_blocking(writer.fileno())
+            assert os.get_blocking(slave_fd)
+            assert writer.submit('frame')
+            assert os.read(master_fd, 10) == b'frame'
+        os.close(master_fd)
+        os.close(slave_fd)
+    child()
@@ -0,0 +1,129 @@
+"""Tests for rendering RGB pixels as colored characters."""
+# std imports
+import io
+
+# 3rd party
+import pytest
+
+# local
+import blessed.raster
+from blessed.raster import RASTER_MODES, render_raster
+from .accessories import TestTerminal, as_subprocess
+
+NUMPY_BACKEND_MODULE = blessed.raster
+
+RED, BLUE, WHITE, BLACK = (255, 0, 0), (0, 0, 255), (255, 255, 255), (0, 0, 0)
+
+
+def _pixels(*rows):
+    return bytes(value for row in rows for pixel in row for value in pixel)
+
+
+@pytest.mark.usefixtures('numpy_backend')
+def test_render_raster_halfblock():
+    """Test halfblock cells draw the upper pixel by foreground over the lower by background."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=io.StringIO(), force_styling=True)
+        term.number_of_colors = 1 << 24
+        lines = render_raster(term, _pixels([RED, BLUE, BLUE], [RED, RED, WHITE]), 3, 2)
+        assert lines == ['\x1b[48;2;255;0;0m '
+                         '\x1b[38;2;0;0;255m▀'
+                         '\x1b[48;2;255;255;255m▀' + term.normal]
+    child()
+
+
+@pytest.mark.usefixtures('numpy_backend')
+def test_render_raster_halfblock_odd_height():
+    """Test images of odd height are padded with black pixels."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=io.StringIO(), force_styling=True)
+        term.number_of_colors = 1 << 24
+        lines = render_raster(term, _pixels([WHITE], [WHITE], [WHITE]), 1, 3)
+        assert lines == ['\x1b[48;2;255;255;255m ' + term.normal,
+                         '\x1b[38;2;255;255;255;48;2;0;0;0m▀' + term.normal]
+    child()
+
+
+@pytest.mark.usefixtures('numpy_backend')
+def test_render_raster_sextant():
+    """Test sextant cells split pixels brighter than the mean into the foreground."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=io.StringIO(), force_styling=True)
+        term.number_of_colors = 1 << 24
+        # first cell, upper-left, upper-right, and middle-left white: SEXTANT-123.
+        # second cell, left column white: left half block.
+        lines = render_raster(term, _pixels([WHITE, WHITE, WHITE, BLACK],
+                                            [WHITE, BLACK, WHITE, BLACK],
+                                            [BLACK, BLACK, WHITE, BLACK]), 4, 3, 'sextant')
+        assert lines == ['\x1b[38;2;255;255;255;48;2;0;0;0m\U0001FB06▌' + term.normal]
+    child()
+
+
+@pytest.mark.usefixtures('numpy_backend')
+def test_render_raster_braille():
+    """Test braille cells draw brighter pixels as dots, and uniform cells as blank."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=io.StringIO(), force_styling=True)
+        term.number_of_colors = 1 << 24
+        # first cell, a diagonal of dots 1, 5, and 8; second cell, uniform red
+        lines = render_raster(term, _pixels([WHITE, BLACK, RED, RED],
+                                            [BLACK, WHITE, RED, RED],
+                                            [BLACK, BLACK, RED, RED],
+                                            [BLACK, WHITE, RED, RED]), 4, 4, 'braille')
+        assert lines == ['\x1b[38;2;255;255;255;48;2;0;0;0m⢑'
+                         '\x1b[48;2;255;0;0m⠀' + term.normal]
+    child()
+
+
+@pytest.mark.usefixtures('numpy_backend')
+def test_render_raster_downconvert():
+    """Test colors of 256-color terminals are deduplicated by their nearest color."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=io.StringIO(), force_styling=True)
+        term.number_of_colors = 256
+        # both reds convert to the same color, 196, repeated only once
+        lines = render_raster(term, _pixels([RED, (250, 0, 0)], [BLUE, BLUE]), 2, 2)
+        assert lines == [term.color(196) + term.on_color(21) + '▀▀' + term.normal]
+    child()
+
+
+@pytest.mark.parametrize('mode', list(RASTER_MODES))
+def test_render_raster_backends_agree(mode):
+    """Test render_raster output is identical with and without NumPy."""
+    if blessed.raster.numpy is None:
+        pytest.skip('numpy not installed')
+
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=io.StringIO(), force_styling=True)
+        term.number_of_colors = 1 << 24
+        width, height = 23, 17
+        pixels = bytes((x * 37 + y * 11) % 256 for y in range(height) for x in range(width * 3))
+        array = blessed.raster.numpy.frombuffer(pixels, dtype='uint8').reshape(height, width, 3)
+        expected = render_raster(term, pixels, width, height, mode)
+        assert render_raster(term, array, width, height, mode) == expected
+        blessed.raster.numpy, numpy = None, blessed.raster.numpy
+        try:
+            assert render_raster(term, pixels, width, height, mode) == expected
+        finally:
+            blessed.raster.numpy = numpy
+    child()
+
+
+@pytest.mark.parametrize('kwargs,match', [
+    ({'mode': 'quadrant'}, 'mode must be one of'),
+    ({'width': 2}, 'expected 12 bytes'),
+])
+def test_render_raster_invalid(kwargs, match):
+    """Test render_raster raises ValueError for bad arguments."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=io.StringIO(), force_styling=True)
+        with pytest.raises(ValueError, match=match):
+            render_raster(term, bytes(11), **{'width': 2, 'height': 2, **kwargs})
+    child()
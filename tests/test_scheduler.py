@@ -0,0 +1,213 @@
+"""Tests for the render loop of Terminal.run and Scheduler."""
+# std imports
+import io
+import os
+import codecs
+import signal
+import asyncio
+import contextlib
+
+# 3rd party
+import pytest
+
+# local
+from blessed.scheduler import Scheduler
+# local
+from .conftest import IS_WINDOWS
+from .accessories import TestTerminal, as_subprocess, make_enabled_dec_cache
+
+
+def test_scheduler_invalid_fps():
+    """Test Scheduler raises ValueError for fps not positive."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=io.StringIO())
+        with pytest.raises(ValueError, match='fps must be positive'):
+            Scheduler(term, lambda: None, fps=0)
+    child()
+
+
+def test_run_stops_by_on_key():
+    """Test keystrokes are passed to on_key, and the loop stops when it returns False."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=io.StringIO())
+        keys, frames = [], []
+        term.ungetch('abq')
+        term.run(lambda: frames.append(len(keys)),
+                 lambda key: keys.append(key) or key != 'q')
+        assert keys == ['a', 'b', 'q']
+        # the keystrokes preceding 'q' were not drawn, the loop stopped first
+        assert frames == [0]
+    child()
+
+
+def test_scheduler_coalesces_invalidations():
+    """Test keystrokes received together are drawn by one frame, each frame one write."""
+    @as_subprocess
+    def child():
+        stream = io.StringIO()
+        term = TestTerminal(stream=stream)
+        keys, frames = [], []
+
+        def on_frame():
+            frames.append(''.join(keys))
+            term.stream.write('frame;')
+
+        scheduler = Scheduler(term, on_frame, keys.append, fps=1000)
+        scheduler.call_later(0.05, scheduler.stop)
+        term.ungetch('abc')
+        scheduler.run()
+        assert frames == ['', 'abc']
+        assert scheduler.frames == 2
+        assert stream.getvalue() == 'frame;frame;'
+    child()
+
+
+def test_scheduler_timers():
+    """Test timers are called in order, and cancelled timers are not."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=io.StringIO())
+        calls = []
+        scheduler = Scheduler(term, lambda: None)
+        scheduler.call_later(0.02, lambda: calls.append(2))
+        scheduler.call_later(0.01, lambda: calls.append(1))
+        scheduler.call_later(0.015, lambda: calls.append('cancelled')).cancel()
+        scheduler.call_later(0.03, scheduler.stop)
+        scheduler.run()
+        assert calls == [1, 2]
+    child()
+
+
+def test_scheduler_paces_animation():
+    """Test animated frames are drawn no more often than fps."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=io.StringIO())
+        scheduler = Scheduler(term, lambda: None, fps=50, animate=True)
+        scheduler.call_later(0.2, scheduler.stop)
+        scheduler.run()
+        # 0.2 seconds at 50 fps
+        assert 5 <= scheduler.frames <= 11
+    child()
+
+
+def test_scheduler_ends_when_nothing_can_wake_it():
+    """Test the loop ends after the first frame without keyboard, timers, or resize signal."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=io.StringIO())
+        frames = []
+        scheduler = Scheduler(term, lambda: frames.append(1))
+        scheduler._resize_wakeup = contextlib.nullcontext
+        scheduler.run()
+        assert frames == [1]
+    child()
+
+
+@pytest.mark.skipif(IS_WINDOWS, reason="SIGWINCH is not supported on Windows")
+def test_scheduler_resize_signal():
+    """Test SIGWINCH invalidates the screen, chained to and restoring the previous handler."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=io.StringIO())
+        received = []
+
+        def previous(signum, frame):
+            received.append(signum)
+
+        signal.signal(signal.SIGWINCH, previous)
+        scheduler = Scheduler(term, lambda: None, fps=1000)
+        scheduler.call_later(0.01, lambda: os.kill(os.getpid(), signal.SIGWINCH))
+        scheduler.call_later(0.05, scheduler.stop)
+        scheduler.run()
+        assert received == [signal.SIGWINCH]
+        assert scheduler.frames == 2
+        assert signal.getsignal(signal.SIGWINCH) is previous
+    child()
+
+
+@pytest.mark.skipif(IS_WINDOWS, reason="SIGWINCH is not supported on Windows")
+def test_scheduler_resize_quiet_period():
+    """Test a burst of resizes is handled once, after the quiet period, with the last event."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=io.StringIO())
+        term._dec_mode_cache = make_enabled_dec_cache()
+        keys, frames = [], []
+        scheduler = Scheduler(term, lambda: frames.append(len(keys)), keys.append,
+                              fps=1000, quiet_period=0.05)
+        for delay in (0.01, 0.02, 0.03):
+            scheduler.call_later(delay, lambda: os.kill(os.getpid(), signal.SIGWINCH))
+        scheduler.call_later(0.04, lambda: term.ungetch('\x1b[48;24;80;0;0t'))
+        scheduler.call_later(0.045, lambda: term.ungetch('\x1b[48;30;100;0;0t'))
+        scheduler.call_later(0.15, scheduler.stop)
+        scheduler.run()
+        assert [key._mode_values.height_chars for key in keys] == [30]
+        assert frames == [0, 1]
+    child()
+
+
+def test_async_run():
+    """Test async_run passes keystrokes to on_key and draws frames, until stopped."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=io.StringIO())
+        keys, frames = [], []
+        term.ungetch('xq')
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(term.async_run(
+                lambda: frames.append(len(keys)), lambda key: keys.append(key) or key != 'q'))
+        finally:
+            loop.close()
+        assert keys == ['x', 'q'] and frames == [0]
+    child()
+
+
+@pytest.mark.skipif(IS_WINDOWS, reason="SIGWINCH is not supported on Windows")
+def test_scheduler_run_async_resize_and_timers():
+    """Test run_async wakes by SIGWINCH and timers, coalescing into one frame each."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=io.StringIO())
+        scheduler = Scheduler(term, lambda: None, fps=1000)
+        scheduler.call_later(0.01, lambda: os.kill(os.getpid(), signal.SIGWINCH))
+        scheduler.call_later(0.05, scheduler.stop)
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(scheduler.run_async())
+        finally:
+            loop.close()
+        assert scheduler.frames == 2
+    child()
+
+
+@pytest.mark.skipif(IS_WINDOWS, reason="select() of pipes is not supported on Windows")
+def test_scheduler_ends_at_keyboard_eof():
+    """Test the loop stops at end of file of the keyboard, rather than wake again and again."""
+    @as_subprocess
+    def child():
+        for run_async in (False, True):
+            read_fd, write_fd = os.pipe()
+            os.close(write_fd)
+            term = TestTerminal(stream=io.StringIO())
+            term._keyboard_fd = read_fd
+            term._keyboard_decoder = codecs.getincrementaldecoder('utf8')()
+            frames = []
+            scheduler = Scheduler(term, lambda frames=frames: frames.append(1))
+            scheduler._resize_wakeup = contextlib.nullcontext
+            if run_async:
+                loop = asyncio.new_event_loop()
+                try:
+                    loop.run_until_complete(scheduler.run_async())
+                finally:
+                    loop.close()
+            else:
+                scheduler.run()
+            assert frames == [1]
+            # the terminal itself still reports the keyboard as ready to read
+            assert term.kbhit(timeout=0) and term.getch() == ''
+            os.close(read_fd)
+    child()
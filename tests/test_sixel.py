@@ -10,6 +10,7 @@ import time
 import pytest
 
 # local
+import blessed.sixel
 from .conftest import TEST_QUICK, IS_WINDOWS
 from .accessories import (
     SEMAPHORE,
@@ -23,6 +24,8 @@ from .accessories import (
 pytestmark = pytest.mark.skipif(
     IS_WINDOWS, reason="ungetch and PTY testing not supported on Windows")
 
+NUMPY_BACKEND_MODULE = blessed.sixel
+
 
 @pytest.mark.parametrize('da1_response,has_sixel,expected_output', [
     ('\x1b[?64;1;2;4c', True, 'SIXEL_YES'),  # VT420 with Sixel (4)
@@ -783,3 +786,127 @@ def test_get_sixel_height_and_width_not_a_tty():
         result = term.get_sixel_height_and_width(timeout=0.1)
         assert result == (-1, -1)
     child()
+
+
+@pytest.mark.parametrize('colors,expected', [
+    (256, (6, 7, 6)),
+    (1024, (6, 7, 6)),
+    (64, (4, 4, 4)),
+    (16, (2, 3, 2)),
+    (8, (2, 2, 2)),
+    (4, (2, 2, 1)),
+    (2, (1, 2, 1)),
+    (1, (1, 1, 1)),
+    (0, (1, 1, 1)),
+])
+def test_palette_levels(colors, expected):
+    """Test palette_levels() fits the largest color cube within the register count."""
+    from blessed.sixel import palette_levels
+    assert palette_levels(colors) == expected
+
+
+def test_sixel_palette():
+    """Test sixel_palette() spans each channel from 0 to 255."""
+    from blessed.sixel import sixel_palette
+    palette = sixel_palette((2, 3, 2))
+    assert len(palette) == 12
+    assert palette[0] == (0, 0, 0)
+    assert palette[1] == (0, 0, 255)
+    assert palette[2] == (0, 128, 0)
+    assert palette[6] == (255, 0, 0)
+    assert palette[-1] == (255, 255, 255)
+
+
+@pytest.mark.usefixtures('numpy_backend')
+def test_encode_sixel_bands():
+    """Test encode_sixel() defines used colors and encodes each band of six rows."""
+    from blessed.sixel import encode_sixel
+    red, blue = [255, 0, 0], [0, 0, 255]
+    # 2x8 image, rows 0-1 red, 2-3 blue, 4-7 red
+    pixels = bytes((red * 2) * 2 + (blue * 2) * 2 + (red * 2) * 4)
+    result = ''.join(encode_sixel(pixels, 2, 8, colors=16))
+    assert result == ('\x1bP0;1;0q"1;1;2;8'
+                      '#1;2;0;0;100#6;2;100;0;0'
+                      '#1KK$#6rr'
+                      '-#6BB'
+                      '\x1b\\')
+
+
+@pytest.mark.usefixtures('numpy_backend')
+def test_encode_sixel_run_length():
+    """Test encode_sixel() compresses runs of four or more identical sixels."""
+    from blessed.sixel import encode_sixel
+    white, black = [255, 255, 255], [0, 0, 0]
+    # one row: 3 white, 5 black, 10 white, 2 black
+    pixels = bytes(white * 3 + black * 5 + white * 10 + black * 2)
+    result = ''.join(encode_sixel(pixels, 20, 1))
+    assert result == ('\x1bP0;1;0q"1;1;20;1'
+                      '#0;2;0;0;0#251;2;100;100;100'
+                      '#0???!5@!10?@@$#251@@@!5?!10@'
+                      '\x1b\\')
+
+
+@pytest.mark.usefixtures('numpy_backend')
+def test_encode_sixel_few_registers():
+    """Test encode_sixel() uses no more color registers than reported."""
+    from blessed.sixel import encode_sixel
+    white, black = [255, 255, 255], [0, 0, 0]
+    pixels = bytes(white * 2 + black * 2)
+    result = ''.join(encode_sixel(pixels, 4, 1, colors=2))
+    assert result == ('\x1bP0;1;0q"1;1;4;1'
+                      '#0;2;0;0;0#1;2;0;100;0'
+                      '#0??@@$#1@@'
+                      '\x1b\\')
+
+
+@pytest.mark.usefixtures('numpy_backend')
+def test_encode_sixel_chunks():
+    """Test encode_sixel() yields chunks of about chunk_size, forming one sequence."""
+    from blessed.sixel import encode_sixel
+    width, height = 16, 60
+    pixels = bytes((x * 16 + y) % 256 for y in range(height) for x in range(width * 3))
+    whole = ''.join(encode_sixel(pixels, width, height))
+    chunks = list(encode_sixel(pixels, width, height, chunk_size=64))
+    assert len(chunks) > 2
+    assert ''.join(chunks) == whole
+    assert whole.count('-') == 9
+    assert whole.startswith('\x1bP') and whole.endswith('\x1b\\')
+
+
+def test_encode_sixel_backends_agree():
+    """Test encode_sixel() output is identical with and without NumPy."""
+    if blessed.sixel.numpy is None:
+        pytest.skip('numpy not installed')
+    width, height = 37, 23
+    pixels = bytes((x * 7 + y * 13) % 256 for y in range(height) for x in range(width * 3))
+    array = blessed.sixel.numpy.frombuffer(pixels, dtype='uint8').reshape(height, width, 3)
+    expected = ''.join(blessed.sixel.encode_sixel(pixels, width, height, colors=64))
+    assert ''.join(blessed.sixel.encode_sixel(array, width, height, colors=64)) == expected
+    blessed.sixel.numpy, numpy = None, blessed.sixel.numpy
+    try:
+        assert ''.join(blessed.sixel.encode_sixel(pixels, width, height, colors=64)) == expected
+    finally:
+        blessed.sixel.numpy = numpy
+
+
+@pytest.mark.usefixtures('numpy_backend')
+def test_encode_sixel_bad_length():
+    """Test encode_sixel() raises ValueError when pixels do not match dimensions."""
+    from blessed.sixel import encode_sixel
+    with pytest.raises(ValueError, match='expected 12 bytes'):
+        list(encode_sixel(bytes(11), 2, 2))
+
+
+def test_draw_sixel_not_a_tty():
+    """Test draw_sixel() writes to stream with 256 registers when not a TTY."""
+    from blessed.sixel import encode_sixel
+
+    @as_subprocess
+    def child():
+        stream = io.StringIO()
+        term = TestTerminal(stream=stream, force_styling=True)
+        term._is_a_tty = False
+        pixels = bytearray(range(48))
+        term.draw_sixel(memoryview(pixels), 4, 4)
+        assert stream.getvalue() == ''.join(encode_sixel(bytes(pixels), 4, 4, colors=256))
+    child()
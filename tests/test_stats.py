@@ -0,0 +1,176 @@
+"""Tests for counting terminal input, output, and queries by Terminal.stats."""
+# std imports
+import io
+import os
+import codecs
+import asyncio
+
+# 3rd party
+import pytest
+
+# local
+from blessed.keyboard import DeviceAttribute
+from blessed.stats import FeatureStats, TerminalStats
+# local
+from .conftest import IS_WINDOWS
+from .accessories import TestTerminal, as_subprocess, make_enabled_dec_cache
+
+
+def test_stats_default_none():
+    """Test stats are not collected unless set, and the stream is not wrapped."""
+    @as_subprocess
+    def child():
+        stream = io.StringIO()
+        term = TestTerminal(stream=stream, force_styling=True)
+        assert term.stats is None
+        assert term.stream is stream
+    child()
+
+
+def test_stats_bytes_written():
+    """Test writes and flushes to the stream are counted, until stats are unset."""
+    @as_subprocess
+    def child():
+        stream = io.StringIO()
+        term = TestTerminal(stream=stream, force_styling=True)
+        term.stats = stats = TerminalStats()
+        term.stream.write('héllo')
+        term.stream.flush()
+        assert (stats.write_calls, stats.flush_calls, stats.bytes_written) == (1, 1, 6)
+        assert stream.getvalue() == 'héllo'
+
+        # replacing stats does not wrap the stream twice
+        term.stats = other = TerminalStats()
+        term.stream.write('x')
+        assert stats.write_calls == 1 and other.write_calls == 1
+
+        term.stats = None
+        assert term.stream is stream
+    child()
+
+
+def test_stats_attribute_resolutions():
+    """Test capabilities are counted when first resolved, and not when cached."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=io.StringIO(), force_styling=True)
+        bold_red = term.bold + term.red
+        term.stats = TerminalStats()
+        assert term.bold_red == bold_red
+        assert term.bold_red == bold_red
+        assert term.stats.attribute_resolutions == 1
+    child()
+
+
+def test_stats_query_timeout_and_cache_hits():
+    """Test query round trips, timeouts, and cache hits are counted by their public method."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=io.StringIO(), force_styling=True, is_a_tty=True)
+        term.stats = TerminalStats()
+        assert term.get_device_attributes(timeout=0.01) is None
+        assert term.get_device_attributes(timeout=0.01) is None
+        stats = term.stats.features['get_device_attributes']
+        assert (stats.queries, stats.timeouts, stats.cache_hits) == (1, 1, 1)
+        assert stats.seconds >= 0.01
+
+        term.ungetch('\x1b[?2004;1$y\x1b[1;1R')
+        term.get_dec_mode(2004, timeout=0.01)
+        term.get_dec_mode(2004, timeout=0.01)
+        assert term.stats.features['get_dec_mode'] == FeatureStats(
+            queries=1, timeouts=0, seconds=term.stats.features['get_dec_mode'].seconds,
+            cache_hits=1)
+
+        summary = term.stats.summary()
+        assert summary.index('get_device_attributes:') < summary.index('get_dec_mode:')
+        assert 'get_device_attributes: 1 queries, 1 timeouts' in summary
+    child()
+
+
+def test_stats_query_without_feature():
+    """Test queries not named by a feature are not counted."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=io.StringIO(), force_styling=True, is_a_tty=True)
+        term.stats = TerminalStats()
+        assert term._query_response('\x1b[c', DeviceAttribute.RE_RESPONSE, timeout=0.01) is None
+        assert not term.stats.features
+    child()
+
+
+def test_stats_escape_delay():
+    """Test a bare escape awaiting esc_delay is counted."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=io.StringIO(), force_styling=True)
+        term.stats = TerminalStats()
+        term.ungetch('\x1b')
+        assert term.inkey(timeout=0, esc_delay=0.01) == '\x1b'
+        assert term.stats.escape_delay_waits == 1
+        assert term.stats.escape_delay_seconds >= 0.01
+        assert term.stats.inkey_calls == 1
+    child()
+
+
+def test_stats_coalesced_resize():
+    """Test resize events coalesced by a quiet period are counted as one inkey call."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=io.StringIO(), force_styling=True)
+        term._dec_mode_cache = make_enabled_dec_cache()
+        term._resize_quiet_period = 0.01
+        term.stats = TerminalStats()
+        term.ungetch('\x1b[48;24;80;0;0t\x1b[48;30;100;0;0t')
+        assert term.inkey(timeout=0)._mode_values.height_chars == 30
+        assert term.stats.inkey_calls == 1
+        assert term.stats.inkey_seconds >= 0.01
+    child()
+
+
+@pytest.mark.skipif(IS_WINDOWS, reason="select() of pipes is not supported on Windows")
+def test_stats_keyboard_reads():
+    """Test inkey counts kbhit and getch system calls, and bytes read."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=io.StringIO(), force_styling=True)
+        read_fd, write_fd = os.pipe()
+        term._keyboard_fd = read_fd
+        term._keyboard_decoder = codecs.getincrementaldecoder('utf-8')()
+        term.stats = TerminalStats()
+        os.write(write_fd, 'é'.encode('utf-8'))
+        assert term.inkey(timeout=1) == 'é'
+        assert (term.stats.getch_calls, term.stats.bytes_read) == (2, 2)
+        # one kbhit awaiting the first byte, one finding the second, one finding no more
+        assert term.stats.kbhit_calls == 3
+        assert term.stats.inkey_calls == 1
+        os.close(read_fd)
+        os.close(write_fd)
+    child()
+
+
+@pytest.mark.skipif(IS_WINDOWS, reason="add_reader() of pipes is not supported on Windows")
+def test_stats_async_inkey():
+    """Test async_inkey counts calls, waits for input as kbhit, and reads as getch."""
+    @as_subprocess
+    def child():
+        term = TestTerminal(stream=io.StringIO(), force_styling=True)
+        read_fd, write_fd = os.pipe()
+        term._keyboard_fd = read_fd
+        term._keyboard_decoder = codecs.getincrementaldecoder('utf-8')()
+        term.stats = TerminalStats()
+        loop = asyncio.new_event_loop()
+        loop.call_later(0.01, os.write, write_fd, b'x')
+        try:
+            assert loop.run_until_complete(term.async_inkey(timeout=1)) == 'x'
+            assert loop.run_until_complete(term.async_inkey(timeout=0.01)) == ''
+        finally:
+            loop.close()
+        assert term.stats.inkey_calls == 2
+        assert term.stats.inkey_seconds >= 0.01
+        assert (term.stats.getch_calls, term.stats.bytes_read) == (1, 1)
+        # for each call, one kbhit finding nothing buffered, and one wait of the event loop,
+        # and one kbhit finding nothing more after 'x'
+        assert term.stats.kbhit_calls == 5
+        os.close(read_fd)
+        os.close(write_fd)
+    child()